@@ -1,9 +1,7 @@
 # agent_ai1_scrapper.py
 import os
-import shutil
 import sys
-import subprocess
-import time
+import atexit
 
 # Ajoute le dossier courant au path pour les imports si nécessaire
 sys.path.append(os.path.dirname(os.path.abspath(__file__))) 
@@ -15,10 +13,28 @@ try:
 except ImportError:
     Config = None
 
-def run_scrapping_agent():
+from utils.scraper_worker import ScraperWorker
+from utils.content_store import ContentStore
+
+# Worker unique, conservé entre les relances de script Streamlit (le module reste importé)
+_WORKER = None
+
+
+def get_worker():
+    """Retourne le worker de scraping persistant (créé au premier appel, arrêté à la sortie)."""
+    global _WORKER
+    if _WORKER is None:
+        _WORKER = ScraperWorker(os.path.dirname(os.path.abspath(__file__)))
+        atexit.register(_WORKER.stop)
+    return _WORKER
+
+
+def run_scrapping_agent(on_event=None):
     """
-    Agent 1 : Exécute le scrapping via un sous-processus isolé.
-    Cela contourne le conflit 'Asyncio Loop' entre Streamlit et Playwright sur Windows.
+    Agent 1 : Exécute le scrapping dans un processus worker persistant.
+    Cela contourne le conflit 'Asyncio Loop' entre Streamlit et Playwright sur Windows,
+    sans relancer un interpréteur ni Chromium à chaque clic.
+    on_event(event) reçoit chaque événement de progression (dict avec une clé 'type').
     """
     if Config is None:
         print("ERREUR: Le fichier 'config.py' est manquant.")
@@ -26,87 +42,73 @@ def run_scrapping_agent():
 
     print("--- Démarrage de l'Agent AI 1 (Scrapping et Staging) ---")
     
-    # 1. NETTOYAGE (Fait ici par l'orchestrateur)
-    print(f"[1/3] Préparation du Staging : {Config.STAGING_DIR}")
-    
-    if os.path.exists(Config.STAGING_DIR):
-        try:
-            shutil.rmtree(Config.STAGING_DIR) 
-        except OSError as e:
-            print(f"[WARNING] Impossible de supprimer {Config.STAGING_DIR}. Erreur: {e}")
-            return False
+    # 1. PRÉPARATION DU STAGING
+    # Le staging est conservé d'un lancement à l'autre : seuls les fichiers nouveaux ou modifiés
+    # sont téléchargés (requêtes conditionnelles + stockage par contenu).
+    print(f"[1/4] Préparation du Staging : {Config.STAGING_DIR}")
     os.makedirs(Config.STAGING_DIR, exist_ok=True)
-    
-    # 2. GÉNÉRATION D'UN LANCEUR TEMPORAIRE
-    # Nous créons un petit script python temporaire qui va :
-    # - Importer le scrapper
-    # - Configurer le dossier de destination
-    # - Lancer le crawl
-    # Cela garantit que le scrapper tourne dans un processus "propre".
-    
-    launcher_code = f"""
-import sys
-import os
-# Ajout du path courant
-sys.path.append(r"{os.path.dirname(os.path.abspath(__file__))}")
-
-import scrapper
 
-# Injection de la configuration
-print("--> Configuration du dossier cible : {Config.STAGING_DIR}")
-scrapper.DOWNLOAD_DIR = r"{Config.STAGING_DIR}"
+    # 2. ENVOI DU JOB AU WORKER PERSISTANT
+    # Le worker (processus séparé, hors de la boucle asyncio de Streamlit) garde Playwright
+    # et Chromium chauds entre deux lancements ; la configuration est injectée par job.
+    settings = {
+        "DOWNLOAD_DIR": Config.STAGING_DIR,
+        "STATE_FILE": Config.STATE_FILE,
+        "FRONTIER_FILE": Config.FRONTIER_FILE,
+        "LOG_FILE": Config.LOG_FILE,
+        "LOG_DB": Config.LOG_DB,
+        "LOG_HISTORY_DIR": Config.LOG_HISTORY_DIR,
+        "LOG_RETENTION_DAYS": Config.LOG_RETENTION_DAYS,
+        "RATE_FLOOR": Config.RATE_FLOOR,
+        "RATE_CEILING": Config.RATE_CEILING,
+        "FULL_REFRESH_DAYS": Config.FULL_REFRESH_DAYS,
+        "CRAWL_BUDGET": Config.CRAWL_BUDGET,
+    }
+    print(f"--> Configuration du dossier cible : {Config.STAGING_DIR}")
+    worker = get_worker()
+    if worker.is_alive():
+        print("[2/4] Envoi du job au worker de scraping (navigateur déjà chaud)...")
+    else:
+        print("[2/4] Démarrage du worker de scraping...")
+    job_id = worker.submit(settings)
 
-# Lancement
-try:
-    scrapper.crawl_and_download()
-    print("--> Fin du process Scrapper.")
-except Exception as e:
-    print(f"--> ERREUR FATALE dans le sous-processus : {{e}}")
-    sys.exit(1)
-"""
-    
-    launcher_filename = "temp_scrapper_launcher.py"
-    with open(launcher_filename, "w", encoding="utf-8") as f:
-        f.write(launcher_code)
-        
-    print(f"[2/3] Lancement du processus isolé...")
-
-    # 3. EXÉCUTION DU SOUS-PROCESSUS
-    try:
-        # On appelle python.exe pour exécuter notre lanceur temporaire
-        result = subprocess.run(
-            [sys.executable, launcher_filename],
-            capture_output=True,
-            text=True,
-            encoding='utf-8' # Force l'encodage pour éviter les erreurs d'accent
-        )
-        
-        # Affichage des logs du sous-processus dans la console Streamlit
-        print("LOGS DU SCRAPPER :")
-        print(result.stdout)
-        
-        if result.stderr:
-            print("ERREURS DU SCRAPPER :")
-            print(result.stderr)
-
-        # Vérification du code de retour (0 = succès)
-        if result.returncode == 0:
-            print(f"[3/3] Téléchargement terminé avec succès dans {Config.STAGING_DIR}.")
+    # 3. SUIVI DE LA PROGRESSION AU FIL DE L'EAU
+    success = False
+    for event in worker.events_for(job_id):
+        if event["type"] == "queued" and event["ahead"]:
+            print(f"--> En attente : {event['ahead']} crawl(s) lancé(s) avant celui-ci")
+        if event["type"] == "log":
+            print(event["line"])
+        if on_event is not None:
+            on_event(event)
+        if event["type"] == "done":
+            print(f"[3/4] Téléchargement terminé avec succès dans {Config.STAGING_DIR} "
+                  f"({event.get('downloaded', 0)} nouveau(x) fichier(s)).")
             success = True
-        else:
-            print("[ERREUR] Le sous-processus a échoué.")
-            success = False
+        elif event["type"] == "error":
+            print(f"[ERREUR] Le scrapper a échoué : {event.get('message')}")
+            if event.get("trace"):
+                print(event["trace"])
 
-    except Exception as e:
-        print(f"ERREUR CRITIQUE lors du lancement du sous-processus : {e}")
-        success = False
-    
-    finally:
-        # Nettoyage du fichier lanceur temporaire
-        if os.path.exists(launcher_filename):
-            os.remove(launcher_filename)
+    # 4. PROMOTION ATOMIQUE VERS LA PRODUCTION (lue par l'Agent 2)
+    if success:
+        success = promote_staging()
 
     return success
 
+
+def promote_staging():
+    """
+    Publie les versions vérifiées du staging dans Config.PROD_DIR, sans recopier ce qui est déjà en ligne.
+    Le manifest de PROD_DIR (.store/manifest.json) enregistre la version en ligne de chaque document.
+    """
+    try:
+        promoted, unchanged = ContentStore(Config.PROD_DIR).promote(ContentStore(Config.STAGING_DIR))
+    except OSError as e:
+        print(f"[ERREUR] Promotion vers {Config.PROD_DIR} impossible : {e}")
+        return False
+    print(f"[4/4] Promotion vers {Config.PROD_DIR} : {promoted} document(s) publié(s), {unchanged} déjà à jour.")
+    return True
+
 if __name__ == "__main__":
     run_scrapping_agent()
\ No newline at end of file
@@ -1,16 +1,30 @@
 # agent_ai2_notif.py
 import streamlit as st
-import docx
-import fitz  # PyMuPDF
 import pandas as pd
 import os
-import re
+from datetime import datetime
+
+from utils.content_store import ContentStore, sha256_file
+from utils.text_cache import TextCache
+from utils.keyword_search import KeywordScanner, hit_rows
+from utils.ocr import OcrPool
+from utils.text_extraction import extract_documents, iter_pages
 
 # ==========================================
 # CONFIGURATION
 # ==========================================
 DOCS_DIR = "BCL_Documents_Downloads"
 KEYWORDS_FILE = "Key Words.csv"
+KEYWORD_HITS_FILE = os.path.join("BCL_Reports", "keyword_hits.parquet")  # = Config.KEYWORD_HITS_FILE (page Visualisation)
+TEXT_CACHE_DIR = "BCL_Text_Cache"  # = Config.TEXT_CACHE_DIR (partagé avec agents/extractor.py)
+EXTRACTION_WORKERS = None  # = Config.EXTRACTION_WORKERS (None : un processus par cœur)
+OCR_WORKERS = 2  # = Config.OCR_WORKERS (pages scannées : Config.OCR_LANGUAGE, Config.OCR_DPI, Config.TESSDATA_DIR)
+OCR_LANGUAGE = "fra+eng"
+OCR_DPI = 300
+TESSDATA_DIR = None
+
+_TEXT_CACHE = None
+_OCR_POOL = None
 
 # ==========================================
 # FONCTIONS UTILITAIRES
@@ -26,69 +40,103 @@ def read_keywords(keywords_csv_path):
         st.error(f"Erreur lecture mots-clés : {e}")
         return []
 
-def extract_text(file_source, is_path=False):
-    """Extrait le texte (simplifié pour la démo)."""
+def get_text_cache():
+    """Cache disque du texte extrait, créé au premier besoin."""
+    global _TEXT_CACHE
+    if _TEXT_CACHE is None:
+        _TEXT_CACHE = TextCache(TEXT_CACHE_DIR)
+    return _TEXT_CACHE
+
+def get_ocr_pool():
+    """Pool OCR des pages scannées (processus lancés au premier document qui en a besoin)."""
+    global _OCR_POOL
+    if _OCR_POOL is None:
+        _OCR_POOL = OcrPool(get_text_cache(), OCR_WORKERS, OCR_LANGUAGE, OCR_DPI, TESSDATA_DIR)
+    return _OCR_POOL
+
+def extract_text_pages(file_path, content_hash=None):
+    """
+    Texte d'un document (PDF, DOCX, XLS/XLSX, CSV, TXT, ZIP) page par page : générateur de (numéro de page, texte),
+    vide pour un format non pris en charge ou illisible. Le texte est mis en cache par empreinte du contenu.
+    """
     try:
-        if is_path:
-            file_path = file_source
-            if file_path.endswith(".pdf"):
-                doc = fitz.open(file_path)
-                return "".join([page.get_text() for page in doc])
-            elif file_path.endswith(".docx"):
-                doc = docx.Document(file_path)
-                return "\n".join([p.text for p in doc.paragraphs])
-            elif file_path.endswith(".txt"):
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f: return f.read()
-            return ""
-    except: return ""
-    return ""
-
-def search_keywords_and_summarize(directory_path, keywords):
+        yield from iter_pages(file_path, get_text_cache(), content_hash)
+    except Exception:
+        return
+
+def extract_text(file_source, is_path=False, content_hash=None):
+    """Extrait tout le texte d'un document en une chaîne ; "" pour un format non pris en charge ou illisible."""
+    if not is_path:
+        return ""
+    return "".join(text for _, text in extract_text_pages(file_source, content_hash))
+
+def search_document(filename, content_hash, scan, keywords, all_keywords=False):
+    """
+    Lignes de résultat d'un document à partir de sa recherche page par page (utils/keyword_search.py) :
+    premier mot-clé trouvé avec sa page et son contexte (tous les mots-clés trouvés avec all_keywords),
+    ou 'Aucun mot-clé'.
+    """
+    # Par défaut, on s'arrête au premier mot-clé trouvé par fichier
+    return hit_rows(filename, content_hash, scan, keywords, first_only=not all_keywords)
+
+def search_keywords_and_summarize(directory_path, keywords, workers=EXTRACTION_WORKERS, on_progress=None,
+                                  all_keywords=False):
     """
-    Parcourt les documents et capture : Fichier, Mot-clé, Contexte.
+    Parcourt les documents et capture : Fichier, Mot-clé, Contexte (une ligne par mot-clé trouvé avec all_keywords).
+    L'extraction est répartie sur un pool de processus (utils/text_extraction.extract_documents) et la
+    recherche s'y fait page par page : seul le résultat de chaque document revient, dès qu'il est prêt.
+    Les pages PDF sans couche texte passent par l'OCR (utils/ocr.py) : ces documents arrivent en dernier.
+    on_progress(faits, total) suit l'avancement.
     """
     results = []
     if not os.path.exists(directory_path):
         return pd.DataFrame()
 
     file_list = [f for f in os.listdir(directory_path) if os.path.isfile(os.path.join(directory_path, f))]
-    
+    # Empreintes du stockage par contenu : un même contenu n'est extrait et analysé qu'une fois
+    # (lecture seule : l'analyse ne crée ni n'écrit rien dans le dossier des documents)
+    store = ContentStore(directory_path, read_only=True)
+    hash_by_file = {}
+    first_file_by_hash = {}
     for filename in file_list:
-        file_path = os.path.join(directory_path, filename)
-        document_text = extract_text(file_path, is_path=True)
-        
-        if not document_text: continue
-
-        keyword_found_in_file = False
-        for kw in keywords:
-            # Recherche insensible à la casse
-            if re.search(re.escape(kw), document_text, re.IGNORECASE):
-                # Extraction du contexte (100 caractères avant/après)
-                match = re.search(r'(.{0,100}' + re.escape(kw) + r'.{0,100})', document_text, re.IGNORECASE | re.DOTALL)
-                context = "..." + match.group(1).replace('\n', ' ') + "..." if match else "Contexte non extrait."
-                
-                # --- MODIFICATION ICI : Ajout explicite de la colonne Mot-clé ---
-                results.append({
-                    "Fichier": filename,
-                    "Mot-clé Cible": kw,  # <--- La colonne demandée
-                    "Extrait du Contexte": context,
-                    "Statut": "Trouvé"
-                })
-                keyword_found_in_file = True
-                # On break ici si on veut s'arrêter au premier mot-clé trouvé par fichier, 
-                # sinon enlève le break pour tous les trouver.
-                break 
-        
-        if not keyword_found_in_file:
-             results.append({
-                 "Fichier": filename, 
-                 "Mot-clé Cible": "-", 
-                 "Extrait du Contexte": "-", 
-                 "Statut": "Aucun mot-clé"
-             })
+        content_hash = store.hash_for_file(filename) or sha256_file(os.path.join(directory_path, filename))
+        hash_by_file[filename] = content_hash
+        first_file_by_hash.setdefault(content_hash, filename)
+
+    documents = [(os.path.join(directory_path, f), h) for h, f in first_file_by_hash.items()]
+    rows_by_hash = {}
+    scanner = KeywordScanner(keywords)
+    for done, (file_path, scan, error) in enumerate(
+            extract_documents(documents, get_text_cache(), workers, consumer=scanner, ocr=get_ocr_pool()), start=1):
+        filename = os.path.basename(file_path)
+        content_hash = hash_by_file[filename]
+        rows_by_hash[content_hash] = search_document(filename, content_hash, scan, keywords, all_keywords)
+        if on_progress is not None:
+            on_progress(done, len(documents))
+
+    # Résultats dans l'ordre du dossier ; un doublon d'octets sous un autre nom reprend le résultat de son contenu
+    for filename in file_list:
+        for row in rows_by_hash.get(hash_by_file[filename], []):
+            results.append(dict(row, Fichier=filename))
             
     return pd.DataFrame(results)
 
+def save_keyword_hits(df_results, path=KEYWORD_HITS_FILE):
+    """
+    Conserve les résultats de la dernière analyse (Parquet) pour la page de visualisation :
+    une ligne par document et mot-clé trouvé (occurrences et mots-clés distincts par document).
+    """
+    if df_results.empty:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df_results.assign(**{"Analysé le": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}).to_parquet(
+            f"{path}.tmp", index=False
+        )
+        os.replace(f"{path}.tmp", path)
+    except Exception as e:
+        st.warning(f"Résultats non enregistrés pour la visualisation : {e}")
+
 # ==========================================
 # INTERFACE PRINCIPALE
 # ==========================================
@@ -105,10 +153,19 @@ def run_analysis_interface():
             st.dataframe(pd.DataFrame(keywords_list, columns=["Recherches Keyword"]), use_container_width=True, height=150)
 
     if st.button("🚀 Lancer l'analyse"):
+        progress = st.progress(0.0, text="Extraction et recherche des contextes en cours...")
+
+        def on_progress(done, total):
+            progress.progress(done / total, text=f"Documents analysés : {done}/{total}")
+
         with st.spinner("Recherche des contextes en cours..."):
-            df_results = search_keywords_and_summarize(DOCS_DIR, keywords_list)
-            st.session_state['analysis_results'] = df_results
-            st.success("Analyse terminée !")
+            df_hits = search_keywords_and_summarize(DOCS_DIR, keywords_list, on_progress=on_progress, all_keywords=True)
+        progress.empty()
+        save_keyword_hits(df_hits)
+        # Affichage : premier mot-clé trouvé par fichier
+        df_results = df_hits.drop_duplicates("Fichier") if not df_hits.empty else df_hits
+        st.session_state['analysis_results'] = df_results
+        st.success("Analyse terminée !")
     
     if 'analysis_results' in st.session_state and not st.session_state['analysis_results'].empty:
         df = st.session_state['analysis_results']
@@ -119,7 +176,7 @@ def run_analysis_interface():
         st.subheader(f"Résultats ({len(found_df)} documents pertinents)")
         # On affiche bien la colonne Mot-clé Cible ici
         st.dataframe(
-            found_df[['Fichier', 'Mot-clé Cible', 'Extrait du Contexte']], 
+            found_df[['Fichier', 'Mot-clé Cible', 'Page', 'Extrait du Contexte']], 
             use_container_width=True
         )
 
@@ -39,6 +39,7 @@ def translate_report_segments(report_df, lang_key):
     translator = get_translator(model_name)
     
     translated_texts = []
+    translated_by_key = {}
     
     # Barre de progression
     progress_bar = st.progress(0)
@@ -50,6 +51,13 @@ def translate_report_segments(report_df, lang_key):
         # Récupération sécurisée du texte source
         original_text = row.get("Extrait du Contexte", "")
 
+        # Même contenu (empreinte) et même passage : traduction déjà faite
+        cache_key = (row.get("Empreinte"), original_text)
+        if cache_key in translated_by_key:
+            translated_texts.append(translated_by_key[cache_key])
+            progress_bar.progress((i + 1) / total)
+            continue
+
         try:
             # Vérification que le texte est valide et non vide
             if isinstance(original_text, str) and len(original_text.strip()) > 0:
@@ -60,6 +68,7 @@ def translate_report_segments(report_df, lang_key):
                 translated_texts.append("") # Texte vide
         except Exception as e:
             translated_texts.append(f"[Erreur Traduction] {str(e)}")
+        translated_by_key[cache_key] = translated_texts[-1]
         
         # Mise à jour de la barre
         progress_bar.progress((i + 1) / total)
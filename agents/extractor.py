@@ -1,10 +1,20 @@
 import os
-from pypdf import PdfReader
+from config import Config
 from utils.logger import setup_logger
+from utils.content_store import sha256_file
+from utils.ocr import OcrPool
+from utils.text_cache import TextCache
+from utils.text_extraction import iter_pages
 
 logger = setup_logger()
 
 class ExtractionAgent:
+    def __init__(self, cache_dir=None):
+        # Cache de texte partagé avec l'Agent 2 (agent_ai2_notif.py)
+        self.cache = TextCache(cache_dir or Config.TEXT_CACHE_DIR)
+        # OCR des pages scannées : pool de processus séparé, lancé seulement si un document en a besoin
+        self.ocr = OcrPool(self.cache, Config.OCR_WORKERS, Config.OCR_LANGUAGE, Config.OCR_DPI, Config.TESSDATA_DIR)
+
     def extract_text(self, file_path):
         """Extrait le texte d'un PDF."""
         if not file_path or not os.path.exists(file_path):
@@ -16,21 +26,30 @@ class ExtractionAgent:
         if not file_path.endswith('.pdf'):
             return ""
 
-        text_content = ""
         try:
-            reader = PdfReader(file_path)
-            # On lit max 5 pages pour la performance démo
-            for i, page in enumerate(reader.pages):
-                if i > 5: break 
-                extracted = page.extract_text()
-                if extracted:
-                    text_content += extracted + "\n"
+            content_hash = sha256_file(file_path)
+            # Document complet, servi par le cache de texte si possible
+            pages = list(iter_pages(file_path, self.cache, content_hash))
+            scanned = [number for number, extracted in pages if not extracted.strip()]
+
+            # Pages sans couche texte (PDF scanné) : OCR, si les données Tesseract sont disponibles
+            if scanned and self.ocr.available():
+                logger.info(f"OCR de {len(scanned)} page(s) : {os.path.basename(file_path)}")
+                recognized = self.ocr.submit(file_path, content_hash, scanned).result()
+                pages = [(number, recognized.get(number, extracted)) for number, extracted in pages]
+
+            text_content = ""
+            for _, extracted in pages:
+                if extracted.strip():
+                    text_content += extracted.rstrip("\n") + "\n"
             
-            # Si le PDF est une image scannée (pas de texte), on met un warning
+            # Si le PDF est une image scannée sans texte reconnu, on met un warning
             if not text_content.strip():
-                return "[PDF Image - OCR non activé pour cette démo]"
+                if not self.ocr.available():
+                    return "[PDF Image - OCR indisponible (données Tesseract introuvables)]"
+                return "[PDF Image - aucun texte reconnu]"
                 
             return text_content
         except Exception as e:
             logger.error(f"Erreur lecture PDF {file_path}: {e}")
-            return ""
\ No newline at end of file
+            return ""
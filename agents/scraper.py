@@ -1,119 +1,255 @@
-import requests
-from bs4 import BeautifulSoup
+import contextlib
 import os
-from urllib.parse import urljoin
-from config import DOWNLOAD_FOLDER
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from config import DOWNLOAD_FOLDER, Config, SOURCES_CONFIG
 from utils.logger import setup_logger
-from datetime import datetime
+from utils.rate_limiter import AdaptiveRateLimiter
+from utils.frontier import UrlFrontier
+from utils.html_discovery import extract_hrefs
+from utils.http_download import HttpDownloader, IncompleteDownload
+from utils.content_store import ContentStore
+from utils.log_store import open_log
+from utils.log_compaction import LogCompactor
 
 logger = setup_logger()
 
+def normalize_source(source_config):
+    """
+    Complète une source déclarative avec les valeurs par défaut.
+    Le type historique 'bcl_web_scraping' (url_index + domain) devient un crawl générique
+    limité aux pages '/reporting_reglementaire/' et aux PDF, sur un niveau, comme auparavant.
+    """
+    source = dict(source_config)
+    if source.get('type') == 'bcl_web_scraping':
+        source.setdefault('section_patterns', ["/reporting_reglementaire/"])
+        source.setdefault('doc_extensions', [".pdf"])
+        source.setdefault('max_depth', 1)
+        source.setdefault('limit', 20)
+    source.setdefault('name', urlparse(source['url_index']).netloc)
+    source.setdefault('domain', urlparse(source['url_index']).netloc)
+    source.setdefault('section_patterns', [])
+    source.setdefault('doc_extensions', [".pdf"])
+    source.setdefault('max_depth', 2)
+    source.setdefault('max_concurrency', 2)
+    source.setdefault('rate', (Config.RATE_FLOOR, Config.RATE_CEILING))
+    source.setdefault('limit', 20)
+    source['section_patterns'] = [p.lower() for p in source['section_patterns']]
+    source['doc_extensions'] = tuple(e.lower() for e in source['doc_extensions'])
+    return source
+
+
 class ScraperAgent:
-    def __init__(self):
+    """
+    Crawl de sources déclaratives (config.SOURCES_CONFIG), en parallèle :
+    une source par thread, avec sa propre concurrence de téléchargement et son propre limiteur de débit.
+    Tous les documents entrent dans un même stockage par contenu et un même log des téléchargements.
+    """
+
+    def __init__(self, rate_limiter=None, log_file=None, log_db=None):
         self.download_folder = DOWNLOAD_FOLDER
+        # Limiteur partagé imposé à toutes les sources (sinon un limiteur par source, selon sa config)
+        self.rate_limiter = rate_limiter
+        self.log_file = log_file or Config.LOG_FILE  # export CSV
+        self.log_db = log_db or Config.LOG_DB
+        self.log_history_dir = Config.LOG_HISTORY_DIR
         os.makedirs(self.download_folder, exist_ok=True)
         # Headers pour ressembler à un vrai navigateur
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        self._store = None
+        self._lock = threading.Lock()  # stockage et log partagés entre les sources
+        self._log_store = None  # ouvert le temps d'un crawl (partagé par les sources en parallèle)
+        self._log_users = 0
+        self._in_flight = {}  # URL en cours de téléchargement -> Event (une URL commune à deux sources)
+
+    @property
+    def store(self):
+        # Créé au premier besoin : download_folder peut être modifié après l'initialisation
+        if self._store is None or self._store.root_dir != str(self.download_folder):
+            self._store = ContentStore(self.download_folder)
+        return self._store
+
+    def _limiter_for(self, source):
+        if self.rate_limiter is not None:
+            return self.rate_limiter
+        floor, ceiling = source['rate']
+        return AdaptiveRateLimiter(min_rate=floor, max_rate=ceiling)
+
+    def _get(self, session, limiter, url, **kwargs):
+        """GET cadencé par le limiteur (latence, statut et Retry-After lui sont remontés)."""
+        limiter.acquire(url)
+        started = time.monotonic()
+        resp = session.get(url, **kwargs)
+        limiter.record(url, time.monotonic() - started, resp.status_code, resp.headers.get('Retry-After'))
+        return resp
+
+    def _log(self, source, section_url, file_url, filename, meta, size, status):
+        """Ligne du log des téléchargements partagé (mêmes colonnes que le scrapper de l'Agent 1)."""
+        self._log_store.add(section_url, file_url, filename, meta.get("mime"), size, meta.get("last_modified"),
+                            meta.get("content_length"), status)
+
+    @contextlib.contextmanager
+    def _logging(self):
+        """Ouvre le log au premier crawl actif ; le dernier à terminer le compacte, régénère l'export CSV et le ferme."""
+        with self._lock:
+            if self._log_users == 0:
+                self._log_store = open_log(self.log_db, self.log_file)
+            self._log_users += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._log_users -= 1
+                if self._log_users == 0:
+                    try:
+                        LogCompactor(self._log_store, self.log_history_dir, Config.LOG_RETENTION_DAYS).compact()
+                        self._log_store.export_csv(self.log_file, self.log_history_dir)
+                    except Exception as e:
+                        logger.warning(f"Compaction / export CSV du log impossible : {e}")
+                    finally:
+                        self._log_store.close()
+                        self._log_store = None
+
+    # --- Point d'entrée ---
+
+    def crawl_sources(self, sources=None):
+        """
+        Crawl en parallèle de toutes les sources actives du registre.
+        Retourne {nom de la source: [chemins locaux des documents]}.
+        """
+        sources = [normalize_source(s) for s in (sources or SOURCES_CONFIG) if s.get('enabled', True)]
+        if not sources:
+            return {}
+        with self._logging(), ThreadPoolExecutor(max_workers=len(sources)) as pool:
+            futures = {s['name']: pool.submit(self.fetch_documents, s) for s in sources}
+        return {name: f.result() for name, f in futures.items()}
 
     def fetch_documents(self, source_config):
-        """Dispatche vers la logique BCL."""
-        if source_config.get('type') == 'bcl_web_scraping':
-            return self._crawl_bcl_site(source_config)
+        """Dispatche selon le type de source."""
+        if source_config.get('type') in ('web_crawl', 'bcl_web_scraping'):
+            with self._logging():
+                return self._crawl_site(normalize_source(source_config))
+        logger.warning(f"Type de source inconnu : {source_config.get('type')}")
         return []
 
-    def _crawl_bcl_site(self, config):
-        base_url = config['url_index']
-        domain = config['domain']
-        limit = config.get('limit', 20)
-        
-        logger.info(f"--- [CRAWLER BCL] Démarrage sur : {base_url} ---")
-        
-        documents_found = []
-        visited_urls = set()
-        
+    # --- Crawl générique ---
+
+    def _is_section(self, source, url):
+        if source['domain'] not in urlparse(url).netloc:
+            return False
+        lower = url.lower().split("?")[0]
+        if lower.endswith(source['doc_extensions']):
+            return False
+        return any(p in lower for p in source['section_patterns'])
+
+    def _is_document(self, source, url):
+        return url.lower().split("?")[0].endswith(source['doc_extensions'])
+
+    def _crawl_site(self, source):
+        base_url = source['url_index']
+        limit = source['limit']
+        limiter = self._limiter_for(source)
+
+        logger.info(f"--- [CRAWLER {source['name']}] Démarrage sur : {base_url} ---")
+
+        downloader = HttpDownloader(pool_size=source['max_concurrency'], headers=self.headers, rate_limiter=limiter)
+        pages = UrlFrontier()
+        pages.add(base_url)
+        depths = {base_url: 0}
+        documents = UrlFrontier()
+        doc_sections = {}
+
         try:
-            # ETAPE 1 : Récupérer la page d'accueil pour trouver les "Onglets" (Sous-sections)
-            resp = requests.get(base_url, headers=self.headers, timeout=15)
-            soup = BeautifulSoup(resp.content, 'html.parser')
-            
-            # On cherche les liens dans le menu de navigation ou le contenu principal
-            # Pour la BCL, les sections sont souvent dans <div class="content"> ou les menus latéraux
-            sub_pages = []
-            
-            # On ajoute la page principale elle-même
-            sub_pages.append(base_url)
-            
-            # Exploration simple : on prend tous les liens qui contiennent "/reporting_reglementaire/"
-            for a in soup.find_all('a', href=True):
-                href = a['href']
-                full_url = urljoin(base_url, href)
-                
-                # On ne garde que les sous-pages du reporting, pas tout le site
-                if "/reporting_reglementaire/" in full_url and domain in full_url:
-                    if not full_url.endswith('.pdf'): # On ne veut pas les PDF tout de suite
-                        sub_pages.append(full_url)
-            
-            # Dédoublonnage
-            sub_pages = list(set(sub_pages))
-            logger.info(f"Sous-sections identifiées : {len(sub_pages)}")
-
-            # ETAPE 2 : Visiter chaque sous-section pour trouver les PDFs
-            for page_url in sub_pages:
-                if len(documents_found) >= limit: break
-                if page_url in visited_urls: continue
-                
-                visited_urls.add(page_url)
+            # ETAPE 1 : Exploration des pages de section (en largeur, profondeur bornée)
+            while pages and len(documents) < limit:
+                page_url = pages.pop()
+                depth = depths.get(page_url, 0)
                 logger.info(f"Scraping section : {page_url}")
-                
                 try:
-                    sub_resp = requests.get(page_url, headers=self.headers, timeout=10)
-                    sub_soup = BeautifulSoup(sub_resp.content, 'html.parser')
-                    
-                    for a in sub_soup.find_all('a', href=True):
-                        if len(documents_found) >= limit: break
-                        
-                        href = a['href']
-                        if href.lower().strip().endswith('.pdf'):
-                            pdf_url = urljoin(page_url, href)
-                            
-                            # Téléchargement
-                            local_path = self._download_pdf(pdf_url)
-                            if local_path:
-                                documents_found.append(local_path)
-                                
+                    resp = self._get(downloader.session, limiter, page_url, timeout=15)
+                    resp.raise_for_status()
+                    hrefs = extract_hrefs(resp.text, resp.url or page_url)
                 except Exception as e:
                     logger.warning(f"Erreur sur la section {page_url}: {e}")
-                    
-            logger.info(f"Total documents récupérés : {len(documents_found)}")
+                    continue
+
+                for href in hrefs:
+                    if self._is_document(source, href):
+                        if len(documents) < limit and documents.add(href):
+                            doc_sections[href] = page_url
+                    elif depth < source['max_depth'] and self._is_section(source, href) and pages.add(href):
+                        depths[href] = depth + 1
+
+            logger.info(f"[{source['name']}] Documents identifiés : {len(documents)}")
+
+            # ETAPE 2 : Téléchargements concurrents (max_concurrency) vers le stockage partagé
+            doc_urls = [documents.pop() for _ in range(len(documents))]
+            with ThreadPoolExecutor(max_workers=source['max_concurrency']) as pool:
+                paths = list(pool.map(
+                    lambda u: self._download(source, downloader, doc_sections.get(u, base_url), u), doc_urls
+                ))
+            documents_found = [p for p in paths if p]
+            with self._lock:
+                self.store.save()
+
+            logger.info(f"[{source['name']}] Total documents récupérés : {len(documents_found)}")
+            logger.info(f"[{source['name']}] Débit par hôte (req/s) : {limiter.rates()}")
             return documents_found
 
         except Exception as e:
-            logger.error(f"Erreur critique Crawler: {e}")
+            logger.error(f"Erreur critique Crawler {source['name']}: {e}")
             return []
+        finally:
+            downloader.close()
+
+    def _download(self, source, downloader, section_url, url):
+        """Télécharge un document dans le stockage par contenu partagé et retourne son chemin local."""
+        filename = url.split('/')[-1].split('?')[0]
+        # Nettoyage nom fichier
+        clean_name = "".join([c for c in filename if c.isalpha() or c.isdigit() or c in ('-', '_', '.')]) or "document"
+
+        with self._lock:
+            # Déjà stocké (par cette source ou une autre) : pas de nouveau téléchargement
+            path = self.store.visible_path(url)
+            pending = self._in_flight.get(url)
+            if not path and pending is None:
+                done = self._in_flight[url] = threading.Event()
+                tmp = self.store.incoming_path(url, clean_name)
+        if path:
+            return path
+        if pending is not None:
+            # Téléchargé au même moment par une autre source : on attend son résultat
+            pending.wait()
+            with self._lock:
+                return self.store.visible_path(url)
 
-    def _download_pdf(self, url):
-        """Télécharge un PDF et retourne son chemin local."""
+        meta = {}
         try:
-            filename = url.split('/')[-1]
-            # Nettoyage nom fichier
-            clean_name = "".join([c for c in filename if c.isalpha() or c.isdigit() or c in ('-', '_', '.')])
-            # Ajout timestamp pour éviter doublons
-            path = os.path.join(self.download_folder, clean_name)
-            
-            # Si fichier existe déjà, on ne retélécharge pas (sauf si vide)
-            if os.path.exists(path) and os.path.getsize(path) > 0:
-                return path
-
-            with requests.get(url, headers=self.headers, stream=True, timeout=15) as r:
-                r.raise_for_status()
-                with open(path, 'wb') as f:
-                    for chunk in r.iter_content(8192):
-                        f.write(chunk)
-            
-            logger.info(f"PDF téléchargé : {clean_name}")
+            meta = downloader.download(url, tmp)
+            with self._lock:
+                _, stored = self.store.commit(tmp, url, clean_name, extra={"source": source['name']})
+                path = self.store.visible_path(url)
+                self._log(source, section_url, url, os.path.basename(path), meta, meta.get("size"),
+                          "ok" if stored == "new" else stored)
+            logger.info(f"Document téléchargé : {os.path.basename(path)}")
             return path
+        except IncompleteDownload as e:
+            # .part conservé pour une reprise au prochain crawl
+            with self._lock:
+                self._log(source, section_url, url, clean_name, meta, None, "retry_incomplete")
+            logger.warning(f"Téléchargement incomplet {url}: {e}")
         except Exception as e:
+            with self._lock:
+                self.store.discard(tmp)
+                self._log(source, section_url, url, clean_name, meta, None, f"error:{e}")
             logger.error(f"Echec download {url}: {e}")
-            return None
\ No newline at end of file
+        finally:
+            with self._lock:
+                self._in_flight.pop(url, None)
+            done.set()
+        return None
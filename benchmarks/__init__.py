@@ -0,0 +1 @@
+# Miroir local de bcl.lu et banc d'essai des scrapers (voir run_benchmarks.py) et des backends d'extraction PDF (extraction_benchmark.py)
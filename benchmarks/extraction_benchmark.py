@@ -0,0 +1,285 @@
+# benchmarks/extraction_benchmark.py
+"""
+Banc d'essai des backends d'extraction PDF (utils/text_extraction.py) : PyMuPDF et pypdf.
+
+Deux corpus :
+- synthétique (défaut) : PDF générés de façon déterministe, un par profil de document (court, long,
+  tableaux, deux colonnes, accents, scanné sans couche texte), avec leur texte de référence ;
+- réel (--corpus DOSSIER) : les PDF d'un dossier, par exemple BCL_Documents_Downloads.
+
+Chaque couple (backend, document) tourne dans un processus neuf (contexte 'spawn').
+Mesures : temps, pages/s, pic de mémoire ajouté par l'extraction (RSS après imports retiré) et fidélité :
+F1 sur les mots par rapport au texte de référence (synthétique), ou accord entre backends (réel, sans
+référence : F1 de chaque backend par rapport à l'autre).
+La colonne 'profil' est celle que calcule utils/text_extraction.pdf_profile (court, long, sans_texte) ;
+le backend retenu par profil justifie le choix de utils/text_extraction.pdf_backend.
+
+Usage (depuis la racine du dépôt, ou par chemin depuis n'importe quel dossier) :
+    python -m benchmarks.extraction_benchmark
+    python -m benchmarks.extraction_benchmark --corpus BCL_Documents_Downloads --json extraction.json
+    python chemin/du/depot/benchmarks/extraction_benchmark.py --long-pages 50
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+
+if os.path.dirname(os.path.dirname(os.path.abspath(__file__))) not in sys.path:
+    # Lancement par chemin ou hors de la racine du dépôt : les paquets du projet restent importables
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.run_benchmarks import PROJECT_DIR, _fmt, _peak_rss_mb  # noqa: E402
+
+BACKENDS = ("pymupdf", "pypdf")
+
+WORDS = (
+    "banque centrale luxembourg circulaire règlement établissement crédit liquidité solvabilité exigence "
+    "déclaration reporting prudentiel fonds propres ratio risque marché contrepartie opérationnel exposition "
+    "surveillance supervision titrisation paiement monétaire réserve obligatoire taux intérêt collatéral"
+).split()
+
+
+# --- Corpus synthétique ---
+
+def _paragraph(rng, words=120):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _text_page(doc, text, rect=None):
+    import fitz  # PyMuPDF
+    page = doc.new_page()
+    page.insert_textbox(rect or fitz.Rect(50, 50, 545, 790), text, fontsize=9, fontname="helv")
+    return page
+
+
+def build_synthetic_corpus(folder, seed=42, long_pages=300):
+    """Génère un PDF par profil. Retourne {chemin: texte de référence}."""
+    import fitz  # PyMuPDF
+
+    rng = random.Random(seed)
+    references = {}
+
+    def save(name, doc, text):
+        path = os.path.join(folder, f"{name}.pdf")
+        doc.save(path, garbage=3, deflate=True)
+        doc.close()
+        references[path] = text
+
+    # Court : quelques pages de paragraphes
+    doc, text = fitz.open(), []
+    for _ in range(4):
+        page_text = "\n".join(_paragraph(rng) for _ in range(4))
+        _text_page(doc, page_text)
+        text.append(page_text)
+    save("court", doc, "\n".join(text))
+
+    # Long : plusieurs centaines de pages (découpé en tranches par l'extraction parallèle)
+    doc, text = fitz.open(), []
+    for _ in range(long_pages):
+        page_text = "\n".join(_paragraph(rng) for _ in range(4))
+        _text_page(doc, page_text)
+        text.append(page_text)
+    save("long", doc, "\n".join(text))
+
+    # Tableaux : grilles de chiffres et libellés positionnés cellule par cellule
+    doc, text = fitz.open(), []
+    for _ in range(10):
+        page = doc.new_page()
+        for row in range(40):
+            cells = [rng.choice(WORDS)] + [f"{rng.uniform(0, 10**6):.2f}" for _ in range(4)]
+            for col, cell in enumerate(cells):
+                page.insert_text((40 + col * 105, 50 + row * 18), cell, fontsize=8)
+            text.append(" ".join(cells))
+    save("tableaux", doc, "\n".join(text))
+
+    # Deux colonnes : l'ordre de lecture diffère de l'ordre d'écriture ligne à ligne
+    doc, text = fitz.open(), []
+    for _ in range(10):
+        left, right = _paragraph(rng, 200), _paragraph(rng, 200)
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(40, 50, 290, 790), left, fontsize=9)
+        page.insert_textbox(fitz.Rect(305, 50, 555, 790), right, fontsize=9)
+        text += [left, right]
+    save("colonnes", doc, "\n".join(text))
+
+    # Accents, guillemets et ligatures (encodage WinAnsi de la police standard)
+    doc, text = fitz.open(), []
+    for _ in range(5):
+        page_text = "\n".join(_paragraph(rng) + " Élément « déjà » contrôlé : œuvre, garçon, où." for _ in range(3))
+        _text_page(doc, page_text)
+        text.append(page_text)
+    save("accents", doc, "\n".join(text))
+
+    # Scanné : pages rendues en image, sans couche texte
+    doc, text = fitz.open(), []
+    for _ in range(3):
+        page_text = "\n".join(_paragraph(rng) for _ in range(3))
+        source = fitz.open()
+        _text_page(source, page_text)
+        pixmap = source[0].get_pixmap(dpi=100)
+        source.close()
+        page = doc.new_page()
+        page.insert_image(page.rect, pixmap=pixmap)
+        text.append(page_text)
+    save("scanne", doc, "\n".join(text))
+
+    return references
+
+
+# --- Mesure ---
+
+def _tokens(text):
+    return Counter(re.findall(r"\w+", (text or "").lower()))
+
+
+def fidelity(extracted, reference):
+    """F1 sur les mots (multiensembles) : 1.0 = mêmes mots, mêmes nombres d'occurrences."""
+    got, want = _tokens(extracted), _tokens(reference)
+    if not got and not want:
+        return 1.0
+    common = sum((got & want).values())
+    if not common:
+        return 0.0
+    precision, recall = common / sum(got.values()), common / sum(want.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def _child(backend, path, results):
+    """Point d'entrée du processus de mesure : extraction complète d'un document par un backend."""
+    sys.path.insert(0, PROJECT_DIR)
+    from utils.text_extraction import EXTRACTORS
+
+    func = EXTRACTORS[".pdf"][backend][0]
+    if backend == "pymupdf":
+        import fitz  # noqa: F401  (import hors mesure)
+    else:
+        import pypdf  # noqa: F401
+    baseline, _ = _peak_rss_mb()
+    started = time.perf_counter()
+    try:
+        pages = list(func(path))
+        error = None
+    except Exception as e:
+        pages, error = [], f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - started
+    peak, _ = _peak_rss_mb()
+    results.put({
+        "wall_s": wall, "pages": len(pages), "text": "".join(pages), "error": error,
+        "extra_rss_mb": peak - baseline if peak is not None and baseline is not None else None,
+    })
+
+
+def measure(backend, path, timeout):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(backend, path, results))
+    proc.start()
+    try:
+        result = results.get(timeout=timeout)
+    except Exception:
+        result = {"wall_s": None, "pages": 0, "text": "", "error": "timeout", "extra_rss_mb": None}
+    proc.join(5)
+    if proc.is_alive():
+        proc.terminate()
+        proc.join()
+    return result
+
+
+def run(documents, references, timeout):
+    sys.path.insert(0, PROJECT_DIR)
+    from utils.text_extraction import pdf_profile
+
+    rows = []
+    for path in documents:
+        profile = pdf_profile(path)
+        texts = {}
+        for backend in BACKENDS:
+            result = measure(backend, path, timeout)
+            texts[backend] = result.pop("text")
+            wall = result["wall_s"]
+            result.update(
+                document=os.path.basename(path), backend=backend, profile=profile["name"],
+                size_mb=os.path.getsize(path) / 2**20,
+                pages_per_s=result["pages"] / wall if wall else None,
+            )
+            rows.append(result)
+        for row in rows[-len(BACKENDS):]:
+            if path in references:
+                row["fidelity"], row["fidelity_vs"] = fidelity(texts[row["backend"]], references[path]), "référence"
+            else:
+                other = next(b for b in BACKENDS if b != row["backend"])
+                row["fidelity"], row["fidelity_vs"] = fidelity(texts[row["backend"]], texts[other]), other
+    return rows
+
+
+def print_table(rows):
+    header = f"{'document':<28} {'profil':<12} {'backend':<8} {'Mo':>6} {'pages':>6} {'temps(s)':>9} " \
+             f"{'pages/s':>9} {'RSS+(Mo)':>8} {'fidélité':>8}  réf."
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['document'][:28]:<28} {r['profile']:<12} {r['backend']:<8} {r['size_mb']:>6.1f} {r['pages']:>6} "
+              f"{_fmt(r['wall_s'], '{:.3f}'):>9} {_fmt(r['pages_per_s'], '{:.0f}'):>9} "
+              f"{_fmt(r['extra_rss_mb'], '{:.1f}'):>8} {_fmt(r['fidelity'], '{:.3f}'):>8}  "
+              f"{r['fidelity_vs']}{'  ' + r['error'] if r['error'] else ''}")
+
+
+def summarize(rows):
+    """Par profil : backend retenu (fidélité d'abord, à 0.01 près, puis débit) — à comparer à pdf_backend()."""
+    by_profile = {}
+    for r in rows:
+        by_profile.setdefault(r["profile"], {}).setdefault(r["backend"], []).append(r)
+    print("\nProfil       backend retenu   (fidélité moyenne, pages/s moyen par backend)")
+    for profile, per_backend in sorted(by_profile.items()):
+        scores = {}
+        for backend, items in per_backend.items():
+            rates = [i["pages_per_s"] for i in items if i["pages_per_s"]]
+            scores[backend] = (sum(i["fidelity"] for i in items) / len(items), sum(rates) / len(rates) if rates else 0)
+        best = max(scores, key=lambda b: (round(scores[b][0], 2), scores[b][1]))
+        detail = ", ".join(f"{b} {f:.3f} / {p:.0f}" for b, (f, p) in scores.items())
+        print(f"{profile:<12} {best:<16} ({detail})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des backends d'extraction PDF (PyMuPDF, pypdf)")
+    parser.add_argument("--corpus", help="Dossier de PDF réels (sinon corpus synthétique)")
+    parser.add_argument("--long-pages", type=int, default=300, help="Pages du document synthétique 'long'")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--json", help="Fichier où écrire les résultats")
+    parser.add_argument("--keep", action="store_true", help="Conserver le corpus synthétique")
+    args = parser.parse_args()
+
+    workdir = None
+    if args.corpus:
+        documents = sorted(os.path.join(args.corpus, f) for f in os.listdir(args.corpus) if f.lower().endswith(".pdf"))
+        references = {}
+    else:
+        workdir = tempfile.mkdtemp(prefix="bench_extraction_")
+        references = build_synthetic_corpus(workdir, args.seed, args.long_pages)
+        documents = sorted(references)
+
+    try:
+        rows = run(documents, references, args.timeout)
+    finally:
+        if workdir and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+        elif workdir:
+            print(f"Corpus synthétique : {workdir}")
+
+    print_table(rows)
+    summarize(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+# benchmarks/mirror_server.py
+"""
+Miroir local de l'arborescence bcl.lu `documents_nationaux`, pour mesurer les scrapers sans toucher au site.
+
+Deux modes :
+- synthétique (défaut) : arborescence générée de façon déterministe (graine), sections imbriquées
+  et documents de taille configurable, contenu produit à la volée (mémoire constante) ;
+- enregistré : sert un dossier capturé depuis le vrai site (ex. `wget --mirror`), mêmes URL.
+
+Réglages : latence (+ gigue), taux d'erreurs 503 (avec Retry-After), tailles de fichiers.
+Gère GET/HEAD, ETag / Last-Modified avec réponses 304, et Range (206) pour la reprise.
+
+Usage autonome :
+    python -m benchmarks.mirror_server --port 8000 --sections 6 --docs 12 --latency 0.05
+"""
+import argparse
+import hashlib
+import os
+import random
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT_PATH = "/fr/cadre_juridique/documents_nationaux/"
+
+# Noms de sections reprenant les heuristiques des scrapers (SECTION_KEYWORDS, et le filtre de ScraperAgent)
+SECTION_NAMES = [
+    "reglements_bcl", "circulaires_bcl", "reporting_reglementaire", "conditions_generales", "loi_organique",
+    "avis", "target", "conditions", "autres_textes",
+]
+
+BLOCK_SIZE = 64 * 1024
+BASE_DATE = 1_700_000_000  # Last-Modified de référence (epoch) des documents synthétiques
+
+MIME_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".pdf": "application/pdf",
+    ".csv": "text/csv",
+    ".zip": "application/zip",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+class MirrorStats:
+    """Compteurs côté serveur, indépendants du scraper mesuré."""
+
+    FIELDS = ("pages", "documents", "not_modified", "partial", "errors", "bytes")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, field, amount=1):
+        with self._lock:
+            self._counts[field] += amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+class SyntheticSite:
+    """
+    Arborescence générée : `sections` sections sous la racine, chacune avec `subsections` sous-sections
+    (jusqu'à `depth` niveaux), et `docs` documents par page de section.
+    """
+
+    def __init__(self, sections=6, subsections=2, depth=2, docs=10, min_size=20_000, max_size=1_500_000, seed=42):
+        self.seed = seed
+        self.pages = {}      # chemin -> HTML
+        self.documents = {}  # chemin -> {"size", "version"}
+        rng = random.Random(seed)
+
+        def build(path, level):
+            links = []
+            if level < depth:
+                count = sections if level == 0 else subsections
+                for i in range(count):
+                    name = SECTION_NAMES[i % len(SECTION_NAMES)] + ("" if i < len(SECTION_NAMES) else f"_{i}")
+                    child = f"{path}{name}/" if level == 0 else f"{path}sous_section_{i}/"
+                    build(child, level + 1)
+                    links.append(f'<li><a href="{child}index.html">{name}</a></li>')
+            if level > 0:
+                for i in range(docs):
+                    ext = ".pdf" if i % 5 else rng.choice([".pdf", ".xlsx", ".csv", ".zip"])
+                    doc = f"{path}document_{len(self.documents)}{ext}"
+                    self.documents[doc] = {"size": rng.randint(min_size, max_size), "version": 0}
+                    links.append(f'<li><a href="{doc}">Document {i}</a></li>')
+            # Liens de navigation communs à toutes les pages (doublons à dédupliquer par le crawler)
+            links.append(f'<li><a href="{ROOT_PATH}index.html#top">Accueil</a></li>')
+            links.append('<li><a href="/fr/contact.html">Contact</a></li>')
+            self.pages[path + "index.html"] = (
+                "<!DOCTYPE html><html><head><title>BCL - miroir</title></head><body>"
+                f"<h1>{path}</h1><ul>{''.join(links)}</ul></body></html>"
+            )
+
+        build(ROOT_PATH, 0)
+        self.pages["/fr/contact.html"] = "<html><body><p>Contact</p></body></html>"
+
+    def touch(self, fraction, seed=None):
+        """Simule une mise à jour du site : une fraction des documents change de version (nouvel ETag)."""
+        rng = random.Random(self.seed if seed is None else seed)
+        changed = rng.sample(sorted(self.documents), int(len(self.documents) * fraction))
+        for path in changed:
+            self.documents[path]["version"] += 1
+        return changed
+
+    def resolve(self, path):
+        """(type, taille, etag, last_modified_epoch) ou None si le chemin n'existe pas."""
+        if path.endswith("/"):
+            path += "index.html"
+        if path in self.pages:
+            body = self.pages[path].encode("utf-8")
+            return "page", len(body), hashlib.md5(body).hexdigest()[:16], BASE_DATE
+        doc = self.documents.get(path)
+        if doc:
+            etag = hashlib.md5(f"{path}:{doc['version']}".encode()).hexdigest()[:16]
+            return "document", doc["size"], etag, BASE_DATE + doc["version"] * 86400
+        return None
+
+    def read(self, path, start, end):
+        """Octets [start, end) du fichier ; les documents sont générés bloc par bloc, de façon déterministe."""
+        if path.endswith("/"):
+            path += "index.html"
+        if path in self.pages:
+            return [self.pages[path].encode("utf-8")[start:end]]
+        return self._document_chunks(path, start, end)
+
+    def _document_chunks(self, path, start, end):
+        version = self.documents[path]["version"]
+        block = start // BLOCK_SIZE
+        while start < end:
+            rng = random.Random(f"{self.seed}:{path}:{version}:{block}")
+            data = rng.randbytes(BLOCK_SIZE)
+            if block == 0:
+                data = b"%PDF-1.4\n" + data[9:]
+            offset = start - block * BLOCK_SIZE
+            piece = data[offset:offset + (end - start)]
+            yield piece
+            start += len(piece)
+            block += 1
+
+
+class RecordedSite:
+    """Sert un dossier capturé depuis le vrai site (arborescence identique aux URL)."""
+
+    def __init__(self, directory):
+        self.directory = os.path.abspath(directory)
+
+    def _file(self, path):
+        if path.endswith("/"):
+            path += "index.html"
+        full = os.path.abspath(os.path.join(self.directory, path.lstrip("/")))
+        if not full.startswith(self.directory) or not os.path.isfile(full):
+            return None
+        return full
+
+    def resolve(self, path):
+        full = self._file(path)
+        if not full:
+            return None
+        st = os.stat(full)
+        kind = "page" if full.endswith((".html", ".htm")) else "document"
+        return kind, st.st_size, f"{int(st.st_mtime)}-{st.st_size}", int(st.st_mtime)
+
+    def read(self, path, start, end):
+        with open(self._file(path), "rb") as f:
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                chunk = f.read(min(BLOCK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
+def _make_handler(site, stats, latency, jitter, error_rate, rng):
+    class MirrorHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, comme le vrai site
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_HEAD(self):
+            self._serve(send_body=False)
+
+        def do_GET(self):
+            self._serve(send_body=True)
+
+        def _serve(self, send_body):
+            path = self.path.split("?")[0].split("#")[0]
+            if latency or jitter:
+                time.sleep(max(0.0, latency + rng.uniform(-jitter, jitter)))
+            if error_rate and rng.random() < error_rate:
+                stats.add("errors")
+                self._empty(503, {"Retry-After": "1"})
+                return
+
+            info = site.resolve(path)
+            if info is None:
+                self._empty(404)
+                return
+            kind, size, etag, modified = info
+            etag = f'"{etag}"'
+            headers = {
+                "Content-Type": MIME_TYPES.get(os.path.splitext(path)[1].lower(), MIME_TYPES[".html"]),
+                "ETag": etag,
+                "Last-Modified": formatdate(modified, usegmt=True),
+                "Accept-Ranges": "bytes",
+            }
+
+            if self._not_modified(etag, modified):
+                stats.add("not_modified")
+                self._empty(304, {"ETag": etag, "Last-Modified": headers["Last-Modified"]})
+                return
+
+            status, start, end = 200, 0, size
+            byte_range = self.headers.get("Range")
+            if byte_range and self.headers.get("If-Range") in (None, etag, headers["Last-Modified"]):
+                first = byte_range.replace("bytes=", "").split("-")[0]
+                if first.isdigit():
+                    start = int(first)
+                    if start >= size:
+                        self._empty(416, {"Content-Range": f"bytes */{size}"})
+                        return
+                    status = 206
+                    headers["Content-Range"] = f"bytes {start}-{size - 1}/{size}"
+                    stats.add("partial")
+
+            stats.add("pages" if kind == "page" else "documents")
+            headers["Content-Length"] = str(end - start)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            if not send_body:
+                return
+            try:
+                for chunk in site.read(path, start, end):
+                    self.wfile.write(chunk)
+                    stats.add("bytes", len(chunk))
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _not_modified(self, etag, modified):
+            inm = self.headers.get("If-None-Match")
+            if inm:
+                return etag in [t.strip() for t in inm.split(",")]
+            ims = self.headers.get("If-Modified-Since")
+            if ims:
+                try:
+                    return modified <= parsedate_to_datetime(ims).timestamp()
+                except (TypeError, ValueError):
+                    return False
+            return False
+
+        def _empty(self, status, headers=None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    return MirrorHandler
+
+
+class MirrorServer:
+    """
+    Serveur HTTP local (thread d'arrière-plan) exposant un SyntheticSite ou un RecordedSite.
+    `root_url` pointe sur l'index documents_nationaux ; `stats` compte ce qui a été servi.
+    """
+
+    def __init__(self, site=None, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, seed=42):
+        self.site = site or SyntheticSite(seed=seed)
+        self.stats = MirrorStats()
+        handler = _make_handler(self.site, self.stats, latency, jitter, error_rate, random.Random(seed))
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def host(self):
+        return self.httpd.server_address[0]
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    @property
+    def root_url(self):
+        return f"http://{self.host}:{self.port}{ROOT_PATH}index.html"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Miroir local de bcl.lu documents_nationaux")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--recorded", help="Dossier capturé à servir au lieu du site synthétique")
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--subsections", type=int, default=2)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--docs", type=int, default=10, help="Documents par page de section")
+    parser.add_argument("--min-size", type=int, default=20_000)
+    parser.add_argument("--max-size", type=int, default=1_500_000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latence ajoutée par requête (s)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion de réponses 503")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.recorded:
+        site = RecordedSite(args.recorded)
+    else:
+        site = SyntheticSite(args.sections, args.subsections, args.depth, args.docs,
+                             args.min_size, args.max_size, args.seed)
+    server = MirrorServer(site, port=args.port, latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, seed=args.seed)
+    print(f"Miroir disponible : {server.root_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# benchmarks/run_benchmarks.py
+"""
+Banc d'essai des scrapers sur le miroir local (benchmarks/mirror_server.py).
+
+Chaque cible tourne dans un processus neuf (contexte 'spawn'), dans un dossier de travail temporaire :
+- scrapper        : scrapper.crawl_and_download (Agent 1)
+- bcl_sync        : src/bcl_scrapper.crawl_and_download
+- bcl_async       : src/bcl_scrapper.crawl_and_download(use_async=True)
+- agent           : agents/scraper.ScraperAgent.fetch_documents
+
+Deux passes par cible : 'cold' (dossier vide) puis 'warm' (même dossier, après modification d'une
+fraction des documents du miroir) pour mesurer le coût d'un crawl incrémental.
+Mesures : temps total, pages/s et Mo/s (compteurs du serveur), pic de RSS du processus (et de ses enfants).
+
+Usage (depuis la racine du dépôt, ou par chemin depuis n'importe quel dossier) :
+    python -m benchmarks.run_benchmarks --sections 6 --docs 10 --latency 0.02 --error-rate 0.01
+    python -m benchmarks.run_benchmarks --targets scrapper bcl_async --unthrottled --json resultats.json
+    python chemin/du/depot/benchmarks/run_benchmarks.py --targets bcl_sync
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    # Lancement par chemin ou hors de la racine du dépôt : les paquets du projet restent importables
+    sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.mirror_server import MirrorServer, SyntheticSite, RecordedSite  # noqa: E402
+
+TARGETS = ("scrapper", "bcl_sync", "bcl_async", "agent")
+
+
+def _peak_rss_mb():
+    """(pic RSS du processus, pic RSS de ses enfants terminés) en Mo ; None si non mesurable."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 2**20, None
+        except (ImportError, AttributeError):
+            return None, None
+    unit = 2**20 if sys.platform == "darwin" else 2**10  # ru_maxrss : octets sur macOS, Ko sous Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit
+    return own, children
+
+
+def _run_target(target, root_url, domain, workdir, rates):
+    """Lance une cible avec la configuration pointant sur le miroir. Retourne le nombre de fichiers obtenus."""
+    floor, ceiling = rates
+    if target == "scrapper":
+        import scrapper
+        scrapper.URL_ROOT, scrapper.SITE_DOMAIN = root_url, domain
+        scrapper.DOWNLOAD_DIR = os.path.join(workdir, "downloads")
+        scrapper.LOG_FILE = os.path.join(workdir, "log.csv")
+        scrapper.LOG_DB = os.path.join(workdir, "log.db")
+        scrapper.LOG_HISTORY_DIR = os.path.join(workdir, "log_history")
+        scrapper.STATE_FILE = os.path.join(workdir, "state.json")
+        scrapper.FRONTIER_FILE = os.path.join(workdir, "frontier.json")
+        scrapper.RATE_FLOOR, scrapper.RATE_CEILING = floor, ceiling
+        return scrapper.crawl_and_download()
+
+    if target in ("bcl_sync", "bcl_async"):
+        sys.path.insert(0, os.path.join(PROJECT_DIR, "src"))
+        import bcl_scrapper
+        bcl_scrapper.URL_ROOT, bcl_scrapper.SITE_DOMAIN = root_url, domain
+        bcl_scrapper.DOWNLOAD_DIR = os.path.join(workdir, "downloads")
+        bcl_scrapper.LOG_FILE = os.path.join(workdir, "log.csv")
+        bcl_scrapper.LOG_DB = os.path.join(workdir, "log.db")
+        bcl_scrapper.LOG_HISTORY_DIR = os.path.join(workdir, "log_history")
+        bcl_scrapper.FRONTIER_FILE = os.path.join(workdir, "frontier_sections.json")
+        bcl_scrapper.DOCS_FRONTIER_FILE = os.path.join(workdir, "frontier_documents.json")
+        bcl_scrapper.STATE_FILE = os.path.join(workdir, "crawl_state.json")
+        bcl_scrapper.RATE_FLOOR, bcl_scrapper.RATE_CEILING = floor, ceiling
+        os.makedirs(bcl_scrapper.DOWNLOAD_DIR, exist_ok=True)
+        return bcl_scrapper.crawl_and_download(use_async=(target == "bcl_async"))
+
+    if target == "agent":
+        from agents.scraper import ScraperAgent
+        from utils.rate_limiter import AdaptiveRateLimiter
+        agent = ScraperAgent(rate_limiter=AdaptiveRateLimiter(min_rate=floor, max_rate=ceiling),
+                             log_file=os.path.join(workdir, "log.csv"), log_db=os.path.join(workdir, "log.db"))
+        agent.download_folder = os.path.join(workdir, "downloads")
+        agent.log_history_dir = os.path.join(workdir, "log_history")
+        os.makedirs(agent.download_folder, exist_ok=True)
+        source = {"type": "bcl_web_scraping", "url_index": root_url, "domain": domain, "limit": 10**6}
+        return len(agent.fetch_documents(source))
+
+    raise ValueError(f"Cible inconnue : {target}")
+
+
+def _child(target, root_url, domain, workdir, rates, results):
+    """Point d'entrée du processus de mesure (sorties du scraper redirigées vers un fichier)."""
+    os.chdir(workdir)  # config.py crée ses dossiers dans le répertoire courant
+    sys.path.insert(0, PROJECT_DIR)
+    with open(os.path.join(workdir, f"{target}.out"), "a", encoding="utf-8") as out:
+        sys.stdout = sys.stderr = out
+        started = time.perf_counter()
+        try:
+            files = _run_target(target, root_url, domain, workdir, rates)
+            error = None
+        except Exception as e:
+            files, error = None, f"{type(e).__name__}: {e}"
+        wall = time.perf_counter() - started
+    own, children = _peak_rss_mb()
+    results.put({"wall_s": wall, "files": files, "error": error, "peak_rss_mb": own, "children_rss_mb": children})
+
+
+def run_once(server, target, workdir, rates, timeout):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    server.stats.reset()
+    proc = ctx.Process(target=_child, args=(target, server.root_url, server.host, workdir, rates, results))
+    proc.start()
+    proc.join(timeout)
+    if proc.is_alive():
+        proc.terminate()
+        proc.join()
+        measure = {"wall_s": timeout, "files": None, "error": "timeout", "peak_rss_mb": None, "children_rss_mb": None}
+    else:
+        measure = results.get() if not results.empty() else {
+            "wall_s": None, "files": None, "error": f"code retour {proc.exitcode}",
+            "peak_rss_mb": None, "children_rss_mb": None,
+        }
+    served = server.stats.snapshot()
+    wall = measure["wall_s"] or 0
+    measure.update(served)
+    measure["pages_per_s"] = served["pages"] / wall if wall else None
+    measure["mb_per_s"] = served["bytes"] / 2**20 / wall if wall else None
+    return measure
+
+
+def _fmt(value, pattern="{:.2f}"):
+    return "-" if value is None else pattern.format(value)
+
+
+def print_table(rows):
+    header = f"{'cible':<10} {'passe':<5} {'temps(s)':>9} {'pages/s':>8} {'Mo/s':>7} {'Mo servis':>9} " \
+             f"{'304':>5} {'503':>5} {'fichiers':>8} {'RSS(Mo)':>8} {'RSS enf.':>8}  erreur"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['target']:<10} {r['pass']:<5} {_fmt(r['wall_s']):>9} {_fmt(r['pages_per_s']):>8} "
+              f"{_fmt(r['mb_per_s']):>7} {r['bytes'] / 2**20:>9.1f} {r['not_modified']:>5} {r['errors']:>5} "
+              f"{_fmt(r['files'], '{}'):>8} {_fmt(r['peak_rss_mb'], '{:.0f}'):>8} "
+              f"{_fmt(r['children_rss_mb'], '{:.0f}'):>8}  {r['error'] or ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des scrapers sur un miroir local de bcl.lu")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--recorded", help="Dossier capturé à servir au lieu du site synthétique")
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--subsections", type=int, default=2)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--docs", type=int, default=10)
+    parser.add_argument("--min-size", type=int, default=20_000)
+    parser.add_argument("--max-size", type=int, default=1_500_000)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--changed", type=float, default=0.1, help="Fraction de documents modifiés avant la passe 'warm'")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--unthrottled", action="store_true",
+                        help="Neutralise le limiteur de débit (mesure du crawler seul)")
+    parser.add_argument("--timeout", type=float, default=1800)
+    parser.add_argument("--json", help="Fichier où écrire les résultats")
+    parser.add_argument("--keep", action="store_true", help="Conserver les dossiers de travail")
+    args = parser.parse_args()
+
+    rates = (1000.0, 1000.0) if args.unthrottled else (0.2, 5.0)
+    rows = []
+    for target in args.targets:
+        # Miroir neuf par cible : même arborescence, mêmes versions de départ
+        if args.recorded:
+            site = RecordedSite(args.recorded)
+        else:
+            site = SyntheticSite(args.sections, args.subsections, args.depth, args.docs,
+                                 args.min_size, args.max_size, args.seed)
+        workdir = tempfile.mkdtemp(prefix=f"bench_{target}_")
+        with MirrorServer(site, latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, seed=args.seed) as server:
+            for pass_name in ("cold", "warm"):
+                if pass_name == "warm" and isinstance(site, SyntheticSite):
+                    site.touch(args.changed)
+                measure = run_once(server, target, workdir, rates, args.timeout)
+                measure.update(target=target, **{"pass": pass_name})
+                rows.append(measure)
+        if args.keep:
+            print(f"[{target}] dossier de travail : {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
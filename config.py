@@ -10,8 +10,41 @@ class Config:
     
     # Fichiers principaux
     KEYWORDS_FILE = "Key Words.csv"
-    STATE_FILE = os.path.join(PROD_DIR, "state.json")
-    LOG_FILE = "BCL_Documents_Log.csv" 
+    # État du crawl (validateurs HTTP, empreintes des sections) et reprise d'un crawl interrompu :
+    # hors de PROD_DIR, dont tous les fichiers sont des documents analysés par l'Agent 2
+    CRAWL_STATE_DIR = "BCL_Crawl_State"
+    STATE_FILE = os.path.join(CRAWL_STATE_DIR, "state.json")
+    FRONTIER_FILE = os.path.join(CRAWL_STATE_DIR, "frontier.json")
+    LOG_FILE = "BCL_Documents_Log.csv"  # export CSV du log (compatibilité des lecteurs existants)
+    LOG_DB = "BCL_Documents_Log.db"  # log des téléchargements (SQLite, mode WAL)
+    # Compaction du log : historique brut archivé en Parquet, lignes de plus de N jours purgées de la base
+    LOG_HISTORY_DIR = "BCL_Log_History"
+    LOG_RETENTION_DAYS = 90
+    # Visualisation : agrégats matérialisés (DuckDB) et derniers résultats de l'Agent 2 (Parquet)
+    ANALYTICS_DB = os.path.join(REPORT_DIR, "analytics.duckdb")
+    KEYWORD_HITS_FILE = os.path.join(REPORT_DIR, "keyword_hits.parquet")
+    # Cache du texte extrait des documents (par empreinte du contenu et version d'extracteur)
+    TEXT_CACHE_DIR = "BCL_Text_Cache"
+    # Processus d'extraction de texte en parallèle (None : un par cœur)
+    EXTRACTION_WORKERS = None
+    # Membres d'archives ZIP : au-delà de cette taille, décompressés dans un fichier temporaire (supprimé
+    # après extraction) plutôt que chargés en mémoire
+    ZIP_MEMBER_MEMORY_BYTES = 64 * 1024 * 1024
+    # OCR des pages PDF sans couche texte (Tesseract intégré à PyMuPDF), sur un pool de processus dédié.
+    # TESSDATA_DIR : données de langue Tesseract (None : variable TESSDATA_PREFIX ou installation locale)
+    OCR_WORKERS = 2
+    OCR_LANGUAGE = "fra+eng"
+    OCR_DPI = 300
+    TESSDATA_DIR = None
+
+    # Limiteur de débit adaptatif (requêtes/seconde par hôte)
+    RATE_FLOOR = 0.2
+    RATE_CEILING = 5.0
+
+    # Recrawl : les sous-arbres de sections inchangées sont réutilisés, crawl complet tous les N jours
+    FULL_REFRESH_DAYS = 7
+    # Revisites de sections déjà connues par crawl (planifiées selon leur fréquence de mise à jour)
+    CRAWL_BUDGET = 50
 
     # Assurez-vous que les répertoires existent
     @staticmethod
@@ -19,5 +52,67 @@ class Config:
         os.makedirs(Config.PROD_DIR, exist_ok=True)
         os.makedirs(Config.STAGING_DIR, exist_ok=True)
         os.makedirs(Config.REPORT_DIR, exist_ok=True)
+        os.makedirs(Config.CRAWL_STATE_DIR, exist_ok=True)
+        Config.migrate_crawl_state()
+
+    @staticmethod
+    def migrate_crawl_state():
+        """Déplace l'état et la frontière du crawl de leur ancien emplacement (PROD_DIR) vers CRAWL_STATE_DIR."""
+        for path in (Config.STATE_FILE, Config.FRONTIER_FILE):
+            legacy = os.path.join(Config.PROD_DIR, os.path.basename(path))
+            if os.path.exists(legacy) and not os.path.exists(path):
+                os.replace(legacy, path)
+
+Config.ensure_directories_exist()
+
+# Dossier de téléchargement des agents (agents/scraper.py)
+DOWNLOAD_FOLDER = Config.PROD_DIR
 
-Config.ensure_directories_exist()
\ No newline at end of file
+# --- Registre des sources surveillées (agents/scraper.py : ScraperAgent.crawl_sources) ---
+# Chaque source est déclarative :
+# - url_index : page de départ ; domain : domaine dont le crawl ne sort pas
+# - section_patterns : fragments d'URL des pages à explorer (la page de départ l'est toujours)
+# - doc_extensions : extensions des documents à télécharger ; max_depth : profondeur d'exploration
+# - max_concurrency : téléchargements simultanés ; rate : (débit min, débit max) en requêtes/seconde
+# - limit : nombre maximal de documents par crawl ; enabled : source active ou non
+SOURCES_CONFIG = [
+    {
+        "name": "bcl_documents_nationaux",
+        "type": "web_crawl",
+        "url_index": "https://www.bcl.lu/fr/cadre_juridique/documents_nationaux/index.html",
+        "domain": "bcl.lu",
+        "section_patterns": ["/documents_nationaux/"],
+        "doc_extensions": [".pdf", ".doc", ".docx", ".xls", ".xlsx", ".csv", ".zip", ".txt"],
+        "max_depth": 4,
+        "max_concurrency": 2,
+        "rate": (Config.RATE_FLOOR, Config.RATE_CEILING),
+        "limit": 1000,
+        "enabled": True,
+    },
+    {
+        "name": "bcl_reporting_reglementaire",
+        "type": "web_crawl",
+        "url_index": "https://www.bcl.lu/fr/Reporting_reglementaire/index.html",
+        "domain": "bcl.lu",
+        "section_patterns": ["/reporting_reglementaire/"],
+        "doc_extensions": [".pdf", ".xls", ".xlsx", ".zip"],
+        "max_depth": 2,
+        "max_concurrency": 2,
+        "rate": (Config.RATE_FLOOR, Config.RATE_CEILING),
+        "limit": 500,
+        "enabled": True,
+    },
+    {
+        "name": "cssf_circulaires",
+        "type": "web_crawl",
+        "url_index": "https://www.cssf.lu/fr/publications-donnees/",
+        "domain": "cssf.lu",
+        "section_patterns": ["/fr/document/", "/fr/publications-donnees/"],
+        "doc_extensions": [".pdf"],
+        "max_depth": 2,
+        "max_concurrency": 2,
+        "rate": (0.2, 2.0),
+        "limit": 200,
+        "enabled": False,  # URL de départ à valider avant activation
+    },
+]
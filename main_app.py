@@ -44,6 +44,12 @@ try:
 except ImportError as e:
     st.warning(f"⚠️ Certains agents n'ont pas pu être chargés : {e}")
 
+try:
+    import visualisation
+except ImportError as e:
+    visualisation = None
+    st.warning(f"⚠️ La page de visualisation n'a pas pu être chargée : {e}")
+
 # ==========================================
 # 3. DESIGN & CSS
 # ==========================================
@@ -143,15 +149,39 @@ if choice == T["sidebar_home"]:
     st.info(T["start_info_msg"])
 
 elif choice == T["sidebar_visu"]:
-    st.title(T["visual_title"])
-    st.write("Graphiques et statistiques ici...")
+    if visualisation is not None:
+        visualisation.run_visualisation_interface(T)
+    else:
+        st.title(T["visual_title"])
 
 elif choice == T["sidebar_agent1"]:
     # Appel de l'Agent 1
     # Attention: agent_ai1_scrapper a une fonction run_scrapping_agent() qui retourne un booléen
     st.title(T["sidebar_agent1"])
     if st.button("Lancer le Scrapping"):
-        success = agent1.run_scrapping_agent()
+        # Progression diffusée en direct par le worker de scraping
+        progress = st.status("Scrapping en cours...", expanded=True)
+        counters = {"section": 0, "document": 0}
+        last_lines = progress.empty()
+        lines = []
+
+        def on_event(event):
+            if event["type"] in counters:
+                counters[event["type"]] += 1
+                progress.update(label=f"Scrapping en cours... {counters['section']} section(s), "
+                                      f"{counters['document']} document(s) traité(s)")
+            if event["type"] == "queued" and event["ahead"]:
+                # Un seul crawl à la fois : celui-ci attend la fin des crawls lancés avant lui
+                progress.update(label=f"En attente du worker de scraping ({event['ahead']} crawl(s) en cours)...")
+            if event["type"] == "started":
+                progress.update(label="Scrapping en cours...")
+            if event["type"] == "log":
+                lines.append(event["line"])
+                last_lines.code("\n".join(lines[-15:]))
+
+        with progress:
+            success = agent1.run_scrapping_agent(on_event=on_event)
+        progress.update(state="complete" if success else "error", expanded=False)
         if success:
             st.success("Scrapping terminé avec succès !")
         else:
@@ -2,16 +2,39 @@
 # playwright install
 
 import os
-import csv
 import time
-from datetime import datetime
 from urllib.parse import urljoin, urlparse
 from playwright.sync_api import sync_playwright
 
+from utils.crawl_state import CrawlState
+from utils.crawl_scheduler import ChangeScheduler
+from utils.http_download import HttpDownloader, DirectDownloadBlocked, IncompleteDownload, verify_length
+from utils.frontier import UrlFrontier, canonicalize_url
+from utils.rate_limiter import AdaptiveRateLimiter
+from utils.content_store import ContentStore
+from utils.html_discovery import HtmlDiscovery, NeedsBrowser, LazyBrowserPage
+from utils.log_store import open_log
+from utils.log_compaction import LogCompactor
+
 URL_ROOT = "https://www.bcl.lu/fr/cadre_juridique/documents_nationaux/index.html"
+SITE_DOMAIN = "bcl.lu"  # le crawl ne sort pas de ce domaine (remplacé par le miroir local des benchmarks)
 DOWNLOAD_DIR = "BCL_Documents_Downloads"
-LOG_FILE = "BCL_Documents_Log.csv"
+LOG_FILE = "BCL_Documents_Log.csv"  # export CSV du log, pour compatibilité
+LOG_DB = "BCL_Documents_Log.db"  # log des téléchargements (SQLite) = Config.LOG_DB
+LOG_HISTORY_DIR = "BCL_Log_History"  # historique archivé (Parquet) = Config.LOG_HISTORY_DIR
+LOG_RETENTION_DAYS = 90  # = Config.LOG_RETENTION_DAYS
+STATE_FILE = os.path.join("BCL_Crawl_State", "state.json")  # = Config.STATE_FILE (hors du dossier des documents)
+FRONTIER_FILE = os.path.join("BCL_Crawl_State", "frontier.json")  # = Config.FRONTIER_FILE
 SIZE_THRESHOLD = 5000  # éviter les pages d’erreur ~456 octets
+RATE_FLOOR, RATE_CEILING = 0.2, 5.0  # débit par hôte (req/s) = Config.RATE_FLOOR / RATE_CEILING
+FULL_REFRESH_DAYS = 7  # crawl complet sans élagage tous les N jours = Config.FULL_REFRESH_DAYS
+CRAWL_BUDGET = 50  # revisites de sections déjà connues par crawl = Config.CRAWL_BUDGET
+
+# Log SQLite ouvert pour la durée d'un crawl (voir get_log)
+_LOG = None
+
+# Callback optionnel (type, **données) recevant les événements de progression (worker de l'Agent 1)
+EVENT_HOOK = None
 
 # Extensions de documents à capturer
 DOC_EXTS = [".pdf", ".doc", ".docx", ".xls", ".xlsx", ".csv", ".zip", ".txt"]
@@ -47,53 +70,65 @@ def filename_from_url(url: str) -> str:
     return name or "document_bcl"
 
 
+def emit(kind, **data):
+    """Transmet un événement de progression structuré au worker, s'il écoute."""
+    if EVENT_HOOK is not None:
+        EVENT_HOOK(kind, **data)
+
+
 def ensure_dirs():
     os.makedirs(DOWNLOAD_DIR, exist_ok=True)
-    if not os.path.exists(LOG_FILE):
-        with open(LOG_FILE, "w", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            w.writerow([
-                "downloaded_at",
-                "section_url",
-                "file_url",
-                "filename",
-                "mime_type",
-                "size_bytes",
-                "last_modified",
-                "content_length_header",
-                "status"
-            ])
+
+
+def get_log():
+    """Log des téléchargements du crawl en cours (le CSV historique est importé une seule fois)."""
+    global _LOG
+    if _LOG is None:
+        _LOG = open_log(LOG_DB, LOG_FILE)
+    return _LOG
+
+
+def close_log():
+    """Écrit les lignes en attente, compacte le log, régénère l'export CSV et ferme la base."""
+    global _LOG
+    if _LOG is None:
+        return
+    try:
+        print(f"Compaction du log : {LogCompactor(_LOG, LOG_HISTORY_DIR, LOG_RETENTION_DAYS).compact()}")
+        _LOG.export_csv(LOG_FILE, LOG_HISTORY_DIR)
+    except Exception as e:
+        print(f"Compaction / export CSV du log impossible : {e}")
+    finally:
+        _LOG.close()
+        _LOG = None
 
 
 def log_entry(section_url, file_url, filename, mime, size_bytes, last_modified, clen, status):
-    with open(LOG_FILE, "a", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow([
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            section_url,
-            file_url,
-            filename,
-            mime or "",
-            size_bytes if size_bytes is not None else "",
-            last_modified or "",
-            clen or "",
-            status
-        ])
+    # Ligne mise en tampon puis écrite par lot (transaction SQLite), voir utils/log_store.py
+    get_log().add(section_url, file_url, filename, mime, size_bytes, last_modified, clen, status)
+    emit("document", section_url=section_url, file_url=file_url, filename=filename,
+         size_bytes=size_bytes, status=status)
 
 
-def collect_links_on_page(page, base_url):
-    # Récupère tous les href visibles
-    hrefs = page.locator("a[href]").evaluate_all("els => els.map(e => e.getAttribute('href'))")
-    hrefs = [urljoin(base_url, h) for h in hrefs if h]
+def split_links(hrefs):
     # Sépare en (sections) et (documents)
-    section_links = [h for h in hrefs if is_section_href(h) or h.lower().endswith(".html")]
     document_links = [h for h in hrefs if is_document_href(h)]
+    # Un document rangé sous un chemin de section (ex. /reglements_bcl/x.pdf) n'est pas une page à explorer
+    section_links = [h for h in hrefs
+                     if (is_section_href(h) or h.lower().endswith(".html")) and not is_document_href(h)]
     # Déduplication
     section_links = list(dict.fromkeys(section_links))
     document_links = list(dict.fromkeys(document_links))
     return section_links, document_links
 
 
+def collect_links_on_page(page, base_url):
+    # Récupère tous les href visibles
+    hrefs = page.locator("a[href]").evaluate_all("els => els.map(e => e.getAttribute('href'))")
+    hrefs = [urljoin(base_url, h) for h in hrefs if h]
+    return split_links(hrefs)
+
+
 def head_metadata(api_ctx, url: str):
     """Utilise Playwright APIRequestContext pour récupérer les headers (Last-Modified, Content-Type...)."""
     try:
@@ -106,6 +141,121 @@ def head_metadata(api_ctx, url: str):
         return None, None, None
 
 
+def conditional_head(api_ctx, url: str, headers=None, limiter=None):
+    """HEAD conditionnel (If-None-Match / If-Modified-Since). Retourne (status, mime, last_mod, clen, etag)."""
+    try:
+        if limiter:
+            limiter.acquire(url)
+        started = time.monotonic()
+        resp = api_ctx.head(url, headers=headers or {})
+        if limiter:
+            limiter.record(url, time.monotonic() - started, resp.status, resp.headers.get("retry-after"))
+        return (
+            resp.status,
+            resp.headers.get("content-type"),
+            resp.headers.get("last-modified"),
+            resp.headers.get("content-length"),
+            resp.headers.get("etag"),
+        )
+    except Exception:
+        return None, None, None, None, None
+
+
+def polite_goto(page, limiter, url, **kwargs):
+    """page.goto cadencé par le limiteur adaptatif (latence et statut lui sont remontés)."""
+    limiter.acquire(url)
+    started = time.monotonic()
+    resp = page.goto(url, **kwargs)
+    limiter.record(url, time.monotonic() - started,
+                   resp.status if resp else None,
+                   resp.headers.get("retry-after") if resp else None)
+    return resp
+
+
+def discover_links(discovery, browser, limiter, url, headers=None):
+    """
+    Liens (sections, documents) d'une page : HTML statique par HTTP + BeautifulSoup d'abord,
+    rendu Playwright seulement si la page exige JavaScript.
+    Retourne (status, sections, documents, validateurs) ; sections/documents valent None sur un 304.
+    """
+    try:
+        r = discovery.fetch(url, headers)
+        if r["status"] == 304:
+            return 304, None, None, r
+        sections, documents = split_links(r["hrefs"])
+        return r["status"], sections, documents, r
+    except NeedsBrowser as e:
+        print(f"  -> Rendu navigateur nécessaire ({e})")
+    page = browser.get()
+    resp = polite_goto(page, limiter, url, wait_until="domcontentloaded")
+    sections, documents = collect_links_on_page(page, url)
+    headers = resp.headers if resp else {}
+    validators = {
+        "etag": headers.get("etag"),
+        "last_modified": headers.get("last-modified"),
+        "content_length": headers.get("content-length"),
+    }
+    return (resp.status if resp else None), sections, documents, validators
+
+
+def visit_section(discovery, browser, limiter, state, url):
+    """
+    Visite (requête conditionnelle) d'une page de section et mise à jour de ses liens et de leur empreinte.
+    Retourne (sections, documents, inchangée) : inchangée si l'ensemble des liens est identique au crawl précédent.
+    """
+    known = state.get(CrawlState.SECTIONS, url)
+    cond = state.conditional_headers(CrawlState.SECTIONS, url) if "links" in known else {}
+    status, sections, documents, v = discover_links(discovery, browser, limiter, url, cond)
+    if status == 304:
+        print("  -> Section inchangée (304)")
+        links = known["links"]
+    else:
+        links = {"sections": sections, "documents": documents}
+    fingerprint = CrawlState.fingerprint(links)
+    unchanged = fingerprint == known.get("fingerprint")
+    extra = {"links": links, "fingerprint": fingerprint}
+    if known.get("fingerprint") and not unchanged:
+        # Historique des changements : alimente l'estimation de fréquence du planificateur
+        extra["changes"] = ChangeScheduler.record_change(known)
+    state.record(CrawlState.SECTIONS, url, v["etag"], v["last_modified"], v["content_length"], **extra)
+    return links["sections"], links["documents"], unchanged
+
+
+def prune_known_subtrees(state, frontier, child_sections, scheduler):
+    """
+    À appeler pour une section dont l'empreinte des liens est inchangée (304 ou mêmes liens).
+    Réutilise depuis l'état, sans requête de page, les sous-sections déjà explorées (et leurs descendantes)
+    que le planificateur ne retient pas pour ce crawl ; celles qu'il retient sont mises en file.
+    Les sous-sections jamais explorées restent toujours à visiter.
+    Les documents des sous-arbres élagués ne sont pas ignorés pour autant : ils sont retournés pour une
+    requête conditionnelle (process_document), qui ne retélécharge que ceux dont les validateurs ont changé.
+    Retourne (URL canoniques élaguées, [(section, document)] du sous-arbre élagué).
+    """
+    pruned = set()
+    docs = []
+    stack = [s for s in child_sections if "links" in state.get(CrawlState.SECTIONS, s)]
+    while stack:
+        url = stack.pop()
+        key = canonicalize_url(url)
+        if key in pruned or frontier.is_visited(url):
+            continue
+        if scheduler.should_visit(url):
+            frontier.add(url, priority=scheduler.priority(url))
+            continue
+        pruned.add(key)
+        frontier.mark_visited(url)
+        links = state.get(CrawlState.SECTIONS, url)["links"]
+        docs.extend((url, d) for d in links["documents"])
+        for s in links["sections"]:
+            if "/documents_nationaux/" not in s:
+                continue
+            if "links" in state.get(CrawlState.SECTIONS, s):
+                stack.append(s)
+            else:
+                frontier.add(s, priority=0 if is_section_href(s) else None)
+    return pruned, list(dict.fromkeys(docs))
+
+
 def download_via_browser(page, file_url: str, dest_path: str):
     # Important: ne pas utiliser page.goto pour les PDF; on déclenche une ouverture/fichier via window.open
     with page.expect_download() as dl_info:
@@ -114,108 +264,234 @@ def download_via_browser(page, file_url: str, dest_path: str):
     download.save_as(dest_path)
 
 
-def crawl_and_download():
-    ensure_dirs()
+def process_document(browser, api_ctx, downloader, state, store, section_url, doc_url, label):
+    """
+    Télécharge un document s'il est nouveau ou modifié depuis le dernier crawl.
+    Passe par le client HTTP direct et ne retombe sur le navigateur que si le site le bloque.
+    Le fichier entre dans le stockage par contenu : des octets déjà connus ne sont pas stockés deux fois.
+    Retourne 1 si un nouveau contenu a été téléchargé avec succès, 0 sinon.
+    """
+    filename = filename_from_url(doc_url)
+    kind = CrawlState.DOCUMENTS
+
+    entry = store.lookup(doc_url)
+    legacy = os.path.join(DOWNLOAD_DIR, filename)
+    if entry is None and os.path.exists(legacy) and not store.owner_urls(filename):
+        # Fichier téléchargé avant le stockage par contenu : on l'intègre s'il n'est pas tronqué
+        known_len = state.get(kind, doc_url).get("content_length")
+        if not known_len or os.path.getsize(legacy) == int(known_len):
+            store.adopt(legacy, doc_url)
+            entry = store.lookup(doc_url)
+    exists = entry is not None
+
+    cond = state.conditional_headers(kind, doc_url) if exists else {}
+    # Fichier .part stable par URL : un transfert interrompu reprend par requête Range
+    tmp = store.incoming_path(doc_url, filename)
+    try:
+        resp, meta = downloader.open(doc_url, cond, part_path=tmp)
+        status, mime, last_mod, clen, etag = (
+            meta["status"], meta["mime"], meta["last_modified"], meta["content_length"], meta["etag"]
+        )
+    except DirectDownloadBlocked:
+        resp = None
+        status, mime, last_mod, clen, etag = conditional_head(api_ctx, doc_url, cond, downloader.rate_limiter)
+    except Exception as e:
+        print(f"  -> Erreur: {e}")
+        log_entry(section_url, doc_url, filename, None, None, None, None, f"error:{e}")
+        return 0
+
+    if exists:
+        skip = False
+        if status == 304:
+            skip = True
+        elif not state.get(kind, doc_url):
+            # Fichier antérieur à l'état persistant : on l'adopte comme référence
+            state.record(kind, doc_url, etag, last_mod, clen, filename=entry["filename"])
+            skip = True
+        elif state.is_unchanged(kind, doc_url, etag, last_mod, clen):
+            skip = True
+        if skip:
+            if resp is not None:
+                resp.close()
+            return 0
+        print(f"Mise à jour détectée : {entry['filename']}")
+
+    print(f"Téléchargement ({label}): {filename}")
+    ok = 0
+    try:
+        if resp is not None:
+            size = downloader.save(resp, tmp, doc_url)
+        else:
+            downloader.rate_limiter.acquire(doc_url)
+            download_via_browser(browser.get(), doc_url, tmp)
+            size = verify_length(tmp, clen)
+        if size < SIZE_THRESHOLD:
+            store.discard(tmp)
+            print(f"  -> Échec: trop petit ({size} o)")
+            log_entry(section_url, doc_url, filename, mime, size, last_mod, clen, "fail_too_small")
+            state.forget(kind, doc_url)
+        else:
+            sha, stored = store.commit(tmp, doc_url, filename)
+            name = store.lookup(doc_url)["filename"]
+            if stored == "new":
+                print(f"  -> OK ({size//1024} KB)")
+                log_entry(section_url, doc_url, name, mime, size, last_mod, clen, "ok")
+                ok = 1
+            else:
+                # Octets déjà stockés (autre section ou version identique) : rien de plus sur le disque
+                print(f"  -> Contenu déjà connu ({stored}, {sha[:12]})")
+                log_entry(section_url, doc_url, name, mime, size, last_mod, clen, stored)
+            state.record(kind, doc_url, etag, last_mod, clen, filename=name)
+    except IncompleteDownload as e:
+        # Le .part est gardé : le prochain crawl reprendra là où le transfert s'est arrêté
+        print(f"  -> Incomplet, à reprendre: {e}")
+        log_entry(section_url, doc_url, filename, mime, None, last_mod, clen, "retry_incomplete")
+    except Exception as e:
+        store.discard(tmp)
+        print(f"  -> Erreur: {e}")
+        log_entry(section_url, doc_url, filename, mime, None, last_mod, clen, f"error:{e}")
+    return ok
+
+
+def crawl_and_download(browser=None):
+    """
+    Crawl complet. Sans argument, ouvre et referme sa propre instance Playwright.
+    Avec un LazyBrowserPage déjà démarré (worker persistant), le réutilise et le laisse ouvert.
+    Retourne le nombre de nouveaux fichiers téléchargés.
+    """
+    if browser is None:
+        with sync_playwright() as p:
+            browser = LazyBrowserPage(p)
+            try:
+                return _crawl(browser)
+            finally:
+                browser.close()
+    return _crawl(browser)
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(accept_downloads=True)
-        page = context.new_page()
 
-        # Contexte API pour HEAD
-        api_ctx = p.request.new_context()
+def _crawl(browser):
+    ensure_dirs()
+    log = get_log()
+    state = CrawlState(STATE_FILE)
+    store = ContentStore(DOWNLOAD_DIR)
 
-        print(f"Ouverture index: {URL_ROOT}")
-        page.goto(URL_ROOT, wait_until="domcontentloaded")
+    # Contexte API pour HEAD
+    api_ctx = browser.playwright.request.new_context()
 
-        # 1) Collecte initiale: sections + documents sur la page racine
-        root_sections, root_docs = collect_links_on_page(page, URL_ROOT)
-        print(f"Sections détectées (racine): {len(root_sections)} | Documents directs (racine): {len(root_docs)}")
+    # Débit par hôte adaptatif (remplace les pauses fixes), partagé par toutes les requêtes
+    limiter = AdaptiveRateLimiter(min_rate=RATE_FLOOR, max_rate=RATE_CEILING)
 
-        # 2) Préparer la liste de pages à explorer (sections)
-        to_visit = list(root_sections)
-        visited_pages = set()
+    # Client HTTP direct (keep-alive), partagé par la découverte des liens et les téléchargements
+    downloader = HttpDownloader(rate_limiter=limiter)
+    discovery = HtmlDiscovery(downloader)
 
-        # 3) Télécharger d’abord les documents directs sur la racine
+    try:
+        # Frontière des sections : reprise d'un crawl interrompu si une sauvegarde existe
+        frontier = UrlFrontier(FRONTIER_FILE)
         ok = 0
-        for doc_url in root_docs:
-            filename = filename_from_url(doc_url)
-            dest = os.path.join(DOWNLOAD_DIR, filename)
-            if os.path.exists(dest):
-                continue
 
-            mime, last_mod, clen = head_metadata(api_ctx, doc_url)
-            print(f"Téléchargement (racine): {filename}")
+        # Élagage des sous-arbres inchangés, sauf lors du crawl complet périodique (filet de sécurité)
+        full_refresh = state.full_refresh_due(FULL_REFRESH_DAYS)
+        if full_refresh:
+            print(f"Crawl complet (dernier il y a plus de {FULL_REFRESH_DAYS} jour(s) ou jamais effectué)")
+        else:
+            # Revisites des sections connues guidées par leur fréquence de mise à jour, dans un budget
+            scheduler = ChangeScheduler(state, log, budget=CRAWL_BUDGET, history_dir=LOG_HISTORY_DIR)
+            print(f"Sections connues à revisiter (budget {CRAWL_BUDGET}) : {len(scheduler.planned)}")
+        pruned = set()
+
+        if frontier.load():
+            print(f"Reprise du crawl interrompu : {len(frontier)} section(s) en attente")
+        else:
+            print(f"Ouverture index: {URL_ROOT}")
+
+            # 1) Collecte initiale: sections + documents sur la page racine
             try:
-                download_via_browser(page, doc_url, dest)
-                size = os.path.getsize(dest)
-                if size < SIZE_THRESHOLD:
-                    os.remove(dest)
-                    print(f"  -> Échec: trop petit ({size} o)")
-                    log_entry(URL_ROOT, doc_url, filename, mime, size, last_mod, clen, "fail_too_small")
-                else:
-                    print(f"  -> OK ({size//1024} KB)")
-                    log_entry(URL_ROOT, doc_url, filename, mime, size, last_mod, clen, "ok")
-                    ok += 1
+                root_sections, root_docs, unchanged = visit_section(discovery, browser, limiter, state, URL_ROOT)
             except Exception as e:
-                print(f"  -> Erreur: {e}")
-                log_entry(URL_ROOT, doc_url, filename, mime, None, last_mod, clen, f"error:{e}")
-            time.sleep(0.8)
+                # Index momentanément inaccessible : on repart des liens connus de la racine (état du crawl)
+                print(f"  -> Erreur navigation sur l'index: {e}")
+                links = state.get(CrawlState.SECTIONS, URL_ROOT).get("links") or {"sections": [], "documents": []}
+                root_sections, root_docs, unchanged = links["sections"], links["documents"], True
+            downloader.use_browser_cookies(browser.cookies())
+            print(f"Sections détectées (racine): {len(root_sections)} | Documents directs (racine): {len(root_docs)}")
+
+            # 2) Préparer la frontière des pages à explorer (sections ciblées en priorité)
+            frontier.mark_visited(URL_ROOT)
+            subtree_docs = []
+            if not full_refresh and unchanged:
+                # Élagage seulement sous une page dont les liens n'ont pas changé
+                pruned, subtree_docs = prune_known_subtrees(state, frontier, root_sections, scheduler)
+                print(f"  -> {len(pruned)} section(s) réutilisée(s) sans visite")
+            for s in root_sections:
+                frontier.add(s, priority=0 if is_section_href(s) else None)
+
+            # 3) Télécharger d’abord les documents directs sur la racine (et ceux des sous-arbres élagués) ;
+            #    un document déjà stocké passe par une requête conditionnelle
+            for section, doc_url in [(URL_ROOT, d) for d in root_docs] + subtree_docs:
+                ok += process_document(browser, api_ctx, downloader, state, store, section, doc_url, "racine")
+            state.save()
+            log.flush()
+            frontier.save()
 
         # 4) Explorer chaque section (large) et télécharger leurs documents
-        while to_visit:
-            section_url = to_visit.pop(0)
-            if section_url in visited_pages:
-                continue
-            visited_pages.add(section_url)
+        while frontier:
+            section_url = frontier.pop()
 
             # Filtre pour rester dans le domaine et le périmètre
             parsed = urlparse(section_url)
-            if "bcl.lu" not in parsed.netloc:
+            if SITE_DOMAIN not in parsed.netloc:
+                continue
+            # Déjà couverte par un sous-arbre élagué (mise en file avant l'élagage)
+            if canonicalize_url(section_url) in pruned:
                 continue
 
             print(f"Exploration section: {section_url}")
+            emit("section", url=section_url, pending=len(frontier))
             try:
-                page.goto(section_url, wait_until="domcontentloaded")
+                sec_sections, sec_docs, unchanged = visit_section(discovery, browser, limiter, state, section_url)
             except Exception as e:
                 print(f"  -> Erreur navigation: {e}")
                 continue
 
-            sec_sections, sec_docs = collect_links_on_page(page, section_url)
-            # Ajouter nouvelles sous-pages à visiter
+            # On reste dans le périmètre documents_nationaux
+            sec_sections = [s for s in sec_sections if "/documents_nationaux/" in s]
+            subtree_docs = []
+            if not full_refresh and unchanged:
+                # Élagage seulement sous une page dont les liens n'ont pas changé
+                skipped, subtree_docs = prune_known_subtrees(state, frontier, sec_sections, scheduler)
+                pruned |= skipped
+                if skipped:
+                    print(f"  -> {len(skipped)} sous-section(s) réutilisée(s) sans visite")
+
+            # Ajouter nouvelles sous-pages à visiter (la frontière ignore celles déjà vues)
             for s in sec_sections:
-                if s not in visited_pages and s not in to_visit:
-                    # On reste dans le périmètre documents_nationaux
-                    if "/documents_nationaux/" in s:
-                        to_visit.append(s)
-
-            # Télécharger les documents trouvés dans cette section
-            for doc_url in sec_docs:
-                filename = filename_from_url(doc_url)
-                dest = os.path.join(DOWNLOAD_DIR, filename)
-                if os.path.exists(dest):
-                    continue
-
-                mime, last_mod, clen = head_metadata(api_ctx, doc_url)
-                print(f"Téléchargement (section): {filename}")
-                try:
-                    download_via_browser(page, doc_url, dest)
-                    size = os.path.getsize(dest)
-                    if size < SIZE_THRESHOLD:
-                        os.remove(dest)
-                        print(f"  -> Échec: trop petit ({size} o)")
-                        log_entry(section_url, doc_url, filename, mime, size, last_mod, clen, "fail_too_small")
-                    else:
-                        print(f"  -> OK ({size//1024} KB)")
-                        log_entry(section_url, doc_url, filename, mime, size, last_mod, clen, "ok")
-                        ok += 1
-                except Exception as e:
-                    print(f"  -> Erreur: {e}")
-                    log_entry(section_url, doc_url, filename, mime, None, last_mod, clen, f"error:{e}")
-                time.sleep(0.8)
-
+                frontier.add(s, priority=0 if is_section_href(s) else None)
+
+            # Télécharger les documents trouvés dans cette section et dans ses sous-arbres élagués
+            # (requête conditionnelle pour ceux déjà stockés : seuls les documents modifiés sont retéléchargés)
+            for section, doc_url in [(section_url, d) for d in sec_docs] + subtree_docs:
+                ok += process_document(browser, api_ctx, downloader, state, store, section, doc_url, "section")
+
+            # Sauvegarde régulière pour qu'un crawl interrompu reprenne ici
+            state.save()
+            store.save()
+            log.flush()
+            frontier.save()
+
+        if full_refresh:
+            state.mark_full_crawl()
+        state.save()
+        store.save()
+        frontier.clear_snapshot()
         print(f"\n--- Fin: {ok} fichier(s) téléchargé(s). ---")
-        browser.close()
+        print(f"Débit final par hôte (req/s) : {limiter.rates()}")
+        emit("summary", downloaded=ok, rates=limiter.rates())
+    finally:
+        downloader.close()
+        api_ctx.dispose()
+        close_log()
+    return ok
 
 
 if __name__ == "__main__":
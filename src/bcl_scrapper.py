@@ -1,17 +1,31 @@
 # src/bcl_scrapper.py
 
 import os
-import csv
 import time
-from datetime import datetime
+import asyncio
+import queue
+import threading
+from collections import deque
 from urllib.parse import urljoin, urlparse
 from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
 
 # Importation des chemins sécurisés
 # src/bcl_scrapper.py
 # ...
 # Au lieu de 'from src.security_config import ...'
-from security_config import URL_ROOT, DOWNLOAD_DIR, LOG_FILE, SIZE_THRESHOLD
+from security_config import URL_ROOT, DOWNLOAD_DIR, LOG_FILE, SIZE_THRESHOLD, ASYNC_WORKERS, PER_HOST_CONCURRENCY
+from security_config import DOWNLOAD_QUEUE_SIZE, SITE_DOMAIN
+from security_config import FRONTIER_FILE, DOCS_FRONTIER_FILE, RATE_FLOOR, RATE_CEILING, LOG_DB
+from security_config import LOG_HISTORY_DIR, LOG_RETENTION_DAYS, STATE_FILE
+from utils.crawl_state import CrawlState
+from utils.http_download import HttpDownloader, DirectDownloadBlocked, IncompleteDownload, verify_length
+from utils.frontier import UrlFrontier, canonicalize_url
+from utils.rate_limiter import AdaptiveRateLimiter
+from utils.content_store import ContentStore
+from utils.html_discovery import HtmlDiscovery, NeedsBrowser, LazyBrowserPage
+from utils.log_store import open_log
+from utils.log_compaction import LogCompactor
 # ...
 # Extensions de documents à capturer (doit être la liste étendue)
 DOC_EXTS = [".pdf", ".doc", ".docx", ".xls", ".xlsx", ".csv", ".zip", ".txt"]
@@ -45,52 +59,67 @@ def filename_from_url(url: str) -> str:
     name = url.split("/")[-1].split("?")[0].strip()
     return name or "document_bcl"
 
-def log_entry(section_url, file_url, filename, mime, size_bytes, last_modified, clen, status):
-    """Écrit une ligne dans le fichier de log CSV."""
-    # S'assurer que le fichier log existe
-    if not os.path.exists(LOG_FILE):
-         with open(LOG_FILE, "w", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            w.writerow([
-                "downloaded_at",
-                "section_url",
-                "file_url",
-                "filename",
-                "mime_type",
-                "size_bytes",
-                "last_modified",
-                "content_length_header",
-                "status"
-            ])
-            
-    with open(LOG_FILE, "a", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow([
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            section_url,
-            file_url,
-            filename,
-            mime or "",
-            size_bytes if size_bytes is not None else "",
-            last_modified or "",
-            clen or "",
-            status
-        ])
+# Log SQLite ouvert pour la durée d'un crawl (partagé par les threads / tâches de téléchargement)
+_LOG = None
 
 
-def collect_links_on_page(page, base_url):
-    """Collecte les liens de sections et de documents sur une page."""
-    hrefs = page.locator("a[href]").evaluate_all("els => els.map(e => e.getAttribute('href'))")
-    hrefs = [urljoin(base_url, h) for h in hrefs if h]
-    
-    section_links = [h for h in hrefs if is_section_href(h) or h.lower().endswith(".html")]
+def get_log():
+    """Log des téléchargements (Config LOG_DB) ; le CSV historique LOG_FILE y est importé une seule fois."""
+    global _LOG
+    if _LOG is None:
+        _LOG = open_log(LOG_DB, LOG_FILE)
+    return _LOG
+
+
+def close_log():
+    """Écrit les lignes en attente, compacte le log, régénère l'export CSV LOG_FILE et ferme la base."""
+    global _LOG
+    if _LOG is None:
+        return
+    try:
+        LogCompactor(_LOG, LOG_HISTORY_DIR, LOG_RETENTION_DAYS).compact()
+        _LOG.export_csv(LOG_FILE, LOG_HISTORY_DIR)
+    finally:
+        _LOG.close()
+        _LOG = None
+
+
+def log_entry(section_url, file_url, filename, mime, size_bytes, last_modified, clen, status):
+    """Ajoute une ligne au log des téléchargements (écrite par lot, dans une transaction)."""
+    get_log().add(section_url, file_url, filename, mime, size_bytes, last_modified, clen, status)
+
+def split_links(hrefs):
+    """Sépare des liens absolus en (sections, documents), sans doublons."""
     document_links = [h for h in hrefs if is_document_href(h)]
+    # Un document rangé sous un chemin de section (ex. /reglements_bcl/x.pdf) n'est pas une page à explorer
+    section_links = [h for h in hrefs
+                     if (is_section_href(h) or h.lower().endswith(".html")) and not is_document_href(h)]
     
     section_links = list(dict.fromkeys(section_links))
     document_links = list(dict.fromkeys(document_links))
     return section_links, document_links
 
 
+def collect_links_on_page(page, base_url):
+    """Collecte les liens de sections et de documents sur une page."""
+    hrefs = page.locator("a[href]").evaluate_all("els => els.map(e => e.getAttribute('href'))")
+    hrefs = [urljoin(base_url, h) for h in hrefs if h]
+    return split_links(hrefs)
+
+
+def discover_links(discovery, browser, limiter, url):
+    """
+    Liens (sections, documents) d'une page : HTML statique par HTTP + BeautifulSoup d'abord,
+    rendu Playwright (onglet lancé à la demande) seulement si la page exige JavaScript.
+    """
+    try:
+        return split_links(discovery.fetch(url)["hrefs"])
+    except NeedsBrowser:
+        page = browser.get()
+        polite_goto(page, limiter, url, wait_until="domcontentloaded", timeout=30000)
+        return collect_links_on_page(page, url)
+
+
 def head_metadata(api_ctx, url: str):
     """Utilise Playwright APIRequestContext pour récupérer les headers."""
     try:
@@ -103,6 +132,17 @@ def head_metadata(api_ctx, url: str):
         return None, None, None
 
 
+def polite_goto(page, limiter, url, **kwargs):
+    """page.goto cadencé par le limiteur adaptatif (latence et statut lui sont remontés)."""
+    limiter.acquire(url)
+    started = time.monotonic()
+    resp = page.goto(url, **kwargs)
+    limiter.record(url, time.monotonic() - started,
+                   resp.status if resp else None,
+                   resp.headers.get("retry-after") if resp else None)
+    return resp
+
+
 def download_via_browser(page, file_url: str, dest_path: str):
     """Déclenche le téléchargement du fichier via la simulation de navigateur."""
     # La méthode .expect_download est cruciale pour contourner les protections
@@ -113,96 +153,591 @@ def download_via_browser(page, file_url: str, dest_path: str):
     download.save_as(dest_path)
 
 
+def download_document(downloader, browser, api_ctx, file_url: str, dest_path: str, state=None, stored=False):
+    """
+    Télécharge un fichier en flux HTTP direct (métadonnées lues sur la réponse GET).
+    Ne repasse par le navigateur (HEAD + window.open) que si le site bloque l'accès direct.
+    dest_path est un fichier .part : un transfert interrompu est repris par requête Range.
+    Un document déjà stocké (stored) n'est retéléchargé que s'il a changé depuis le crawl précédent.
+    Lève IncompleteDownload si la taille reçue ne correspond pas à Content-Length.
+    Retourne les métadonnées (voir download_direct).
+    """
+    try:
+        return download_direct(downloader, file_url, dest_path, state, stored)
+    except DirectDownloadBlocked:
+        return download_with_browser(downloader, browser, api_ctx, file_url, dest_path, state, stored)
+
+
+def is_current(state, doc_url, meta):
+    """
+    Vrai si la réponse décrit la version déjà stockée d'un document : 304, validateurs identiques à l'état,
+    ou document stocké sans validateurs connus (fichier antérieur à l'état, adopté comme référence).
+    """
+    if meta["status"] == 304 or not state.get(CrawlState.DOCUMENTS, doc_url):
+        return True
+    return state.is_unchanged(CrawlState.DOCUMENTS, doc_url, meta["etag"], meta["last_modified"],
+                              meta["content_length"])
+
+
+def download_direct(downloader, file_url: str, dest_path: str, state=None, stored=False):
+    """
+    Flux HTTP direct seul (sans Playwright). Lève DirectDownloadBlocked si le site le refuse.
+    Pour un document déjà stocké, le GET est conditionnel (If-None-Match / If-Modified-Since) : si la version
+    stockée est à jour, le corps n'est pas lu.
+    Retourne meta (status, mime, last_modified, content_length, etag, size) ; size vaut None si rien n'a été lu.
+    """
+    cond = state.conditional_headers(CrawlState.DOCUMENTS, file_url) if stored else {}
+    resp, meta = downloader.open(file_url, cond, part_path=dest_path)
+    if stored and is_current(state, file_url, meta):
+        resp.close()
+        meta["size"] = None
+        return meta
+    meta["size"] = downloader.save(resp, dest_path, file_url)
+    return meta
+
+
+def download_with_browser(downloader, browser, api_ctx, file_url: str, dest_path: str, state=None, stored=False):
+    """
+    Repli navigateur : HEAD pour les métadonnées, puis téléchargement par window.open.
+    Un document déjà stocké n'est retéléchargé que si le HEAD montre une nouvelle version.
+    """
+    mime, last_mod, clen = head_metadata(api_ctx, file_url)
+    meta = {"status": None, "mime": mime, "last_modified": last_mod, "content_length": clen, "etag": None,
+            "size": None}
+    # Sans Last-Modified ni Content-Length, rien ne permet de voir un changement : la version stockée est gardée
+    if stored and (not (last_mod or clen) or is_current(state, file_url, meta)):
+        return meta
+    if downloader.rate_limiter:
+        downloader.rate_limiter.acquire(file_url)
+    download_via_browser(browser.get(), file_url, dest_path)
+    meta["size"] = verify_length(dest_path, clen)
+    return meta
+
+
+def already_stored(store, doc_url):
+    """Vrai si l'URL est déjà dans le stockage par contenu (fichiers antérieurs intégrés au passage)."""
+    if store.lookup(doc_url):
+        return True
+    filename = filename_from_url(doc_url)
+    legacy = os.path.join(DOWNLOAD_DIR, filename)
+    if os.path.exists(legacy) and not store.owner_urls(filename):
+        store.adopt(legacy, doc_url)
+        return True
+    return False
+
+
+def remember_version(state, doc_url, meta):
+    """Validateurs de la version stockée d'un document, pour le GET conditionnel du crawl suivant."""
+    if meta["status"] == 304 or meta["etag"] or meta["last_modified"]:
+        state.record(CrawlState.DOCUMENTS, doc_url, meta["etag"], meta["last_modified"], meta["content_length"])
+
+
+def finalize_download(store, state, tmp, doc_url, meta):
+    """
+    Contrôle la taille, fait entrer le fichier dans le stockage par contenu et écrit la ligne de log.
+    Un document dont la version stockée est à jour (meta["size"] None) est seulement revalidé dans l'état.
+    Retourne 1 pour un contenu nouveau, 0 sinon (inchangé, trop petit, doublon d'octets déjà stockés).
+    """
+    if meta["size"] is None:
+        remember_version(state, doc_url, meta)
+        return 0
+    filename = filename_from_url(doc_url)
+    mime, last_mod, clen = meta["mime"], meta["last_modified"], meta["content_length"]
+    size = os.path.getsize(tmp)
+    if size < SIZE_THRESHOLD:
+        store.discard(tmp)
+        log_entry(URL_ROOT, doc_url, filename, mime, size, last_mod, clen, "fail_too_small")
+        state.forget(CrawlState.DOCUMENTS, doc_url)
+        return 0
+    _, stored = store.commit(tmp, doc_url, filename)
+    name = store.lookup(doc_url)["filename"]
+    log_entry(URL_ROOT, doc_url, name, mime, size, last_mod, clen, "ok" if stored == "new" else stored)
+    remember_version(state, doc_url, meta)
+    return 1 if stored == "new" else 0
+
+
+class _DownloadStage(threading.Thread):
+    """
+    Étage téléchargement du pipeline synchrone : consomme, pendant l'exploration, la file bornée
+    que remplissent les pages de section (contre-pression si les téléchargements prennent du retard).
+    Ce thread ne fait que du HTTP direct : Playwright sync reste dans le thread qui l'a créé,
+    les documents bloqués sont mis de côté pour un repli navigateur par le thread principal.
+    """
+
+    def __init__(self, downloader, store, state, maxsize=DOWNLOAD_QUEUE_SIZE):
+        super().__init__(daemon=True)
+        self.downloader = downloader
+        self.store = store
+        self.state = state
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.lock = threading.Lock()  # protège le stockage, l'état du crawl, le log et in_flight
+        self.in_flight = set()
+        self.blocked = deque()
+        self.total_ok = 0
+
+    def submit(self, doc_url):
+        with self.lock:
+            self.in_flight.add(doc_url)
+        self.queue.put(doc_url)  # bloque tant que la file est pleine
+
+    def pending(self):
+        """Documents remis à l'étage mais pas encore traités (pour la sauvegarde de la frontière)."""
+        with self.lock:
+            return list(self.in_flight) + list(self.blocked)
+
+    def finish(self):
+        self.queue.put(None)
+        self.join()
+
+    def run(self):
+        while True:
+            doc_url = self.queue.get()
+            if doc_url is None:
+                return
+            try:
+                self.total_ok += self.process(
+                    doc_url, lambda tmp, stored: download_direct(self.downloader, doc_url, tmp, self.state, stored)
+                )
+            except DirectDownloadBlocked:
+                self.blocked.append(doc_url)
+            finally:
+                with self.lock:
+                    self.in_flight.discard(doc_url)
+
+    def process(self, doc_url, fetch):
+        """
+        Télécharge un document avec fetch(tmp, stored) -> meta, puis le fait entrer dans le stockage.
+        Un document déjà stocké (vérification via le manifest, importante si le log est effacé mais pas
+        les fichiers) passe par une requête conditionnelle : il n'est retéléchargé que s'il a changé.
+        Retourne 1 pour un contenu nouveau, 0 sinon. DirectDownloadBlocked est propagé à l'appelant.
+        """
+        with self.lock:
+            stored = already_stored(self.store, doc_url)
+        filename = filename_from_url(doc_url)
+        tmp = self.store.incoming_path(doc_url, filename)
+        meta = {}
+        try:
+            meta = fetch(tmp, stored)
+            with self.lock:
+                ok = finalize_download(self.store, self.state, tmp, doc_url, meta)
+                self.store.save()
+            return ok
+        except DirectDownloadBlocked:
+            raise
+        except IncompleteDownload:
+            # .part conservé pour une reprise au prochain crawl
+            with self.lock:
+                log_entry(URL_ROOT, doc_url, filename, meta.get("mime"), None, meta.get("last_modified"),
+                          meta.get("content_length"), "retry_incomplete")
+        except Exception as e:
+            with self.lock:
+                self.store.discard(tmp)
+                log_entry(URL_ROOT, doc_url, filename, meta.get("mime"), None, meta.get("last_modified"),
+                          meta.get("content_length"), f"error:{e}")
+        return 0
+
+    def download_blocked(self, browser, api_ctx):
+        """Repli navigateur (thread principal) pour les documents refusés en HTTP direct."""
+        total = 0
+        while self.blocked:
+            doc_url = self.blocked[0]
+            total += self.process(
+                doc_url,
+                lambda tmp, stored: download_with_browser(self.downloader, browser, api_ctx, doc_url, tmp,
+                                                          self.state, stored),
+            )
+            self.blocked.popleft()
+        return total
+
+
+# --- Variantes asynchrones (mode concurrent) ---
+
+async def collect_links_on_page_async(page, base_url):
+    """Version asynchrone de collect_links_on_page."""
+    hrefs = await page.locator("a[href]").evaluate_all("els => els.map(e => e.getAttribute('href'))")
+    hrefs = [urljoin(base_url, h) for h in hrefs if h]
+    return split_links(hrefs)
+
+
+async def discover_links_async(discovery, pages, limiter, url):
+    """Version asynchrone de discover_links : requête HTTP dans un thread, onglet emprunté en repli."""
+    try:
+        result = await asyncio.to_thread(discovery.fetch, url)
+        return split_links(result["hrefs"])
+    except NeedsBrowser:
+        page = await pages.get()
+        try:
+            await polite_goto_async(page, limiter, url, wait_until="domcontentloaded", timeout=30000)
+            return await collect_links_on_page_async(page, url)
+        finally:
+            pages.put_nowait(page)
+
+
+async def head_metadata_async(api_ctx, url: str):
+    """Version asynchrone de head_metadata."""
+    try:
+        resp = await api_ctx.head(url)
+        mime = resp.headers.get("content-type")
+        last_mod = resp.headers.get("last-modified")
+        clen = resp.headers.get("content-length")
+        return mime, last_mod, clen
+    except Exception:
+        return None, None, None
+
+
+async def polite_goto_async(page, limiter, url, **kwargs):
+    """Version asynchrone de polite_goto."""
+    await limiter.acquire_async(url)
+    started = time.monotonic()
+    resp = await page.goto(url, **kwargs)
+    limiter.record(url, time.monotonic() - started,
+                   resp.status if resp else None,
+                   resp.headers.get("retry-after") if resp else None)
+    return resp
+
+
+async def download_via_browser_async(page, file_url: str, dest_path: str):
+    """Version asynchrone de download_via_browser."""
+    async with page.expect_download() as dl_info:
+        await page.evaluate(f"window.open('{file_url}', '_blank')")
+    download = await dl_info.value
+    await download.save_as(dest_path)
+
+
+async def download_document_async(downloader, pages, api_ctx, file_url: str, dest_path: str, state=None,
+                                  stored=False):
+    """Version asynchrone de download_document : le flux HTTP tourne dans un thread, un onglet n'est emprunté qu'en repli."""
+    try:
+        return await asyncio.to_thread(download_direct, downloader, file_url, dest_path, state, stored)
+    except DirectDownloadBlocked:
+        mime, last_mod, clen = await head_metadata_async(api_ctx, file_url)
+        meta = {"status": None, "mime": mime, "last_modified": last_mod, "content_length": clen, "etag": None,
+                "size": None}
+        if stored and (not (last_mod or clen) or is_current(state, file_url, meta)):
+            return meta
+        if downloader.rate_limiter:
+            await downloader.rate_limiter.acquire_async(file_url)
+        page = await pages.get()
+        try:
+            await download_via_browser_async(page, file_url, dest_path)
+        finally:
+            pages.put_nowait(page)
+        meta["size"] = verify_length(dest_path, clen)
+        return meta
+
+
+class _AsyncPagePool:
+    """Pool d'onglets Playwright créé au premier besoin : Chromium n'est pas lancé si tout passe en HTTP."""
+
+    def __init__(self, playwright, size):
+        self.playwright = playwright
+        self.size = size
+        self.browser = None
+        self.context = None
+        self._pages = asyncio.Queue()
+        self._lock = asyncio.Lock()
+
+    async def get(self):
+        async with self._lock:
+            if self.browser is None:
+                self.browser = await self.playwright.chromium.launch(headless=True)
+                self.context = await self.browser.new_context(accept_downloads=True)
+                for _ in range(self.size):
+                    self._pages.put_nowait(await self.context.new_page())
+        return await self._pages.get()
+
+    def put_nowait(self, page):
+        self._pages.put_nowait(page)
+
+    async def cookies(self):
+        return await self.context.cookies() if self.context else []
+
+    async def close(self):
+        if self.browser:
+            await self.browser.close()
+
+
+class _HostLimiter:
+    """Un sémaphore par hôte pour plafonner les requêtes simultanées vers un même site."""
+
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self._semaphores = {}
+
+    def for_url(self, url):
+        host = urlparse(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.per_host)
+        return self._semaphores[host]
+
+
+async def crawl_and_download_async(workers=ASYNC_WORKERS, per_host=PER_HOST_CONCURRENCY, limiter=None):
+    """
+    Mode concurrent de crawl_and_download, basé sur l'API asynchrone de Playwright.
+    `workers` tâches explorent les sections (HTTP + BeautifulSoup, onglets Chromium en repli)
+    et `workers` tâches téléchargent les documents au fil de leur découverte (file bornée entre les deux étages),
+    avec au plus `per_host` requêtes simultanées par hôte et un débit par hôte réglé par le limiteur adaptatif.
+    Retourne le même total_ok et écrit les mêmes lignes de log que le mode séquentiel.
+    Comme lui, sauvegarde l'état et les frontières après chaque section : un crawl interrompu reprend
+    les sections et documents restants.
+    """
+    async with async_playwright() as p:
+        api_ctx = await p.request.new_context()
+
+        # Pool d'onglets réutilisables, lancé seulement si une page ou un fichier l'exige
+        pages = _AsyncPagePool(p, max(1, workers))
+        hosts = _HostLimiter(max(1, per_host))
+        limiter = limiter or AdaptiveRateLimiter(min_rate=RATE_FLOOR, max_rate=RATE_CEILING)
+
+        # Session HTTP keep-alive partagée par la découverte des liens et les téléchargements
+        downloader = HttpDownloader(pool_size=max(1, workers), rate_limiter=limiter)
+        discovery = HtmlDiscovery(downloader)
+        store = ContentStore(DOWNLOAD_DIR)
+        state = CrawlState(str(STATE_FILE))
+        explorers, downloaders = [], []
+
+        # Frontières (sections, documents) avec reprise sur disque, comme en mode séquentiel ; elles sont vidées
+        # au fur et à mesure dans les files asyncio. active_* : URL retirées de la frontière mais pas encore
+        # traitées (remises en file à la reprise)
+        sections = UrlFrontier(FRONTIER_FILE)
+        documents = UrlFrontier(DOCS_FRONTIER_FILE)
+        active_sections, active_docs = set(), set()
+        finished = False
+
+        def checkpoint():
+            sections.save(pending=active_sections)
+            documents.save(pending=active_docs)
+            state.save()
+            get_log().flush()
+
+        try:
+            # 2. Étage téléchargement : consomme la file bornée pendant que l'exploration la remplit
+            to_download = asyncio.Queue(maxsize=DOWNLOAD_QUEUE_SIZE)
+            to_visit = asyncio.Queue()
+            results = []
+
+            async def download_one(doc_url):
+                filename = filename_from_url(doc_url)
+                tmp = None
+                meta = {}
+                try:
+                    # Document déjà stocké : requête conditionnelle, retéléchargé seulement s'il a changé
+                    stored = already_stored(store, doc_url)
+                    tmp = store.incoming_path(doc_url, filename)
+                    async with hosts.for_url(doc_url):
+                        meta = await download_document_async(downloader, pages, api_ctx, doc_url, tmp, state, stored)
+                    ok = finalize_download(store, state, tmp, doc_url, meta)
+                    store.save()
+                    return ok
+                except IncompleteDownload:
+                    # .part conservé pour une reprise au prochain crawl
+                    log_entry(URL_ROOT, doc_url, filename, meta.get("mime"), None, meta.get("last_modified"),
+                              meta.get("content_length"), "retry_incomplete")
+                except Exception as e:
+                    store.discard(tmp)
+                    log_entry(URL_ROOT, doc_url, filename, meta.get("mime"), None, meta.get("last_modified"),
+                              meta.get("content_length"), f"error:{e}")
+                return 0
+
+            async def download_worker():
+                # Une erreur inattendue (log, disque...) ne doit pas arrêter le worker : la file bornée
+                # bloquerait l'exploration une fois tous les workers arrêtés
+                while True:
+                    doc_url = await to_download.get()
+                    try:
+                        results.append(await download_one(doc_url))
+                    except Exception as e:
+                        print(f"Téléchargement de {doc_url} abandonné : {e}")
+                    else:
+                        active_docs.discard(doc_url)  # une tâche annulée reste à reprendre
+                    finally:
+                        to_download.task_done()
+
+            def drain(frontier, active):
+                while frontier:
+                    url = frontier.pop()
+                    active.add(url)
+                    yield url
+
+            async def enqueue_documents(doc_urls):
+                documents.extend(doc_urls)  # doublons ignorés
+                for d in drain(documents, active_docs):
+                    await to_download.put(d)  # attend si l'étage aval est saturé
+
+            def enqueue_sections(section_urls):
+                sections.extend(section_urls)
+                for s in drain(sections, active_sections):
+                    to_visit.put_nowait(s)
+
+            downloaders = [asyncio.create_task(download_worker()) for _ in range(max(1, workers))]
+
+            resumed = sections.load()
+            resumed = documents.load() or resumed
+            if resumed:
+                # Reprise d'un crawl interrompu : sections et documents restants, sans revisiter l'index
+                enqueue_sections([])
+                await enqueue_documents([])
+            else:
+                try:
+                    root_sections, root_docs = await discover_links_async(discovery, pages, limiter, URL_ROOT)
+                except Exception as e:
+                    # Index inaccessible (comme pour une section) : rien à explorer, le crawl se termine proprement
+                    print(f"Index inaccessible : {e}")
+                    root_sections, root_docs = [], []
+                downloader.use_browser_cookies(await pages.cookies())
+
+                sections.mark_visited(URL_ROOT)
+                await enqueue_documents(root_docs)
+                enqueue_sections(root_sections)
+
+            # 1. Exploration concurrente des sections, connectée à l'étage téléchargement
+            async def explore(section_url):
+                parsed = urlparse(section_url)
+                if SITE_DOMAIN not in parsed.netloc or "/documents_nationaux/" not in section_url:
+                    return
+
+                async with hosts.for_url(section_url):
+                    try:
+                        sec_sections, sec_docs = await discover_links_async(discovery, pages, limiter, section_url)
+                    except Exception:
+                        return
+
+                enqueue_sections(sec_sections)
+                await enqueue_documents(sec_docs)
+
+            async def explore_worker():
+                while True:
+                    section_url = await to_visit.get()
+                    try:
+                        await explore(section_url)
+                        active_sections.discard(section_url)
+                        checkpoint()
+                    finally:
+                        to_visit.task_done()
+
+            explorers = [asyncio.create_task(explore_worker()) for _ in range(max(1, workers))]
+            await to_visit.join()
+            await to_download.join()
+            finished = True
+            sections.clear_snapshot()
+            documents.clear_snapshot()
+            return sum(results)
+        finally:
+            # Succès, erreur ou annulation : tâches arrêtées, progression enregistrée, ressources libérées
+            for t in explorers + downloaders:
+                t.cancel()
+            await asyncio.gather(*explorers, *downloaders, return_exceptions=True)
+            if not finished:
+                checkpoint()  # crawl interrompu : repris au prochain lancement
+            store.save()
+            state.save()
+            downloader.close()
+            await pages.close()
+            await api_ctx.dispose()
+
+
 # --- Fonction Principale d'Orchestration du Scraping ---
 
-def crawl_and_download():
+def crawl_and_download(use_async=False):
     """
     Exécute le processus de web scraping récursif et de téléchargement.
     Retourne le nombre total de fichiers téléchargés avec succès.
+    Avec use_async=True, délègue au mode concurrent (crawl_and_download_async).
     """
     # Ne pas appeler ensure_dirs ici, Streamlit le fait au démarrage.
+    get_log()
+    try:
+        if use_async:
+            return asyncio.run(crawl_and_download_async())
+        return _crawl_sync()
+    finally:
+        close_log()
+
 
+def _crawl_sync():
     with sync_playwright() as p:
         # Utilisation de l'APIRequestContext pour la vérification des métadonnées (HEAD)
         api_ctx = p.request.new_context()
 
-        # Le contexte du navigateur pour le scraping et le téléchargement
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(accept_downloads=True)
-        page = context.new_page()
+        # Le navigateur (repli pour les pages JavaScript et les téléchargements bloqués) est lancé à la demande
+        browser = LazyBrowserPage(p)
 
-        page.goto(URL_ROOT, wait_until="domcontentloaded")
+        # Débit par hôte adaptatif (remplace les pauses fixes)
+        limiter = AdaptiveRateLimiter(min_rate=RATE_FLOOR, max_rate=RATE_CEILING)
 
-        root_sections, root_docs = collect_links_on_page(page, URL_ROOT)
+        # Client HTTP direct (keep-alive) pour la découverte des liens et les téléchargements
+        downloader = HttpDownloader(rate_limiter=limiter)
+        discovery = HtmlDiscovery(downloader)
 
-        to_visit = list(root_sections)
-        visited_pages = set()
+        # Frontières (sections à explorer, documents à télécharger) avec reprise sur disque
+        sections = UrlFrontier(FRONTIER_FILE)
+        documents = UrlFrontier(DOCS_FRONTIER_FILE)
         total_ok = 0
 
-        # Fusionner documents racine et ceux trouvés durant la navigation
-        all_docs_to_download = list(root_docs)
+        # Pipeline : les documents partent au téléchargement dès leur découverte (file bornée)
+        # Stockage adressé par contenu (des octets identiques ne sont stockés qu'une fois)
+        store = ContentStore(DOWNLOAD_DIR)
+        state = CrawlState(str(STATE_FILE))
+        stage = _DownloadStage(downloader, store, state)
+        stage.start()
 
-        # 1. Exploration et collecte des liens
-        while to_visit:
-            section_url = to_visit.pop(0)
-            if section_url in visited_pages:
-                continue
-            visited_pages.add(section_url)
+        def feed_pipeline():
+            while documents:
+                stage.submit(documents.pop())
+
+        resumed = sections.load()
+        resumed = documents.load() or resumed
+        if not resumed:
+            try:
+                root_sections, root_docs = discover_links(discovery, browser, limiter, URL_ROOT)
+            except Exception as e:
+                # Index inaccessible (comme pour une section) : rien à explorer, le crawl se termine proprement
+                print(f"Index inaccessible : {e}")
+                root_sections, root_docs = [], []
+            # Reprend les cookies de la session navigateur si elle a dû être lancée
+            downloader.use_browser_cookies(browser.cookies())
+
+            sections.mark_visited(URL_ROOT)
+            sections.extend(root_sections)
+            documents.extend(root_docs)
+        feed_pipeline()
+
+        # 1. Exploration des sections, pendant que l'étage aval télécharge
+        while sections:
+            section_url = sections.pop()
 
             parsed = urlparse(section_url)
-            if "bcl.lu" not in parsed.netloc or "/documents_nationaux/" not in section_url:
+            if SITE_DOMAIN not in parsed.netloc or "/documents_nationaux/" not in section_url:
                 continue
 
             try:
-                page.goto(section_url, wait_until="domcontentloaded", timeout=30000)
+                sec_sections, sec_docs = discover_links(discovery, browser, limiter, section_url)
             except Exception:
                 continue
-
-            sec_sections, sec_docs = collect_links_on_page(page, section_url)
             
-            # Ajouter les nouveaux liens de documents à la liste globale
-            for doc in sec_docs:
-                if doc not in all_docs_to_download:
-                    all_docs_to_download.append(doc)
-            
-            # Ajouter les nouvelles sections à visiter
-            for s in sec_sections:
-                if s not in visited_pages and s not in to_visit:
-                    to_visit.append(s)
-            
-            # Politesse: attendre un peu entre les pages de navigation
-            time.sleep(1)
+            # Ajouter les nouveaux liens de documents et les nouvelles sections (doublons ignorés)
+            documents.extend(sec_docs)
+            sections.extend(sec_sections)
+            feed_pipeline()
 
-        # 2. Téléchargement de tous les documents collectés
-        
-        for doc_url in all_docs_to_download:
-            filename = filename_from_url(doc_url)
-            dest = os.path.join(DOWNLOAD_DIR, filename)
+            # Repli navigateur des documents bloqués (Playwright reste dans ce thread)
+            total_ok += stage.download_blocked(browser, api_ctx)
 
-            # Vérification de l'existence (important si le log est effacé mais pas les fichiers)
-            if os.path.exists(dest):
-                continue
-            
-            # Utilisation de l'API pour récupérer les métadonnées avant de télécharger
-            mime, last_mod, clen = head_metadata(api_ctx, doc_url)
-            
-            try:
-                # Téléchargement via le navigateur
-                download_via_browser(page, doc_url, dest)
-                size = os.path.getsize(dest)
-                
-                if size < SIZE_THRESHOLD:
-                    os.remove(dest)
-                    log_entry(URL_ROOT, doc_url, filename, mime, size, last_mod, clen, "fail_too_small")
-                else:
-                    log_entry(URL_ROOT, doc_url, filename, mime, size, last_mod, clen, "ok")
-                    total_ok += 1
-            except Exception as e:
-                log_entry(URL_ROOT, doc_url, filename, mime, None, last_mod, clen, f"error:{e}")
-                
-            # Politesse: attendre entre les téléchargements
-            time.sleep(1.5)
+            sections.save()
+            documents.save(pending=stage.pending())
+            with stage.lock:
+                state.save()
+            get_log().flush()
+
+        # 2. Fin du pipeline : vider la file puis les derniers replis navigateur
+        stage.finish()
+        total_ok += stage.total_ok + stage.download_blocked(browser, api_ctx)
 
+        store.save()
+        state.save()
+        sections.clear_snapshot()
+        documents.clear_snapshot()
+        downloader.close()
         browser.close()
         return total_ok
 
@@ -2,7 +2,6 @@
 
 import io
 import docx
-import fitz  # PyMuPDF
 import pandas as pd
 import zipfile
 import tempfile
@@ -13,6 +12,7 @@ import duckdb
 from transformers import pipeline
 
 from security_config import TEMP_DIR
+from utils.text_extraction import PREFETCH_PAGES, iter_pages
 
 # ==========================================
 # PARTIE 1 — Dictionnaire des modèles
@@ -82,17 +82,19 @@ def translate_text(text: str, translator, chunk_size=1000) -> str:
 # Les fonctions ci-dessous utilisent l'implémentation de ton `translator.py` original :
 
 def translate_pdf_bytes(pdf_bytes: bytes, translator):
-    # ... (Ton code pour PDF) ...
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    text = "".join([page.get_text() for page in doc])
-    translated = translate_text(text, translator)
-
+    """
+    Traduit un PDF page par page (utils/text_extraction.iter_pages) : chaque page est extraite, traduite
+    et écrite dans le PDF de sortie avant de passer à la suivante ; l'extraction des pages suivantes
+    avance pendant la traduction, dans une file bornée.
+    """
     pdf_out = FPDF()
     pdf_out.add_page()
     pdf_out.set_font("Arial", size=12)
-    safe_text = translated.encode('latin-1', 'replace').decode('latin-1')
-    for line in safe_text.split("\n"):
-        pdf_out.multi_cell(0, 8, line)
+    for _, page_text in iter_pages(pdf_bytes, filename="document.pdf", backend="pymupdf", prefetch=PREFETCH_PAGES):
+        translated = translate_text(page_text, translator)
+        safe_text = translated.encode('latin-1', 'replace').decode('latin-1')
+        for line in safe_text.split("\n"):
+            pdf_out.multi_cell(0, 8, line)
     buf = io.BytesIO()
     pdf_out.output(buf)
     buf.seek(0)
@@ -9,7 +9,15 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Dossiers de travail
 DOWNLOAD_DIR = BASE_DIR / "data" / "BCL_Documents_Downloads"
-LOG_FILE = BASE_DIR / "data" / "BCL_Documents_Log.csv"
+LOG_FILE = BASE_DIR / "data" / "BCL_Documents_Log.csv"  # export CSV du log (compatibilité)
+LOG_DB = BASE_DIR / "data" / "BCL_Documents_Log.db"  # log des téléchargements (SQLite, mode WAL)
+LOG_HISTORY_DIR = BASE_DIR / "data" / "log_history"  # historique brut du log archivé (Parquet par mois)
+LOG_RETENTION_DAYS = 90  # lignes archivées conservées dans la base
+# Validateurs HTTP (ETag / Last-Modified) des documents stockés, pour les requêtes conditionnelles du recrawl
+STATE_FILE = BASE_DIR / "data" / "crawl_state.json"
+# Sauvegardes de la frontière de crawl (reprise d'un crawl interrompu)
+FRONTIER_FILE = BASE_DIR / "data" / "frontier_sections.json"
+DOCS_FRONTIER_FILE = BASE_DIR / "data" / "frontier_documents.json"
 TEMP_DIR = BASE_DIR / "tmp_secure" # Dossier pour fichiers temporaires (DuckDB, xlwings)
 
 def ensure_secure_dirs():
@@ -21,8 +29,18 @@ def ensure_secure_dirs():
 
 # --- Configuration Playwright ---
 URL_ROOT = "https://www.bcl.lu/fr/cadre_juridique/documents_nationaux/index.html"
+SITE_DOMAIN = "bcl.lu"  # Domaine dont le crawl ne sort pas
 SIZE_THRESHOLD = 5000  # Seuil pour les fichiers non corrompus (en octets)
 
+# --- Mode concurrent (asyncio) ---
+ASYNC_WORKERS = 4          # Nombre d'onglets Chromium utilisés en parallèle
+PER_HOST_CONCURRENCY = 2   # Requêtes simultanées max vers un même hôte
+DOWNLOAD_QUEUE_SIZE = 32   # Documents en attente entre l'exploration et le téléchargement (file bornée)
+
+# --- Limiteur de débit adaptatif (requêtes/seconde par hôte) ---
+RATE_FLOOR = 0.2
+RATE_CEILING = 5.0
+
 # --- Couleurs SGBL (Exemple pour l'UX/IX) ---
 # Couleurs d'entreprise (à ajuster selon tes préférences précises)
 SGBL_PRIMARY = "#CC0000" # Rouge dominant
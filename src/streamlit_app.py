@@ -11,14 +11,17 @@ sys.path.insert(0, str(BASE_DIR))
 # --------------------------------------------------
 
 import streamlit as st
-import pandas as pd
 import asyncio 
 from transformers import pipeline
 
 # Importation des modules locaux (IMPORTATION ABSOLUE)
-from src.security_config import SGBL_PRIMARY, SGBL_SECONDARY, LOG_FILE, ensure_secure_dirs
+from src.security_config import SGBL_PRIMARY, SGBL_SECONDARY, LOG_FILE, LOG_DB, LOG_HISTORY_DIR, LOG_RETENTION_DAYS
+from src.security_config import ensure_secure_dirs
 from src.bcl_scrapper import crawl_and_download 
 from src.doc_translator import MODEL_MAP, dispatch_file_for_translation
+from utils.log_store import open_log
+from utils.log_compaction import LogCompactor, read_history
+from utils.log_reader import IncrementalLogReader
 
 
 # 🚨 CORRECTIF CRUCIAL POUR PLAYWRIGHT SUR WINDOWS (asyncio/subprocess fix) 🚨
@@ -69,13 +72,13 @@ def configure_streamlit():
 # 2. Fonctions d'Orchestration
 # ==================================
 
-def run_scrapping():
+def run_scrapping(use_async=False):
     """Lance le Scrapper Playwright et logue le résultat."""
     ensure_secure_dirs() 
     
     with st.spinner("Démarrage du Scrapping Playwright (Mode headless)... Patientez, cela peut prendre du temps..."):
         try:
-            ok_count = crawl_and_download() 
+            ok_count = crawl_and_download(use_async=use_async) 
             st.success(f"✅ Scrapping terminé ! {ok_count} fichiers téléchargés/mis à jour.")
         except Exception as e:
             st.error(f"❌ Erreur critique de Scrapping : {e}")
@@ -84,35 +87,65 @@ def run_scrapping():
 # 3. Visualisation (Métadonnées & Logger)
 # ==================================
 
+@st.cache_resource
+def get_log_reader(db_path):
+    """Lecteur incrémental du log, conservé entre les relances du script (une instance par base)."""
+    return IncrementalLogReader(db_path)
+
+
+@st.cache_resource(max_entries=2)
+def documents_table(db_path, version):
+    """Tableau affiché, recalculé seulement quand le cache du lecteur change (version)."""
+    df = get_log_reader(db_path).frame.reset_index()
+    df_display = df.rename(columns={'last_seen': 'Date', 'filename': 'Fichier', 'status': 'Statut', 'size_bytes': 'Taille (o)'})
+    df_display = df_display[['Date', 'Fichier', 'Statut', 'Taille (o)', 'last_modified', 'file_url', 'attempts', 'failures']]
+    df_display['Taille (KB)'] = (df_display['Taille (o)'] / 1024).round(2)
+    return df_display
+
+
 def display_metadata_and_logs():
-    """Affiche les métadonnées des fichiers téléchargés (Logger sur Streamlit)."""
+    """
+    Affiche les métadonnées des fichiers téléchargés (Logger sur Streamlit).
+    Lit la table compacte 'documents' du log (une ligne par document, utils/log_compaction.py) :
+    les totaux ne comptent plus chaque document autant de fois qu'il a été journalisé.
+    Le lecteur incrémental ne relit que les documents modifiés depuis la relance précédente.
+    """
     st.subheader("🔍 Étape 2 : Inspection des Métadonnées & Logs (Logger Streamlit)")
-    
-    if not os.path.exists(LOG_FILE):
+
+    reader = get_log_reader(str(LOG_DB))
+    try:
+        available = reader.refresh()
+        if not available and os.path.exists(LOG_FILE):
+            # Installation antérieure au log SQLite : import unique du CSV puis compaction
+            with open_log(LOG_DB, LOG_FILE) as log:
+                LogCompactor(log, LOG_HISTORY_DIR, LOG_RETENTION_DAYS).compact()
+            available = reader.refresh()
+    except Exception as e:
+        st.error(f"Erreur lors de la lecture du log : {e}")
+        return
+    if not available:
         st.warning("Aucun historique de log trouvé. Veuillez d'abord exécuter le Scrapper.")
         return
+    if reader.stats["documents"] == 0:
+        st.warning("Le log est vide. Aucune donnée à afficher.")
+        return
 
     try:
-        df = pd.read_csv(LOG_FILE, encoding='utf-8') 
-        
-        df_display = df.rename(columns={'downloaded_at': 'Date', 'filename': 'Fichier', 'status': 'Statut', 'size_bytes': 'Taille (o)'})
-        df_display = df_display[['Date', 'Fichier', 'Statut', 'Taille (o)', 'last_modified', 'file_url']]
-        df_display['Taille (KB)'] = (df_display['Taille (o)'] / 1024).round(2)
-        
-        success_count = df['status'].eq('ok').sum()
-        fail_count = df['status'].str.contains('fail|error', na=False).sum()
-
+        stats = reader.stats
         col1, col2, col3 = st.columns(3)
-        col1.metric("Fichiers OK", success_count)
-        col2.metric("Échecs/Erreurs", fail_count)
-        total_size = df['size_bytes'].sum()
+        col1.metric("Fichiers OK", stats["ok"])
+        col2.metric("Échecs/Erreurs", stats["failures"])
+        total_size = stats["size_bytes"]
         col3.metric("Taille Totale", f"{total_size / (1024**2):.2f} MB" if total_size > 0 else "0.00 MB")
 
-        st.dataframe(df_display, use_container_width=True, height=350,
-                     column_order=("Date", "Fichier", "Statut", "Taille (KB)", "last_modified", "file_url"))
-        
-    except pd.errors.EmptyDataError:
-        st.warning("Le fichier de log est vide. Aucune donnée à afficher.")
+        st.dataframe(documents_table(str(LOG_DB), reader.version), use_container_width=True, height=350,
+                     column_order=("Date", "Fichier", "Statut", "Taille (KB)", "last_modified", "file_url", "attempts", "failures"))
+
+        # Historique brut (toutes les tentatives), archivé en Parquet par la compaction
+        if os.path.isdir(LOG_HISTORY_DIR) and st.checkbox("Afficher l'historique complet des téléchargements"):
+            history = read_history(LOG_HISTORY_DIR, "SELECT * FROM history ORDER BY id DESC LIMIT 5000")
+            st.dataframe(history, use_container_width=True, height=300)
+
     except Exception as e:
         st.error(f"Erreur lors de la lecture du log : {e}")
 
@@ -175,8 +208,10 @@ def main():
     configure_streamlit()
     
     st.subheader("⚙️ Étape 1 : Téléchargement des Réglementations BCL")
+    use_async = st.checkbox("Mode concurrent (asyncio)", value=False,
+                            help="Explore les sections et télécharge les documents en parallèle.")
     if st.button("Lancer le Scrapper Playwright"):
-        run_scrapping()
+        run_scrapping(use_async=use_async)
     
     st.markdown("---")
     display_metadata_and_logs()
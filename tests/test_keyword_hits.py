@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.analytics import AnalyticsStore  # noqa: E402
+from utils.keyword_search import KeywordScanner, hit_rows  # noqa: E402
+
+pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+KEYWORDS = ["liquidité", "solvabilité", "titrisation"]
+
+
+def _scan(pages):
+    return KeywordScanner(KEYWORDS).scan(iter(enumerate(pages, start=1)))
+
+
+def test_hit_rows_one_row_per_keyword():
+    scan = _scan(["Ratio de liquidité et de solvabilité.", "Liquidité à court terme."])
+
+    rows = hit_rows("circulaire.pdf", "h1", scan, KEYWORDS)
+
+    assert [(r["Mot-clé Cible"], r["Occurrences"], r["Page"]) for r in rows] == [
+        ("liquidité", 2, 1), ("solvabilité", 1, 1),
+    ]
+    assert [r["Mot-clé Cible"] for r in hit_rows("circulaire.pdf", "h1", scan, KEYWORDS, first_only=True)] == [
+        "liquidité"
+    ]
+
+
+def test_keyword_hits_counts_every_keyword_of_a_document(tmp_path):
+    rows = hit_rows("circulaire.pdf", "h1", _scan(["Liquidité, liquidité et solvabilité."]), KEYWORDS)
+    rows += hit_rows("avis.pdf", "h2", _scan(["Aucun terme surveillé."]), KEYWORDS)
+    hits_file = tmp_path / "keyword_hits.parquet"
+    pd.DataFrame(rows).assign(**{"Analysé le": "2026-01-01 00:00:00"}).to_parquet(hits_file, index=False)
+
+    analytics = AnalyticsStore(tmp_path / "analytics.duckdb", tmp_path / "log.db", hits_file=hits_file)
+    assert analytics.refresh()["keyword_documents"] == 1
+
+    hits = analytics.keyword_hits()
+    assert hits[["document", "hits", "keywords"]].values.tolist() == [["circulaire.pdf", 3, 2]]
@@ -0,0 +1,222 @@
+import glob
+import os
+import sqlite3
+import threading
+
+from utils.log_compaction import ARCHIVED_KEY, SUCCESS_STATUSES
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS section_daily (
+    day DATE,
+    section_url VARCHAR,
+    downloads BIGINT,
+    ok BIGINT,
+    failures BIGINT,
+    bytes BIGINT,
+    PRIMARY KEY (day, section_url)
+);
+CREATE TABLE IF NOT EXISTS keyword_hits (
+    document VARCHAR PRIMARY KEY,
+    hits BIGINT,
+    keywords BIGINT,
+    analysed_at VARCHAR
+);
+CREATE TABLE IF NOT EXISTS refresh_state (key VARCHAR PRIMARY KEY, value VARCHAR);
+CREATE OR REPLACE VIEW daily_totals AS
+SELECT day,
+       SUM(downloads) AS downloads,
+       SUM(ok) AS ok,
+       SUM(failures) AS failures,
+       SUM(failures) / NULLIF(SUM(downloads), 0) AS failure_rate,
+       SUM(bytes) AS bytes
+FROM section_daily
+GROUP BY day;
+"""
+
+# Agrégation d'un lot d'événements bruts (vue 'new_events') ajoutée aux agrégats existants
+_FOLD_EVENTS = f"""
+INSERT INTO section_daily
+SELECT CAST(SUBSTR(downloaded_at, 1, 10) AS DATE) AS day,
+       COALESCE(NULLIF(section_url, ''), '(inconnue)') AS section_url,
+       COUNT(*) AS downloads,
+       COUNT(*) FILTER (WHERE status IN ({', '.join(repr(s) for s in SUCCESS_STATUSES)})) AS ok,
+       COUNT(*) FILTER (WHERE status LIKE 'fail%' OR status LIKE 'error%') AS failures,
+       COALESCE(SUM(CAST(size_bytes AS BIGINT)) FILTER (WHERE status = 'ok'), 0) AS bytes
+FROM new_events
+GROUP BY 1, 2
+ON CONFLICT (day, section_url) DO UPDATE SET
+    downloads = downloads + excluded.downloads,
+    ok = ok + excluded.ok,
+    failures = failures + excluded.failures,
+    bytes = bytes + excluded.bytes
+"""
+
+_EVENT_COLUMNS = "id, downloaded_at, section_url, size_bytes, status"
+
+# Une seule connexion en écriture à la fois sur le fichier DuckDB (sessions Streamlit = threads)
+_LOCK = threading.Lock()
+
+
+class AnalyticsStore:
+    """
+    Agrégats matérialisés pour la page de visualisation, dans une base DuckDB (Config.ANALYTICS_DB) :
+    - section_daily : téléchargements, succès, échecs et octets par section et par jour ;
+    - daily_totals (vue sur section_daily) : totaux et taux d'échec par jour ;
+    - keyword_hits : occurrences de mots-clés par document (dernière analyse de l'Agent 2).
+    refresh() n'agrège que les événements du log postérieurs au dernier id déjà compté :
+    historique archivé en Parquet (utils/log_compaction.py) puis lignes récentes de la base SQLite.
+    Les graphiques lisent les agrégats, jamais le log brut.
+    """
+
+    def __init__(self, db_path, log_db, history_dir=None, hits_file=None):
+        self.db_path = str(db_path)
+        self.log_db = str(log_db)
+        self.history_dir = str(history_dir) if history_dir else None
+        self.hits_file = str(hits_file) if hits_file else None
+
+    def _connect(self, read_only=False):
+        import duckdb
+
+        if not read_only:
+            folder = os.path.dirname(self.db_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+        return duckdb.connect(self.db_path, read_only=read_only)
+
+    @staticmethod
+    def _state(con, key, default=None):
+        row = con.execute("SELECT value FROM refresh_state WHERE key = ?", [key]).fetchone()
+        return row[0] if row else default
+
+    @staticmethod
+    def _set_state(con, key, value):
+        con.execute("INSERT OR REPLACE INTO refresh_state VALUES (?, ?)", [key, str(value)])
+
+    # --- Mise à jour incrémentale ---
+
+    def refresh(self):
+        """Ajoute aux agrégats les nouveaux événements du log et recharge les mots-clés si besoin."""
+        with _LOCK:
+            con = self._connect()
+            try:
+                con.execute(_SCHEMA)
+                # Agrégats et position dans le log avancent ensemble (pas de double comptage après un arrêt)
+                con.begin()
+                folded = self._fold_log(con)
+                hits = self._load_hits(con)
+                con.commit()
+            finally:
+                con.close()
+        return {"events": folded, "keyword_documents": hits}
+
+    def _read_sqlite_events(self, after_id):
+        import pandas as pd
+
+        if not os.path.exists(self.log_db):
+            return None, 0
+        conn = sqlite3.connect(f"file:{os.path.abspath(self.log_db)}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (ARCHIVED_KEY,)).fetchone()
+            archived = int(row[0]) if row else 0
+            events = pd.read_sql_query(
+                f"SELECT {_EVENT_COLUMNS} FROM downloads WHERE id > ? ORDER BY id",
+                conn, params=(max(after_id, archived),),
+            )
+        except (sqlite3.Error, pd.errors.DatabaseError):
+            return None, 0
+        finally:
+            conn.close()
+        return events, archived
+
+    def _fold_log(self, con):
+        last_id = int(self._state(con, "last_event_id", 0))
+        recent, archived = self._read_sqlite_events(last_id)
+        folded, max_id = 0, last_id
+
+        # 1. Événements déjà archivés en Parquet (purgés ou non de la base)
+        parts = glob.glob(os.path.join(self.history_dir, "*", "*.parquet")) if self.history_dir else []
+        if parts and archived > last_id:
+            files = ", ".join("'" + p.replace("'", "''") + "'" for p in parts)  # les vues n'acceptent pas de paramètres
+            con.execute(
+                f"CREATE OR REPLACE TEMP VIEW new_events AS SELECT {_EVENT_COLUMNS} "
+                f"FROM read_parquet([{files}], hive_partitioning = true) WHERE id > {int(last_id)} AND id <= {int(archived)}"
+            )
+            n, top = con.execute("SELECT COUNT(*), MAX(id) FROM new_events").fetchone()
+            if n:
+                con.execute(_FOLD_EVENTS)
+                folded, max_id = folded + n, max(max_id, top)
+
+        # 2. Lignes récentes, pas encore archivées
+        if recent is not None and not recent.empty:
+            con.register("recent_events", recent)
+            con.execute(f"CREATE OR REPLACE TEMP VIEW new_events AS SELECT {_EVENT_COLUMNS} FROM recent_events")
+            con.execute(_FOLD_EVENTS)
+            con.unregister("recent_events")
+            folded, max_id = folded + len(recent), max(max_id, int(recent["id"].max()))
+
+        if max_id != last_id:
+            self._set_state(con, "last_event_id", max_id)
+        return folded
+
+    def _load_hits(self, con):
+        """
+        Recharge keyword_hits quand le fichier de résultats de l'Agent 2 a changé
+        (une ligne par document et mot-clé trouvé, cf. agent_ai2_notif.save_keyword_hits).
+        """
+        if not self.hits_file or not os.path.exists(self.hits_file):
+            return 0
+        stamp = str(os.stat(self.hits_file).st_mtime_ns)
+        if self._state(con, "hits_mtime") == stamp:
+            return 0
+        con.execute("DELETE FROM keyword_hits")
+        con.execute(
+            """
+            INSERT INTO keyword_hits
+            SELECT "Fichier", SUM("Occurrences"), COUNT(DISTINCT "Mot-clé Cible"), MAX("Analysé le")
+            FROM read_parquet(?)
+            WHERE "Statut" = 'Trouvé'
+            GROUP BY "Fichier"
+            """,
+            [self.hits_file],
+        )
+        self._set_state(con, "hits_mtime", stamp)
+        return con.execute("SELECT COUNT(*) FROM keyword_hits").fetchone()[0]
+
+    # --- Lecture des agrégats ---
+
+    def query(self, sql, params=None):
+        """Requête en lecture sur les agrégats ; DataFrame vide si la base n'existe pas encore."""
+        import pandas as pd
+
+        if not os.path.exists(self.db_path):
+            return pd.DataFrame()
+        with _LOCK:
+            con = self._connect(read_only=True)
+            try:
+                return con.execute(sql, params or []).df()
+            finally:
+                con.close()
+
+    def daily_totals(self, since=None):
+        return self.query("SELECT * FROM daily_totals WHERE day >= COALESCE(?, DATE '1970-01-01') ORDER BY day",
+                          [since])
+
+    def section_daily(self, since=None, top_sections=8):
+        """Téléchargements par jour pour les sections les plus actives (les autres regroupées)."""
+        return self.query(
+            """
+            WITH recent AS (
+                SELECT * FROM section_daily WHERE day >= COALESCE(?, DATE '1970-01-01')
+            ), top AS (
+                SELECT section_url FROM recent GROUP BY 1 ORDER BY SUM(downloads) DESC LIMIT ?
+            )
+            SELECT day,
+                   CASE WHEN section_url IN (SELECT section_url FROM top) THEN section_url ELSE '(autres)' END AS section,
+                   SUM(downloads) AS downloads
+            FROM recent GROUP BY 1, 2 ORDER BY 1
+            """,
+            [since, top_sections],
+        )
+
+    def keyword_hits(self, limit=20):
+        return self.query("SELECT * FROM keyword_hits ORDER BY hits DESC, document LIMIT ?", [limit])
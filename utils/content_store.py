@@ -0,0 +1,298 @@
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+HASH_CHUNK = 1024 * 1024
+
+
+def sha256_file(path):
+    """Empreinte SHA-256 d'un fichier, lue par blocs (mémoire constante)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Verrou exclusif entre processus (et entre threads) sur un fichier verrou, bloquant."""
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK abandonne après ~10 s d'attente
+                    time.sleep(0.1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class ContentStore:
+    """
+    Stockage adressé par contenu des documents téléchargés.
+    - Les octets sont rangés une seule fois sous .store/objects/<aa>/<sha256><ext>.
+    - Le dossier de téléchargement garde des noms lisibles (liens physiques vers l'objet),
+      désambiguïsés quand deux documents différents portent le même nom.
+    - manifest.json relie chaque URL et chaque nom de fichier à son empreinte ; un index en mémoire
+      (nom de fichier -> URL) évite de parcourir tout le manifest à chaque document.
+    - Plusieurs processus peuvent écrire le même stockage (crawl, ScraperAgent, promotion du staging) :
+      le manifest est réécrit sous verrou de fichier (manifest.lock), après relecture, en n'y reportant
+      que les entrées modifiées par ce processus.
+    Les étapes suivantes (extraction, analyse, traduction) se basent sur cette empreinte.
+    Avec read_only=True (lecteurs comme l'Agent 2), rien n'est créé ni écrit sur le disque.
+    """
+
+    def __init__(self, root_dir, store_subdir=".store", read_only=False):
+        self.root_dir = str(root_dir)
+        self.read_only = read_only
+        self.store_dir = os.path.join(self.root_dir, store_subdir)
+        self.objects_dir = os.path.join(self.store_dir, "objects")
+        self.incoming_dir = os.path.join(self.store_dir, "incoming")
+        self.manifest_path = os.path.join(self.store_dir, "manifest.json")
+        self.lock_path = os.path.join(self.store_dir, "manifest.lock")
+        if not read_only:
+            os.makedirs(self.objects_dir, exist_ok=True)
+            os.makedirs(self.incoming_dir, exist_ok=True)
+        self.manifest = {"urls": {}, "files": {}, "objects": {}}
+        self._dirty = {key: set() for key in self.manifest}  # entrées modifiées depuis le dernier save()
+        self._owners = {}  # nom de fichier visible -> URL qui le portent
+        self._load()
+
+    # --- Manifest ---
+
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self):
+        loaded = self._read_manifest()
+        for key in self.manifest:
+            self.manifest[key] = loaded.get(key, {})
+        self._reindex()
+
+    def _refresh(self):
+        """Relit le manifest sur disque (verrou tenu) en y reportant les entrées modifiées par ce processus."""
+        loaded = self._read_manifest()
+        for key in self.manifest:
+            merged = loaded.get(key, {})
+            for name in self._dirty[key]:
+                merged[name] = self.manifest[key][name]
+            self.manifest[key] = merged
+        self._reindex()
+
+    def _reindex(self):
+        self._owners = {}
+        for file_url, entry in self.manifest["urls"].items():
+            self._owners.setdefault(entry.get("filename"), set()).add(file_url)
+
+    def _set_url(self, file_url, entry):
+        """Entrée du manifest pour une URL, index des noms de fichier tenu à jour."""
+        previous = self.manifest["urls"].get(file_url)
+        if previous is not None:
+            self._owners.get(previous.get("filename"), set()).discard(file_url)
+        self.manifest["urls"][file_url] = entry
+        self._owners.setdefault(entry.get("filename"), set()).add(file_url)
+        self._dirty["urls"].add(file_url)
+
+    def _set_file(self, name, sha):
+        self.manifest["files"][name] = sha
+        self._dirty["files"].add(name)
+
+    def _set_object(self, sha, meta):
+        self.manifest["objects"][sha] = meta
+        self._dirty["objects"].add(sha)
+
+    def _write_locked(self):
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+        self._dirty = {key: set() for key in self.manifest}
+
+    def save(self):
+        """Écrit le manifest sous verrou, fusionné avec les écritures des autres processus."""
+        if self.read_only:
+            raise PermissionError(f"Stockage ouvert en lecture seule : {self.root_dir}")
+        with file_lock(self.lock_path):
+            self._refresh()
+            self._write_locked()
+
+    # --- Consultation ---
+
+    def object_path(self, sha, ext=None):
+        if ext is None:
+            ext = self.manifest["objects"].get(sha, {}).get("ext", "")
+        return os.path.join(self.objects_dir, sha[:2], sha + ext)
+
+    def has_object(self, sha):
+        return sha in self.manifest["objects"] and os.path.exists(self.object_path(sha))
+
+    def lookup(self, file_url):
+        """Entrée du manifest pour une URL ({'sha256', 'filename', ...}) ou None."""
+        entry = self.manifest["urls"].get(file_url)
+        if entry and self.has_object(entry["sha256"]):
+            return entry
+        return None
+
+    def visible_path(self, file_url):
+        entry = self.lookup(file_url)
+        return os.path.join(self.root_dir, entry["filename"]) if entry else None
+
+    def hash_for_file(self, filename):
+        """Empreinte d'un fichier visible du dossier de téléchargement (None si inconnu)."""
+        return self.manifest["files"].get(os.path.basename(filename))
+
+    def owner_urls(self, filename):
+        """URL dont la version stockée porte ce nom de fichier visible (index, sans parcours du manifest)."""
+        return list(self._owners.get(filename, ()))
+
+    # --- Ecriture ---
+
+    def incoming_path(self, file_url, filename):
+        """
+        Fichier .part où écrire un téléchargement avant son entrée dans le stockage.
+        Chemin stable par URL : un transfert interrompu peut être repris au crawl suivant.
+        """
+        key = hashlib.sha1(file_url.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.incoming_dir, f"{key}_{filename}.part")
+
+    def _visible_name(self, file_url, filename, sha):
+        """Nom lisible sans collision : un autre document au même nom reçoit un suffixe d'empreinte."""
+        current = self.manifest["files"].get(filename)
+        if current is None or current == sha:
+            return filename
+        if all(u == file_url for u in self.owner_urls(filename)):
+            return filename  # nouvelle version du même document
+        stem, ext = os.path.splitext(filename)
+        return f"{stem}__{sha[:8]}{ext}"
+
+    def _link(self, src, dest):
+        tmp = dest + ".lnk"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copy2(src, tmp)
+        os.replace(tmp, dest)
+
+    def commit(self, tmp_path, file_url, filename, extra=None):
+        """
+        Fait entrer un fichier téléchargé dans le stockage.
+        Retourne (sha256, statut) avec statut parmi :
+        'new' (contenu inédit), 'duplicate' (octets déjà stockés pour une autre URL),
+        'unchanged' (même contenu que la version connue de cette URL).
+        """
+        sha = sha256_file(tmp_path)
+        ext = os.path.splitext(filename)[1].lower()
+        previous = self.manifest["urls"].get(file_url)
+
+        if self.has_object(sha):
+            os.remove(tmp_path)
+            status = "unchanged" if previous and previous["sha256"] == sha else "duplicate"
+        else:
+            obj = self.object_path(sha, ext)
+            os.makedirs(os.path.dirname(obj), exist_ok=True)
+            os.replace(tmp_path, obj)
+            self._set_object(sha, {"ext": ext, "size": os.path.getsize(obj)})
+            status = "new"
+
+        name = self._visible_name(file_url, filename, sha)
+        self._link(self.object_path(sha), os.path.join(self.root_dir, name))
+        self._set_file(name, sha)
+        entry = {
+            "sha256": sha,
+            "filename": name,
+            "stored_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        entry.update(extra or {})
+        self._set_url(file_url, entry)
+        return sha, status
+
+    def adopt(self, path, file_url):
+        """Intègre un fichier déjà présent dans le dossier (téléchargé avant le stockage par contenu)."""
+        filename = os.path.basename(path)
+        sha = sha256_file(path)
+        ext = os.path.splitext(filename)[1].lower()
+        if not self.has_object(sha):
+            obj = self.object_path(sha, ext)
+            os.makedirs(os.path.dirname(obj), exist_ok=True)
+            self._link(path, obj)
+            self._set_object(sha, {"ext": ext, "size": os.path.getsize(obj)})
+        self._set_file(filename, sha)
+        self._set_url(file_url, {
+            "sha256": sha,
+            "filename": filename,
+            "stored_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        return sha
+
+    def promote(self, source):
+        """
+        Publie dans ce stockage (production) les versions vérifiées d'un autre stockage (staging).
+        Seul le delta circule : objets absents liés (lien physique, sinon copie), noms visibles
+        remplacés atomiquement (os.replace). Le manifest de ce stockage indique la version en ligne.
+        La promotion se fait sous le verrou du manifest de production, relu au préalable.
+        Retourne (nombre de documents promus, nombre déjà à jour).
+        """
+        with file_lock(self.lock_path):
+            self._refresh()
+            promoted, unchanged = self._promote_locked(source)
+            self._write_locked()
+        return promoted, unchanged
+
+    def _promote_locked(self, source):
+        promoted = unchanged = 0
+        for file_url, entry in source.manifest["urls"].items():
+            sha = entry["sha256"]
+            if not source.has_object(sha):
+                continue
+            live = self.manifest["urls"].get(file_url)
+            if live and live["sha256"] == sha and os.path.exists(os.path.join(self.root_dir, live["filename"])):
+                unchanged += 1
+                continue
+
+            if not self.has_object(sha):
+                obj_meta = source.manifest["objects"][sha]
+                obj = self.object_path(sha, obj_meta.get("ext", ""))
+                os.makedirs(os.path.dirname(obj), exist_ok=True)
+                self._link(source.object_path(sha), obj)
+                self._set_object(sha, dict(obj_meta))
+
+            name = self._visible_name(file_url, entry["filename"], sha)
+            self._link(self.object_path(sha), os.path.join(self.root_dir, name))
+            self._set_file(name, sha)
+            published = dict(entry, filename=name)
+            published["promoted_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self._set_url(file_url, published)
+            promoted += 1
+        return promoted, unchanged
+
+    def discard(self, tmp_path):
+        """Supprime un .part abandonné (et son fichier compagnon .meta de reprise)."""
+        for path in (tmp_path, tmp_path + ".meta" if tmp_path else None):
+            if path and os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,179 @@
+import csv
+import math
+import os
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from utils.crawl_state import CrawlState, DATE_FORMAT
+from utils.frontier import canonicalize_url
+
+# A priori : une modification tous les PRIOR_DAYS jours tant que l'historique est vide
+PRIOR_CHANGES = 1.0
+PRIOR_DAYS = 30.0
+
+# Historique de changements conservé par section dans l'état
+MAX_CHANGE_HISTORY = 20
+
+# Nombre de changements les plus récents pris en compte dans l'estimation du taux
+RECENT_EVENTS = 10
+
+
+def _parse_http_date(value):
+    try:
+        return parsedate_to_datetime(value).astimezone(timezone.utc).replace(tzinfo=None)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _parse_local_date(value):
+    try:
+        return datetime.strptime(value, DATE_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+class ChangeScheduler:
+    """
+    Planifie les revisites de sections d'après leur fréquence de mise à jour observée.
+    Le taux de changement d'une section (par jour) est estimé à partir :
+    - des Last-Modified de ses documents (log des téléchargements : lignes encore en base, table compacte 'documents'
+      et historique archivé en Parquet, soit plusieurs versions d'un même document au fil des crawls ;
+      état du crawl : documents listés sur la page),
+    - des changements d'empreinte de la page elle-même (historique 'changes' dans l'état).
+    La probabilité qu'une section ait changé depuis sa dernière visite vaut 1 - exp(-taux * jours écoulés).
+    Les sections connues les plus probablement modifiées sont revisitées en priorité, dans la limite
+    d'un budget de requêtes par crawl ; les autres sont réutilisées depuis l'état sans requête.
+    """
+
+    def __init__(self, state, log=None, budget=50, due_probability=0.5, max_revisit_days=30, now=None,
+                 history_dir=None):
+        """
+        log : LogStore (utils/log_store.py) ou chemin d'un log CSV.
+        history_dir : historique du log archivé par utils/log_compaction.py (lignes purgées de la base).
+        """
+        self.state = state
+        self.budget = budget
+        self.due_probability = due_probability
+        self.max_revisit_days = max_revisit_days
+        self.now = now or datetime.now()
+        self._events = {}  # section -> ensemble de dates de changement
+        self._collect_state_events()
+        if isinstance(log, (str, os.PathLike)):
+            self._collect_csv_events(log)
+        elif log is not None:
+            self._collect_log_events(log)
+        if history_dir:
+            self._collect_history_events(history_dir)
+        self.planned = set()  # URL canoniques retenues pour ce crawl
+        self.plan()
+
+    # --- Apprentissage ---
+
+    def _add_event(self, section_url, when):
+        if when is not None:
+            self._events.setdefault(section_url, set()).add(when.date())
+
+    def _collect_state_events(self):
+        documents = self.state.data[CrawlState.DOCUMENTS]
+        for url, entry in self.state.data[CrawlState.SECTIONS].items():
+            for changed_at in entry.get("changes", []):
+                self._add_event(url, _parse_local_date(changed_at))
+            for doc_url in (entry.get("links") or {}).get("documents", []):
+                self._add_event(url, _parse_http_date(documents.get(doc_url, {}).get("last_modified")))
+
+    def _collect_log_events(self, log):
+        rows = log.query(
+            "SELECT DISTINCT section_url, last_modified FROM downloads "
+            "WHERE section_url != '' AND last_modified != ''"
+        )
+        # Table compacte : dernière version connue de chaque document, même si ses lignes ont été purgées
+        if log.query("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'documents'"):
+            rows += log.query(
+                "SELECT DISTINCT section_url, last_modified FROM documents "
+                "WHERE section_url != '' AND last_modified != ''"
+            )
+        for row in rows:
+            self._add_event(row["section_url"], _parse_http_date(row["last_modified"]))
+
+    def _collect_history_events(self, history_dir):
+        """Last-Modified de l'historique archivé (Parquet, lu avec DuckDB) ; ignoré sans historique ni DuckDB."""
+        from utils.log_compaction import has_history, read_history
+
+        if not has_history(history_dir):
+            return
+        try:
+            history = read_history(
+                history_dir,
+                "SELECT DISTINCT section_url, last_modified FROM history "
+                "WHERE section_url != '' AND last_modified != ''",
+            )
+        except Exception:
+            return
+        for section_url, last_modified in history.itertuples(index=False):
+            self._add_event(section_url, _parse_http_date(last_modified))
+
+    def _collect_csv_events(self, log_file):
+        if not os.path.exists(log_file):
+            return
+        try:
+            with open(log_file, "r", newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    if row.get("section_url") and row.get("last_modified"):
+                        self._add_event(row["section_url"], _parse_http_date(row["last_modified"]))
+        except (OSError, csv.Error):
+            pass
+
+    def change_rate(self, section_url):
+        """
+        Taux de changement estimé (par jour) sur les RECENT_EVENTS changements les plus récents,
+        lissé par l'a priori : une vieille date isolée ne masque pas une rafale récente de changements.
+        """
+        recent = sorted(self._events.get(section_url, set()), reverse=True)[:RECENT_EVENTS]
+        span = max(1.0, (self.now.date() - recent[-1]).days) if recent else 0.0
+        return (len(recent) + PRIOR_CHANGES) / (span + PRIOR_DAYS)
+
+    def change_probability(self, section_url):
+        """Probabilité que la section ait changé depuis sa dernière visite."""
+        checked = _parse_local_date(self.state.get(CrawlState.SECTIONS, section_url).get("checked_at"))
+        if checked is None:
+            return 1.0
+        days = max(0.0, (self.now - checked).total_seconds() / 86400)
+        if days >= self.max_revisit_days:
+            return 1.0
+        return 1.0 - math.exp(-self.change_rate(section_url) * days)
+
+    # --- Planification ---
+
+    def plan(self):
+        """Retient, dans la limite du budget, les sections connues dont un changement est probable."""
+        scored = []
+        for url, entry in self.state.data[CrawlState.SECTIONS].items():
+            if "links" not in entry:
+                continue
+            p = self.change_probability(url)
+            if p >= self.due_probability:
+                scored.append((p, url))
+        scored.sort(reverse=True)
+        self.planned = {canonicalize_url(url) for _, url in scored[:self.budget]}
+        return [url for _, url in scored[:self.budget]]
+
+    def is_planned(self, section_url):
+        return canonicalize_url(section_url) in self.planned
+
+    def should_visit(self, section_url):
+        """
+        Décide si une section déjà connue, sous une page inchangée, est revisitée (planifiée pour ce crawl).
+        Les sous-sections d'une page modifiée ne passent pas par le planificateur : elles sont toujours visitées.
+        """
+        return self.is_planned(section_url)
+
+    def priority(self, section_url):
+        """Priorité de frontière (plus petit = plus urgent) : les plus probablement modifiées d'abord."""
+        return -self.change_probability(section_url)
+
+    @staticmethod
+    def record_change(entry, when=None):
+        """Ajoute une date de changement d'empreinte à l'historique d'une section (liste bornée)."""
+        changes = list(entry.get("changes", []))
+        changes.append((when or datetime.now()).strftime(DATE_FORMAT))
+        return changes[-MAX_CHANGE_HISTORY:]
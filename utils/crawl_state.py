@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class CrawlState:
+    """
+    Mémoire persistante du crawl (Config.STATE_FILE).
+    Conserve, par URL de document et par page de section, les validateurs HTTP
+    (ETag, Last-Modified, Content-Length) pour les requêtes conditionnelles,
+    ainsi que l'empreinte de l'ensemble des liens de chaque section (élagage au recrawl).
+    """
+
+    DOCUMENTS = "documents"
+    SECTIONS = "sections"
+    META = "meta"
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {self.DOCUMENTS: {}, self.SECTIONS: {}, self.META: {}}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+            for kind in (self.DOCUMENTS, self.SECTIONS, self.META):
+                self.data[kind] = loaded.get(kind, {})
+            # Conserve les autres clés éventuelles (extensions futures)
+            for key, value in loaded.items():
+                self.data.setdefault(key, value)
+        except (OSError, ValueError):
+            # Etat illisible : on repart d'un crawl complet
+            pass
+
+    def get(self, kind, url):
+        return self.data[kind].get(url, {})
+
+    def conditional_headers(self, kind, url):
+        """En-têtes If-None-Match / If-Modified-Since pour une URL déjà vue."""
+        entry = self.get(kind, url)
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def is_unchanged(self, kind, url, etag, last_modified, content_length):
+        """Compare des en-têtes 200 avec l'état (serveurs qui ignorent les requêtes conditionnelles)."""
+        entry = self.get(kind, url)
+        if not entry:
+            return False
+        if etag and entry.get("etag"):
+            return etag == entry["etag"]
+        if not last_modified or last_modified != entry.get("last_modified"):
+            return False
+        return not content_length or str(content_length) == str(entry.get("content_length") or "")
+
+    def record(self, kind, url, etag=None, last_modified=None, content_length=None, **extra):
+        entry = self.data[kind].setdefault(url, {})
+        if etag:
+            entry["etag"] = etag
+        if last_modified:
+            entry["last_modified"] = last_modified
+        if content_length:
+            entry["content_length"] = str(content_length)
+        entry.update(extra)
+        entry["checked_at"] = datetime.now().strftime(DATE_FORMAT)
+        return entry
+
+    @staticmethod
+    def fingerprint(links):
+        """Empreinte de l'ensemble des liens d'une section (indépendante de leur ordre dans la page)."""
+        canonical = json.dumps(
+            [sorted(set(links.get("sections", []))), sorted(set(links.get("documents", [])))],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def full_refresh_due(self, max_age_days):
+        """Vrai si le dernier crawl complet (sans élagage) date de plus de max_age_days jours."""
+        last = self.data[self.META].get("last_full_crawl")
+        if not last:
+            return True
+        try:
+            return datetime.now() - datetime.strptime(last, DATE_FORMAT) >= timedelta(days=max_age_days)
+        except ValueError:
+            return True
+
+    def mark_full_crawl(self):
+        self.data[self.META]["last_full_crawl"] = datetime.now().strftime(DATE_FORMAT)
+
+    def forget(self, kind, url):
+        self.data[kind].pop(url, None)
+
+    def save(self):
+        """Ecriture atomique (fichier temporaire puis os.replace)."""
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
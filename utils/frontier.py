@@ -0,0 +1,135 @@
+import heapq
+import itertools
+import json
+import os
+from collections import deque
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+# Noms de pages d'index équivalents au répertoire qui les contient
+INDEX_PAGES = ("index.html", "index.htm")
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Forme canonique d'une URL pour la déduplication :
+    - schéma http -> https, hôte en minuscules, port par défaut retiré
+    - fragment (#...) supprimé, paramètres de requête triés
+    - '/index.html' et slash final normalisés vers '/'
+    """
+    parsed = urlparse(url.strip())
+    scheme = "https" if parsed.scheme in ("http", "https", "") else parsed.scheme
+    netloc = parsed.netloc.lower()
+    if netloc.endswith(":80") or netloc.endswith(":443"):
+        netloc = netloc.rsplit(":", 1)[0]
+
+    path = parsed.path or "/"
+    last = path.rsplit("/", 1)[-1].lower()
+    if last in INDEX_PAGES:
+        path = path[: -len(last)]
+    if not path.endswith("/") and "." not in path.rsplit("/", 1)[-1]:
+        path += "/"
+
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, netloc, path, "", query, ""))
+
+
+class UrlFrontier:
+    """
+    Frontière de crawl : file FIFO (deque) + index des URL canoniques déjà vues (set),
+    soit des tests d'appartenance en O(1) au lieu des parcours de liste.
+    Une priorité optionnelle (plus petit = plus urgent) fait passer certaines URL devant.
+    L'état peut être sauvegardé sur disque pour reprendre un crawl interrompu.
+    """
+
+    def __init__(self, snapshot_path=None):
+        self.snapshot_path = str(snapshot_path) if snapshot_path else None
+        self._queue = deque()          # URL de priorité par défaut, ordre d'arrivée
+        self._heap = []                # (priorité, compteur, url) pour les URL prioritaires
+        self._counter = itertools.count()
+        self._seen = set()             # URL canoniques déjà ajoutées (en file ou visitées)
+        self._visited = set()          # URL canoniques déjà retirées de la file
+
+    def __len__(self):
+        return len(self._queue) + len(self._heap)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __contains__(self, url):
+        return canonicalize_url(url) in self._seen
+
+    def add(self, url, priority=None):
+        """Ajoute une URL si elle n'a jamais été vue. Retourne True si elle a été ajoutée."""
+        key = canonicalize_url(url)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        if priority is None:
+            self._queue.append(url)
+        else:
+            heapq.heappush(self._heap, (priority, next(self._counter), url))
+        return True
+
+    def extend(self, urls, priority=None):
+        return sum(1 for u in urls if self.add(u, priority))
+
+    def pop(self):
+        """Retire la prochaine URL (les prioritaires d'abord) et la marque comme visitée."""
+        if self._heap:
+            url = heapq.heappop(self._heap)[2]
+        else:
+            url = self._queue.popleft()
+        self._visited.add(canonicalize_url(url))
+        return url
+
+    def mark_visited(self, url):
+        key = canonicalize_url(url)
+        self._seen.add(key)
+        self._visited.add(key)
+
+    def is_visited(self, url):
+        return canonicalize_url(url) in self._visited
+
+    # --- Persistance ---
+
+    def save(self, pending=()):
+        """
+        Ecrit l'état de la frontière (atomique). Sans chemin configuré, ne fait rien.
+        `pending` : URL déjà retirées de la file mais pas encore traitées (remises en file à la reprise).
+        """
+        if not self.snapshot_path:
+            return
+        folder = os.path.dirname(self.snapshot_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        data = {
+            "queue": list(pending) + list(self._queue),
+            "heap": [[p, u] for p, _, u in sorted(self._heap)],
+            "seen": sorted(self._seen),
+            "visited": sorted(self._visited),
+        }
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def load(self):
+        """Recharge une frontière sauvegardée. Retourne True si un crawl interrompu est repris."""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self._queue = deque(data.get("queue", []))
+        self._heap = [(p, next(self._counter), u) for p, u in data.get("heap", [])]
+        heapq.heapify(self._heap)
+        self._seen = set(data.get("seen", []))
+        self._visited = set(data.get("visited", []))
+        return bool(self)
+
+    def clear_snapshot(self):
+        """Supprime la sauvegarde une fois le crawl terminé."""
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            os.remove(self.snapshot_path)
@@ -0,0 +1,135 @@
+import time
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+
+from utils.http_download import BLOCKED_STATUSES, DEFAULT_HEADERS
+
+try:
+    import lxml  # noqa: F401  (parseur C, nettement plus rapide que html.parser)
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Seuls les liens nous intéressent : le parseur ignore tout le reste du document
+ONLY_LINKS = SoupStrainer("a", href=True)
+
+
+class NeedsBrowser(Exception):
+    """La page ne peut pas être lue en HTML statique (JavaScript, blocage) : passer par Playwright."""
+
+
+def extract_hrefs(html, base_url):
+    """Liens absolus (a[href]) d'une page HTML, dans l'ordre du document."""
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=ONLY_LINKS)
+    return [urljoin(base_url, a["href"]) for a in soup.find_all("a", href=True) if a["href"]]
+
+
+def needs_javascript(html, hrefs):
+    """Heuristique : une page sans aucun lien mais avec des scripts est rendue côté client."""
+    if hrefs:
+        return False
+    lower = html.lower()
+    return "<script" in lower or "<noscript" in lower
+
+
+class HtmlDiscovery:
+    """
+    Découverte des liens des pages de section par simple requête HTTP + BeautifulSoup,
+    sans lancer Chromium (quelques Mo au lieu de centaines par worker).
+    Réutilise la session keep-alive (et le limiteur de débit) du HttpDownloader si fourni.
+    Une erreur passagère (connexion, délai, 5xx) est retentée `retries` fois, au rythme du limiteur,
+    puis la page est confiée au navigateur (NeedsBrowser) comme avant la découverte en HTTP.
+    """
+
+    def __init__(self, downloader=None, timeout=15, retries=2):
+        self.timeout = timeout
+        self.retries = retries
+        if downloader is not None:
+            self.session = downloader.session
+            self.rate_limiter = downloader.rate_limiter
+        else:
+            self.session = requests.Session()
+            self.session.headers.update(DEFAULT_HEADERS)
+            self.rate_limiter = None
+
+    def fetch(self, url, headers=None):
+        """
+        GET (éventuellement conditionnel) d'une page de section.
+        Retourne un dict {status, hrefs, etag, last_modified, content_length} ;
+        hrefs vaut None sur un 304. Lève NeedsBrowser si la page exige un vrai navigateur
+        ou reste inaccessible après les nouvelles tentatives.
+        """
+        for _ in range(self.retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire(url)
+            started = time.monotonic()
+            try:
+                resp = self.session.get(url, headers=headers or {}, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+                continue
+            if self.rate_limiter:
+                # Un 503 / Retry-After ralentit l'hôte avant la tentative suivante
+                self.rate_limiter.record(url, time.monotonic() - started, resp.status_code,
+                                         resp.headers.get("retry-after"))
+            if resp.status_code < 500:
+                break
+            error = f"HTTP {resp.status_code}"
+        else:
+            raise NeedsBrowser(f"{error} après {self.retries + 1} tentative(s)")
+
+        result = {
+            "status": resp.status_code,
+            "hrefs": None,
+            "etag": resp.headers.get("etag"),
+            "last_modified": resp.headers.get("last-modified"),
+            "content_length": resp.headers.get("content-length"),
+        }
+        if resp.status_code == 304:
+            return result
+        if resp.status_code in BLOCKED_STATUSES:
+            raise NeedsBrowser(f"HTTP {resp.status_code}")
+        resp.raise_for_status()
+        if "html" not in resp.headers.get("content-type", "text/html").lower():
+            raise NeedsBrowser("réponse non HTML")
+
+        html = resp.text
+        hrefs = extract_hrefs(html, resp.url or url)
+        if needs_javascript(html, hrefs):
+            raise NeedsBrowser("page rendue en JavaScript")
+        result["hrefs"] = hrefs
+        return result
+
+
+class LazyBrowserPage:
+    """
+    Onglet Playwright créé seulement au premier besoin (page JavaScript, téléchargement bloqué).
+    Tant que tout passe en HTTP direct, Chromium n'est jamais lancé.
+    """
+
+    def __init__(self, playwright, headless=True):
+        self.playwright = playwright
+        self.headless = headless
+        self.browser = None
+        self.context = None
+        self._page = None
+
+    @property
+    def started(self):
+        return self._page is not None
+
+    def get(self):
+        if self._page is None:
+            self.browser = self.playwright.chromium.launch(headless=self.headless)
+            self.context = self.browser.new_context(accept_downloads=True)
+            self._page = self.context.new_page()
+        return self._page
+
+    def cookies(self):
+        return self.context.cookies() if self.context else []
+
+    def close(self):
+        if self.browser:
+            self.browser.close()
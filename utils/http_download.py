@@ -0,0 +1,266 @@
+import base64
+import hashlib
+import json
+import os
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ChunkedEncodingError
+
+# Statuts indiquant que le site refuse un client HTTP "nu" (protection anti-robot)
+BLOCKED_STATUSES = (401, 403, 406, 407)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+}
+
+
+# Fichier compagnon d'un .part : validateur (ETag/Last-Modified) de la version en cours
+PART_META_SUFFIX = ".meta"
+
+
+class DirectDownloadBlocked(Exception):
+    """Le téléchargement HTTP direct est refusé : il faut repasser par le navigateur."""
+
+
+class IncompleteDownload(Exception):
+    """Fichier incomplet ou corrompu après transfert : le .part est conservé pour une reprise."""
+
+
+def verify_length(path, expected):
+    """Contrôle la taille d'un fichier reçu par une autre voie (navigateur) contre Content-Length."""
+    size = os.path.getsize(path)
+    if expected and str(expected).isdigit() and size != int(expected):
+        raise IncompleteDownload(f"taille {size} o au lieu de {expected} o")
+    return size
+
+
+class HttpDownloader:
+    """
+    Téléchargement direct des fichiers par un client HTTP à connexions persistantes (keep-alive).
+    Le corps est écrit par blocs sur le disque (mémoire constante, même pour un PDF de 55 Mo)
+    et les métadonnées (MIME, Last-Modified, taille) sont lues sur la réponse GET elle-même.
+    """
+
+    def __init__(self, pool_size=8, timeout=30, chunk_size=256 * 1024, headers=None, rate_limiter=None,
+                 max_resumes=3):
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.max_resumes = max_resumes  # reprises Range tentées quand la connexion tombe
+        self.rate_limiter = rate_limiter  # AdaptiveRateLimiter optionnel (partagé avec le crawl)
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def use_browser_cookies(self, cookies):
+        """Reprend les cookies d'un contexte Playwright (liste retournée par context.cookies())."""
+        for c in cookies or []:
+            self.session.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+
+    @staticmethod
+    def metadata(resp):
+        """Extrait status, MIME, Last-Modified, Content-Length et ETag d'une réponse."""
+        clen = resp.headers.get("content-length")
+        if resp.status_code == 206:
+            # Réponse partielle : la taille complète est dans Content-Range (bytes a-b/total)
+            total = resp.headers.get("content-range", "").rsplit("/", 1)[-1]
+            clen = total if total.isdigit() else None
+        return {
+            "status": resp.status_code,
+            "mime": resp.headers.get("content-type"),
+            "last_modified": resp.headers.get("last-modified"),
+            "content_length": clen,
+            "etag": resp.headers.get("etag"),
+        }
+
+    # --- Reprise des téléchargements partiels (.part) ---
+
+    @staticmethod
+    def _read_validator(part_path):
+        try:
+            with open(part_path + PART_META_SUFFIX, "r", encoding="utf-8") as f:
+                return json.load(f).get("validator")
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_validator(part_path, validator):
+        with open(part_path + PART_META_SUFFIX, "w", encoding="utf-8") as f:
+            json.dump({"validator": validator}, f)
+
+    @staticmethod
+    def discard_part(part_path):
+        for path in (part_path, part_path + PART_META_SUFFIX):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def range_headers(self, part_path):
+        """Range / If-Range pour reprendre un .part existant (vide si rien à reprendre)."""
+        if not part_path or not os.path.exists(part_path):
+            return {}
+        size = os.path.getsize(part_path)
+        validator = self._read_validator(part_path)
+        if size == 0 or not validator:
+            return {}
+        # If-Range : le serveur renvoie 206 si la version n'a pas changé, sinon le fichier complet (200)
+        return {"Range": f"bytes={size}-", "If-Range": validator}
+
+    def open(self, url, headers=None, part_path=None):
+        """
+        Lance un GET en streaming (le corps n'est pas encore lu).
+        Avec part_path, reprend un téléchargement partiel existant (requête Range).
+        Retourne (response, meta). Lève DirectDownloadBlocked si le site refuse l'accès direct.
+        """
+        headers = dict(headers or {})
+        headers.update(self.range_headers(part_path))
+        if self.rate_limiter:
+            self.rate_limiter.acquire(url)
+        started = time.monotonic()
+        try:
+            resp = self.session.get(url, headers=headers, stream=True, timeout=self.timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise DirectDownloadBlocked(str(e))
+
+        meta = self.metadata(resp)
+        if self.rate_limiter:
+            # Latence au premier octet : le corps n'est pas encore lu
+            self.rate_limiter.record(url, time.monotonic() - started, resp.status_code,
+                                     resp.headers.get("retry-after"))
+        if resp.status_code == 416 and "Range" in headers:
+            # Partie locale incohérente avec le fichier distant : on repart de zéro
+            resp.close()
+            self.discard_part(part_path)
+            return self.open(url, {k: v for k, v in headers.items() if k not in ("Range", "If-Range")}, part_path)
+        if resp.status_code in BLOCKED_STATUSES:
+            resp.close()
+            raise DirectDownloadBlocked(f"HTTP {resp.status_code}")
+        if resp.status_code == 304:
+            resp.close()
+            return resp, meta
+        if (meta["mime"] or "").startswith("text/html") and not url.lower().split("?")[0].endswith((".html", ".htm")):
+            # Page HTML à la place du fichier attendu : défi anti-robot ou redirection de connexion
+            resp.close()
+            raise DirectDownloadBlocked("HTML reçu à la place du document")
+        if "Range" in headers and resp.status_code >= 500:
+            # Erreur passagère du serveur pendant une reprise : le .part est gardé pour le crawl suivant
+            resp.close()
+            raise IncompleteDownload(f"reprise impossible (HTTP {resp.status_code})")
+        resp.raise_for_status()
+        return resp, meta
+
+    def save(self, resp, dest_path, url=None):
+        """
+        Ecrit le corps d'une réponse ouverte par open() dans dest_path (un fichier .part).
+        Une réponse 206 complète la partie déjà présente. Si la connexion tombe en cours de route
+        et que l'URL est fournie, le transfert reprend par requêtes Range (max_resumes fois).
+        Vérifie enfin la taille (et l'empreinte si le serveur en fournit une) : IncompleteDownload sinon.
+        Retourne la taille finale du fichier.
+        """
+        meta = self.metadata(resp)
+        expected = meta["content_length"]
+        validator = meta["etag"] or meta["last_modified"]
+        if url and validator:
+            self._write_validator(dest_path, validator)
+
+        attempts = 0
+        while True:
+            try:
+                self._write_body(resp, dest_path)
+                break
+            except (requests.ConnectionError, requests.Timeout, ChunkedEncodingError) as e:
+                attempts += 1
+                if not url or attempts > self.max_resumes:
+                    raise IncompleteDownload(f"transfert interrompu ({e})")
+                resp = self._reopen(url, dest_path, validator)
+                if resp.status_code == 200:
+                    # Le fichier a changé entre-temps : le .part repart de zéro pour la nouvelle version,
+                    # dont le validateur remplace l'ancien (une reprise ultérieure ne mélange pas deux versions)
+                    meta = self.metadata(resp)
+                    expected = meta["content_length"]
+                    validator = meta["etag"] or meta["last_modified"]
+                    with open(dest_path, "wb"):
+                        pass
+                    if validator:
+                        self._write_validator(dest_path, validator)
+                    elif os.path.exists(dest_path + PART_META_SUFFIX):
+                        os.remove(dest_path + PART_META_SUFFIX)
+
+        size = os.path.getsize(dest_path)
+        if expected and str(expected).isdigit() and size != int(expected):
+            raise IncompleteDownload(f"taille {size} o au lieu de {expected} o")
+        self._check_digest(resp, dest_path)
+        if os.path.exists(dest_path + PART_META_SUFFIX):
+            os.remove(dest_path + PART_META_SUFFIX)
+        return size
+
+    def _write_body(self, resp, dest_path):
+        if resp.status_code == 206:
+            start = int(resp.headers.get("content-range", "bytes 0-").split()[1].split("-")[0])
+            mode = "r+b" if os.path.exists(dest_path) else "wb"
+        else:
+            start, mode = 0, "wb"
+        with resp, open(dest_path, mode) as f:
+            f.seek(start)
+            f.truncate()
+            for chunk in resp.iter_content(self.chunk_size):
+                if chunk:
+                    f.write(chunk)
+
+    def _reopen(self, url, dest_path, validator):
+        """
+        Relance le GET à partir des octets déjà reçus.
+        Lève IncompleteDownload sur une erreur réseau ou HTTP : le .part est conservé pour une reprise.
+        """
+        headers = {"Range": f"bytes={os.path.getsize(dest_path)}-"}
+        if validator:
+            headers["If-Range"] = validator
+        if self.rate_limiter:
+            self.rate_limiter.acquire(url)
+        started = time.monotonic()
+        try:
+            resp = self.session.get(url, headers=headers, stream=True, timeout=self.timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise IncompleteDownload(f"reprise impossible ({e})")
+        if self.rate_limiter:
+            self.rate_limiter.record(url, time.monotonic() - started, resp.status_code,
+                                     resp.headers.get("retry-after"))
+        if resp.status_code not in (200, 206):
+            resp.close()
+            raise IncompleteDownload(f"reprise impossible (HTTP {resp.status_code})")
+        return resp
+
+    @staticmethod
+    def _check_digest(resp, path):
+        """Contrôle Content-MD5 / Digest: sha-256 quand le serveur les fournit (réponse complète)."""
+        if resp.status_code != 200:
+            return
+        expected_md5 = resp.headers.get("content-md5")
+        digest = resp.headers.get("digest", "")
+        expected_sha = None
+        for part in digest.split(","):
+            algo, _, value = part.strip().partition("=")
+            if algo.lower() == "sha-256":
+                expected_sha = value
+        if not expected_md5 and not expected_sha:
+            return
+        md5, sha = hashlib.md5(), hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                md5.update(chunk)
+                sha.update(chunk)
+        if expected_md5 and base64.b64encode(md5.digest()).decode() != expected_md5:
+            raise IncompleteDownload("Content-MD5 différent")
+        if expected_sha and base64.b64encode(sha.digest()).decode() != expected_sha:
+            raise IncompleteDownload("Digest SHA-256 différent")
+
+    def download(self, url, dest_path, headers=None):
+        """open() + save() avec reprise. Retourne meta avec la clé 'size' (None si 304)."""
+        resp, meta = self.open(url, headers, part_path=dest_path)
+        meta["size"] = None if meta["status"] == 304 else self.save(resp, dest_path, url)
+        return meta
+
+    def close(self):
+        self.session.close()
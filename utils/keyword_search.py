@@ -0,0 +1,116 @@
+import re
+
+
+class KeywordScanner:
+    """
+    Recherche de mots-clés page par page (insensible à la casse), consommateur d'extract_documents
+    (utils/text_extraction.py) : les pages sont lues en flux, sans assembler le texte du document.
+    Pour chaque mot-clé : nombre d'occurrences, page et contexte de la première occurrence.
+    Seule la fin de la page précédente est conservée (tampon borné) pour les occurrences et les
+    contextes à cheval sur deux pages.
+    """
+
+    def __init__(self, keywords, context=100):
+        self.keywords = list(keywords)
+        self.context = context
+
+    def _patterns(self):
+        return [(kw, re.compile(re.escape(kw), re.IGNORECASE)) for kw in self.keywords]
+
+    def _keep(self):
+        return self.context + max((len(kw) for kw in self.keywords), default=0)
+
+    def scan(self, pages):
+        """
+        pages : itérateur de (numéro de page, texte).
+        Retourne {"chars", "hits": {mot-clé: [n, page, contexte]}, "head", "tail"} : "head" (premières pages, tant
+        que le tampon n'est pas plein) et "tail" (tampon final) servent à merge() pour raccorder les tranches.
+        """
+        hits, head = {}, []
+        chars, tail = self._run(pages, hits, "", head)
+        return {"chars": chars, "hits": hits, "head": head, "tail": tail}
+
+    def _run(self, pages, hits, tail, head=None):
+        """Recherche sur les pages à la suite du tampon `tail` ; complète `hits`. Retourne (caractères, tampon)."""
+        patterns = self._patterns()
+        keep = self._keep()
+        chars = 0
+        for number, text in pages:
+            if head is not None and chars < keep:
+                head.append((number, text))
+            chars += len(text)
+            window = tail + text
+            for kw, pattern in patterns:
+                for match in pattern.finditer(window):
+                    if match.end() <= len(tail):
+                        continue  # déjà comptée avec la page précédente
+                    entry = hits.setdefault(kw, [0, None, None])
+                    entry[0] += 1
+                    if entry[1] is None:
+                        entry[1] = number if match.start() >= len(tail) else number - 1
+                        entry[2] = window[max(0, match.start() - self.context):match.end() + self.context]
+            tail = window[-keep:] if keep else ""
+        return chars, tail
+
+    def merge(self, parts):
+        """
+        Réunit les résultats de tranches de pages consécutives (dans l'ordre des pages), comme si les pages
+        avaient été lues d'un seul tenant : les premières pages de chaque tranche sont relues à la suite du
+        tampon de la précédente (occurrences à cheval sur deux tranches, contexte de la première occurrence).
+        """
+        merged = {"chars": 0, "hits": {}}
+        tail = ""
+        for part in parts:
+            hits = {kw: list(entry) for kw, entry in part["hits"].items()}
+            if tail:
+                alone, joined = {}, {}
+                self._run(part["head"], alone, "")
+                _, joined_tail = self._run(part["head"], joined, tail)
+                # Début de tranche : la relecture raccordée remplace celle de la tranche seule
+                for kw, (count, page, context) in joined.items():
+                    entry = hits.setdefault(kw, [0, None, None])
+                    entry[0] += count - alone.get(kw, [0])[0]
+                    entry[1], entry[2] = page, context
+                tail = joined_tail if part["chars"] < self._keep() else part["tail"]
+            else:
+                tail = part["tail"]
+            merged["chars"] += part["chars"]
+            for kw, (count, page, context) in hits.items():
+                entry = merged["hits"].setdefault(kw, [0, page, context])
+                entry[0] += count
+        return merged
+
+
+def hit_rows(filename, content_hash, scan, keywords, first_only=False):
+    """
+    Lignes de résultat de l'Agent 2 pour un document, à partir de KeywordScanner (scan / merge) :
+    une ligne par mot-clé trouvé (nombre d'occurrences, page et contexte de la première occurrence), dans
+    l'ordre de `keywords`, ou la première seulement avec first_only ; 'Aucun mot-clé' si rien n'est trouvé.
+    Aucune ligne pour un document sans texte.
+    """
+    if not scan or not scan["chars"]:
+        return []
+    rows = []
+    for kw in keywords:
+        if kw in scan["hits"]:
+            count, page, context = scan["hits"][kw]
+            rows.append({
+                "Fichier": filename,
+                "Mot-clé Cible": kw,
+                "Extrait du Contexte": "..." + context.replace('\n', ' ') + "...",
+                "Page": page,
+                "Statut": "Trouvé",
+                "Empreinte": content_hash,
+                "Occurrences": count
+            })
+            if first_only:
+                break
+    return rows or [{
+        "Fichier": filename,
+        "Mot-clé Cible": "-",
+        "Extrait du Contexte": "-",
+        "Page": None,
+        "Statut": "Aucun mot-clé",
+        "Empreinte": content_hash,
+        "Occurrences": 0
+    }]
@@ -0,0 +1,248 @@
+import glob
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+from utils.log_store import LOG_COLUMNS
+
+# Statuts d'une version du document effectivement disponible en local
+SUCCESS_STATUSES = ("ok", "unchanged", "duplicate")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    file_url TEXT PRIMARY KEY,
+    filename TEXT,
+    section_url TEXT,
+    mime_type TEXT,
+    size_bytes INTEGER,
+    last_modified TEXT,
+    status TEXT,
+    first_seen TEXT,
+    last_seen TEXT,
+    last_ok_at TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    updated_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_documents_status ON documents(status);
+CREATE INDEX IF NOT EXISTS idx_documents_filename ON documents(filename);
+"""
+
+# Colonne ajoutée après coup aux bases existantes (id de la dernière ligne de log repliée)
+_MIGRATIONS = {"updated_id": "ALTER TABLE documents ADD COLUMN updated_id INTEGER"}
+
+# Une ligne du log brut replie l'état courant du document : le dernier statut l'emporte,
+# les métadonnées (nom, taille, MIME, Last-Modified) ne changent que sur une version obtenue.
+_UPSERT = """
+INSERT INTO documents (file_url, filename, section_url, mime_type, size_bytes, last_modified, status,
+                       first_seen, last_seen, last_ok_at, attempts, failures, updated_id)
+VALUES (:file_url, :filename, :section_url, :mime_type, :size_bytes, :last_modified, :status,
+        :downloaded_at, :downloaded_at, :ok_at, 1, :failed, :id)
+ON CONFLICT(file_url) DO UPDATE SET
+    status = excluded.status,
+    updated_id = excluded.updated_id,
+    section_url = excluded.section_url,
+    last_seen = excluded.last_seen,
+    attempts = attempts + 1,
+    failures = failures + excluded.failures,
+    filename = CASE WHEN excluded.last_ok_at IS NOT NULL THEN excluded.filename ELSE filename END,
+    mime_type = CASE WHEN excluded.last_ok_at IS NOT NULL THEN excluded.mime_type ELSE mime_type END,
+    size_bytes = CASE WHEN excluded.last_ok_at IS NOT NULL AND excluded.size_bytes IS NOT NULL
+                      THEN excluded.size_bytes ELSE size_bytes END,
+    last_modified = CASE WHEN excluded.last_ok_at IS NOT NULL THEN excluded.last_modified ELSE last_modified END,
+    last_ok_at = COALESCE(excluded.last_ok_at, last_ok_at)
+"""
+
+COMPACTED_KEY = "compacted_up_to"
+ARCHIVED_KEY = "archived_up_to"
+
+
+def is_failure(status):
+    status = status or ""
+    return status.startswith("fail") or status.startswith("error")
+
+
+class LogCompactor:
+    """
+    Compaction du log des téléchargements (utils/log_store.LogStore) :
+    - table 'documents' : une ligne par URL de document (dernier statut, dernière version obtenue,
+      nombre de tentatives et d'échecs), mise à jour de façon incrémentale depuis le dernier id replié
+      (updated_id : id de la dernière ligne repliée, pour les lecteurs incrémentaux) ;
+    - historique brut archivé en Parquet partitionné par mois (history_dir/month=AAAA-MM/part-<id>.parquet),
+      interrogeable avec DuckDB (read_history) ;
+    - purge de la base des lignes archivées plus anciennes que retain_days.
+    Sans pyarrow, la table 'documents' est tout de même tenue à jour et rien n'est purgé.
+    """
+
+    def __init__(self, log_store, history_dir=None, retain_days=90):
+        self.log = log_store
+        self.history_dir = str(history_dir) if history_dir else None
+        self.retain_days = retain_days
+
+    def _meta(self, key):
+        row = self.log.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return int(row[0]) if row else 0
+
+    def _set_meta(self, key, value):
+        self.log.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _rows_after(self, last_id):
+        cur = self.log.conn.execute(
+            f"SELECT id, {', '.join(LOG_COLUMNS)} FROM downloads WHERE id > ? ORDER BY id", (last_id,)
+        )
+        names = [d[0] for d in cur.description]
+        return [dict(zip(names, row)) for row in cur.fetchall()]
+
+    @staticmethod
+    def _ensure_schema(conn):
+        conn.executescript(_SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(documents)")}
+        for column, ddl in _MIGRATIONS.items():
+            if column not in columns:
+                conn.execute(ddl)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_updated_id ON documents(updated_id)")
+
+    def compact(self):
+        """Replie les nouvelles lignes, archive l'historique puis purge. Retourne un résumé (dict)."""
+        summary = {"folded": 0, "archived": 0, "purged": 0, "documents": 0}
+        with self.log._lock:
+            self.log._flush_locked()
+            conn = self.log.conn
+            self._ensure_schema(conn)
+
+            rows = self._rows_after(self._meta(COMPACTED_KEY))
+            if rows:
+                with conn:
+                    conn.executemany(_UPSERT, [
+                        dict(r, ok_at=r["downloaded_at"] if r["status"] in SUCCESS_STATUSES else None,
+                             failed=int(is_failure(r["status"])))
+                        for r in rows
+                    ])
+                    self._set_meta(COMPACTED_KEY, rows[-1]["id"])
+                summary["folded"] = len(rows)
+
+            if self.history_dir:
+                summary["archived"] = self._archive()
+                summary["purged"] = self._purge()
+            summary["documents"] = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        return summary
+
+    def _archive(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            return 0
+        rows = self._rows_after(self._meta(ARCHIVED_KEY))
+        if not rows:
+            return 0
+        by_month = {}
+        for r in rows:
+            by_month.setdefault(r["downloaded_at"][:7], []).append(r)
+        for month, part in by_month.items():
+            folder = os.path.join(self.history_dir, f"month={month}")
+            os.makedirs(folder, exist_ok=True)
+            # Nom fixé par le premier id : une archive interrompue est réécrite à l'identique
+            path = os.path.join(folder, f"part-{part[0]['id']:012d}.parquet")
+            table = pa.Table.from_pylist(part, schema=_history_schema(pa))
+            pq.write_table(table, f"{path}.tmp", compression="zstd")
+            os.replace(f"{path}.tmp", path)
+        with self.log.conn:
+            self._set_meta(ARCHIVED_KEY, rows[-1]["id"])
+        return len(rows)
+
+    def _purge(self):
+        if self.retain_days is None:
+            return 0
+        cutoff = (datetime.now() - timedelta(days=self.retain_days)).strftime("%Y-%m-%d %H:%M:%S")
+        limit = min(self._meta(ARCHIVED_KEY), self._meta(COMPACTED_KEY))
+        with self.log.conn:
+            cur = self.log.conn.execute(
+                "DELETE FROM downloads WHERE id <= ? AND downloaded_at < ?", (limit, cutoff)
+            )
+        return cur.rowcount
+
+
+def _history_schema(pa):
+    fields = [pa.field("id", pa.int64())]
+    for name in LOG_COLUMNS:
+        fields.append(pa.field(name, pa.int64() if name == "size_bytes" else pa.string()))
+    return pa.schema(fields)
+
+
+def load_documents(db_path):
+    """
+    Table compacte 'documents' (une ligne par document) en DataFrame, en lecture seule.
+    Retourne None si la base ou la table n'existe pas encore.
+    """
+    import pandas as pd
+
+    if not os.path.exists(db_path):
+        return None
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    try:
+        return pd.read_sql_query("SELECT * FROM documents ORDER BY last_seen DESC", conn)
+    except (sqlite3.Error, pd.errors.DatabaseError):
+        return None
+    finally:
+        conn.close()
+
+
+def has_history(history_dir):
+    """Vrai si au moins une partition Parquet a été archivée dans history_dir."""
+    return bool(history_dir) and bool(glob.glob(_history_pattern(history_dir)))
+
+
+def _history_pattern(history_dir):
+    return os.path.join(str(history_dir), "*", "*.parquet")
+
+
+def _history_connection(history_dir):
+    import duckdb
+
+    con = duckdb.connect()
+    pattern = _history_pattern(history_dir)
+    con.execute(f"CREATE VIEW history AS SELECT * FROM read_parquet('{pattern}', hive_partitioning = true)")
+    return con
+
+
+def read_history(history_dir, sql="SELECT * FROM history ORDER BY id"):
+    """
+    Interroge l'historique brut archivé avec DuckDB ; la vue 'history' couvre toutes les partitions
+    (colonne 'month' issue du partitionnement). Retourne un DataFrame.
+    """
+    con = _history_connection(history_dir)
+    try:
+        return con.execute(sql).df()
+    finally:
+        con.close()
+
+
+def iter_history(history_dir, sql="SELECT * FROM history ORDER BY id", batch_size=10000):
+    """Comme read_history, mais ligne par ligne (tuples, None pour une valeur absente), par lots de batch_size."""
+    con = _history_connection(history_dir)
+    try:
+        cur = con.execute(sql)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    # python -m utils.log_compaction [base.db] [dossier d'historique] [jours conservés]
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config
+    from utils.log_store import LogStore
+
+    args = sys.argv[1:]
+    db = args[0] if len(args) > 0 else Config.LOG_DB
+    history = args[1] if len(args) > 1 else Config.LOG_HISTORY_DIR
+    days = int(args[2]) if len(args) > 2 else Config.LOG_RETENTION_DAYS
+    with LogStore(db) as log:
+        print(LogCompactor(log, history, days).compact())
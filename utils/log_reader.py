@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import threading
+
+from utils.log_compaction import SUCCESS_STATUSES
+
+
+def _signature(db_path):
+    """(taille, mtime) de la base et de son journal WAL : inchangée tant que rien n'a été écrit."""
+    sig = []
+    for path in (db_path, f"{db_path}-wal"):
+        try:
+            st = os.stat(path)
+            sig.append((st.st_size, st.st_mtime_ns))
+        except OSError:
+            sig.append(None)
+    return tuple(sig)
+
+
+def _totals(df):
+    """Agrégats d'un ensemble de lignes de la table 'documents'."""
+    return {
+        "ok": int(df["status"].isin(SUCCESS_STATUSES).sum()),
+        "failures": int(df["status"].str.match("fail|error", na=False).sum()),
+        "size_bytes": int(df["size_bytes"].fillna(0).sum()),
+    }
+
+
+class IncrementalLogReader:
+    """
+    Lecture incrémentale de la table compacte 'documents' (utils/log_compaction.py) pour les tableaux de bord.
+    - Rien n'a changé sur disque (taille / mtime de la base et du WAL) : le DataFrame et les agrégats en cache
+      sont rendus tels quels, sans requête.
+    - Sinon seules les lignes repliées depuis la dernière lecture (updated_id > dernier id lu) sont relues ;
+      elles remplacent leur version précédente et les agrégats (OK, échecs, taille totale) sont corrigés
+      de la différence, sans recalcul sur toute la table.
+    Une instance est prévue pour rester en cache entre les relances de script Streamlit.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        self.version = 0  # incrémenté à chaque changement du cache (clé des vues dérivées, jamais remis à zéro)
+        self._reset()
+
+    def _reset(self):
+        self._signature = None
+        self._last_id = 0
+        self.frame = None  # DataFrame indexé par file_url, trié par last_seen décroissant
+        self.stats = {"ok": 0, "failures": 0, "size_bytes": 0, "documents": 0}
+
+    def _read_changes(self):
+        """Lignes modifiées depuis la dernière lecture (toute la table au premier appel ou si la base a été recréée)."""
+        import pandas as pd
+
+        conn = sqlite3.connect(f"file:{os.path.abspath(self.db_path)}?mode=ro", uri=True)
+        try:
+            max_id = conn.execute("SELECT MAX(updated_id) FROM documents").fetchone()[0] or 0
+            if max_id < self._last_id:
+                self._reset()  # base recréée ou restaurée : relecture complète
+            if self.frame is None:
+                return pd.read_sql_query("SELECT * FROM documents", conn)
+            return pd.read_sql_query("SELECT * FROM documents WHERE updated_id > ?", conn, params=(self._last_id,))
+        finally:
+            conn.close()
+
+    def _apply(self, changed):
+        import pandas as pd
+
+        changed = changed.set_index("file_url")
+        if self.frame is None:
+            frame = changed
+        else:
+            replaced = changed.index.intersection(self.frame.index)
+            for key, value in _totals(self.frame.loc[replaced]).items():
+                self.stats[key] -= value
+            frame = pd.concat([self.frame.drop(index=replaced), changed])
+        for key, value in _totals(changed).items():
+            self.stats[key] += value
+        self.frame = frame.sort_values("last_seen", ascending=False)
+        self.stats["documents"] = len(self.frame)
+        self.version += 1
+        if changed["updated_id"].notna().any():
+            self._last_id = max(self._last_id, int(changed["updated_id"].max()))
+
+    def refresh(self):
+        """Met à jour le cache si la base a changé. Retourne False si la table n'existe pas encore."""
+        with self._lock:
+            if not os.path.exists(self.db_path):
+                self._reset()
+                return False
+            signature = _signature(self.db_path)
+            if signature == self._signature and self.frame is not None:
+                return True
+            try:
+                changed = self._read_changes()
+            except sqlite3.OperationalError:
+                return False  # table 'documents' pas encore créée par la compaction
+            if self.frame is None or not changed.empty:
+                self._apply(changed)
+            self._signature = signature
+            return True
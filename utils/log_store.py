@@ -0,0 +1,238 @@
+import csv
+import heapq
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+# Colonnes du log des téléchargements (ordre du CSV historique BCL_Documents_Log.csv)
+LOG_COLUMNS = [
+    "downloaded_at",
+    "section_url",
+    "file_url",
+    "filename",
+    "mime_type",
+    "size_bytes",
+    "last_modified",
+    "content_length_header",
+    "status",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    downloaded_at TEXT NOT NULL,
+    section_url TEXT,
+    file_url TEXT,
+    filename TEXT,
+    mime_type TEXT,
+    size_bytes INTEGER,
+    last_modified TEXT,
+    content_length_header TEXT,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_downloads_file_url ON downloads(file_url);
+CREATE INDEX IF NOT EXISTS idx_downloads_filename ON downloads(filename);
+CREATE INDEX IF NOT EXISTS idx_downloads_status ON downloads(status);
+CREATE INDEX IF NOT EXISTS idx_downloads_downloaded_at ON downloads(downloaded_at);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_INSERT = f"INSERT INTO downloads ({', '.join(LOG_COLUMNS)}) VALUES ({', '.join('?' * len(LOG_COLUMNS))})"
+
+
+def _size(value):
+    """size_bytes en entier (vide ou illisible dans le CSV -> NULL)."""
+    if value in (None, ""):
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class LogStore:
+    """
+    Log des téléchargements dans une base SQLite embarquée (Config.LOG_DB), en mode WAL :
+    plusieurs crawls simultanés (Agent 1, src/bcl_scrapper, ScraperAgent) écrivent sans entrelacer leurs lignes
+    et les lecteurs ne bloquent pas les écrivains.
+    Les lignes sont mises en tampon et écrites par lots, une transaction par lot (flush() aux points de
+    sauvegarde du crawl et à la fermeture). Le CSV historique reste disponible par export_csv().
+    """
+
+    def __init__(self, db_path, batch_size=100, timeout=30):
+        self.db_path = str(db_path)
+        self.batch_size = batch_size
+        folder = os.path.dirname(self.db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # Une connexion partagée entre les threads du crawl, protégée par le verrou
+        self.conn = sqlite3.connect(self.db_path, timeout=timeout, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Écriture ---
+
+    def add(self, section_url, file_url, filename, mime, size_bytes, last_modified, clen, status, when=None):
+        """Ajoute une ligne au tampon ; le lot est écrit dès qu'il atteint batch_size lignes."""
+        row = (
+            (when or datetime.now()).strftime("%Y-%m-%d %H:%M:%S"),
+            section_url,
+            file_url,
+            filename,
+            mime or "",
+            _size(size_bytes),
+            last_modified or "",
+            str(clen) if clen else "",
+            status,
+        )
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        with self.conn:  # une transaction par lot
+            self.conn.executemany(_INSERT, self._pending)
+        self._pending = []
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self.conn.close()
+
+    # --- Lecture ---
+
+    def query(self, sql, params=()):
+        """Exécute une requête de lecture ; retourne une liste de dict (lignes en tampon écrites avant)."""
+        with self._lock:
+            self._flush_locked()
+            cur = self.conn.execute(sql, params)
+            names = [d[0] for d in cur.description]
+            return [dict(zip(names, row)) for row in cur.fetchall()]
+
+    def count(self):
+        return self.query("SELECT COUNT(*) AS n FROM downloads")[0]["n"]
+
+    # --- Compatibilité CSV ---
+
+    def import_csv(self, csv_path, force=False):
+        """
+        Import unique d'un log CSV existant (même colonnes). Le chemin importé est noté dans la table meta :
+        un second appel ne réimporte pas (sauf force=True). Retourne le nombre de lignes importées.
+        """
+        csv_path = str(csv_path)
+        key = self._import_key(csv_path)
+        if not os.path.exists(csv_path):
+            return 0
+        with self._lock:
+            self._flush_locked()
+            if not force and self.conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+                return 0
+            imported = 0
+            with open(csv_path, "r", newline="", encoding="utf-8") as f, self.conn:
+                batch = []
+                for rec in csv.DictReader(f):
+                    if not rec.get("downloaded_at"):
+                        continue
+                    batch.append(tuple(
+                        _size(rec.get(c)) if c == "size_bytes" else (rec.get(c) or "") for c in LOG_COLUMNS
+                    ))
+                    if len(batch) >= 1000:
+                        self.conn.executemany(_INSERT, batch)
+                        imported += len(batch)
+                        batch = []
+                self.conn.executemany(_INSERT, batch)
+                imported += len(batch)
+                self._mark_imported(key)
+        return imported
+
+    @staticmethod
+    def _import_key(csv_path):
+        return f"csv_import:{os.path.abspath(csv_path)}"
+
+    def _mark_imported(self, key):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        )
+
+    def export_csv(self, csv_path, history_dir=None):
+        """
+        Réécrit le CSV historique depuis la base (fichier temporaire puis remplacement atomique).
+        history_dir : historique archivé par utils/log_compaction.py ; les lignes purgées de la base y sont
+        reprises, si bien que le CSV garde tout l'historique et non la seule fenêtre conservée en base.
+        Le CSV exporté est marqué comme importé : il ne sera pas réimporté au crawl suivant.
+        """
+        csv_path = str(csv_path)
+        tmp = f"{csv_path}.{os.getpid()}.tmp"
+        with self._lock:
+            self._flush_locked()
+            cur = self.conn.execute(f"SELECT id, {', '.join(LOG_COLUMNS)} FROM downloads ORDER BY id")
+            rows = cur
+            if history_dir:
+                from utils.log_compaction import has_history, iter_history
+
+                if has_history(history_dir):
+                    # Fusion par id : une ligne archivée encore en base n'est écrite qu'une fois
+                    sql = f"SELECT id, {', '.join(LOG_COLUMNS)} FROM history ORDER BY id"
+                    rows = heapq.merge(cur, iter_history(history_dir, sql), key=lambda row: row[0])
+            try:
+                with open(tmp, "w", newline="", encoding="utf-8") as f:
+                    w = csv.writer(f)
+                    w.writerow(LOG_COLUMNS)
+                    last_id = None
+                    for row in rows:
+                        if row[0] == last_id:
+                            continue
+                        last_id = row[0]
+                        w.writerow(["" if v is None else v for v in row[1:]])
+                os.replace(tmp, csv_path)
+            except BaseException:
+                # Historique illisible (DuckDB absent...) : le CSV existant est conservé tel quel
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            with self.conn:
+                self._mark_imported(self._import_key(csv_path))
+        return csv_path
+
+
+def open_log(db_path, csv_path=None, batch_size=100):
+    """Ouvre le log SQLite et y importe une fois pour toutes le CSV historique s'il existe."""
+    store = LogStore(db_path, batch_size=batch_size)
+    if csv_path:
+        store.import_csv(csv_path)
+    return store
+
+
+if __name__ == "__main__":
+    # python -m utils.log_store import|export <base.db> <log.csv> [dossier d'historique (export)]
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if len(sys.argv) not in (4, 5) or sys.argv[1] not in ("import", "export"):
+        print("Usage : python -m utils.log_store import|export <base.db> <log.csv> [dossier d'historique]")
+        sys.exit(1)
+    action, db, path = sys.argv[1:4]
+    history = sys.argv[4] if len(sys.argv) == 5 else None
+    with LogStore(db) as log:
+        if action == "import":
+            print(f"{log.import_csv(path)} ligne(s) importée(s) depuis {path}")
+        else:
+            print(f"Export vers {log.export_csv(path, history)}")
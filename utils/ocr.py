@@ -0,0 +1,135 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.text_cache import ExtractedText, TextCache
+
+# À incrémenter quand la logique d'OCR change : les pages déjà reconnues en cache sont alors invalidées
+OCR_REVISION = 1
+
+
+def tessdata_dir(tessdata=None):
+    """Dossier des données de langue Tesseract (explicite, TESSDATA_PREFIX ou installation locale), ou None."""
+    try:
+        import fitz  # PyMuPDF
+        return fitz.get_tessdata(tessdata)
+    except (ImportError, AttributeError, RuntimeError):
+        return None
+
+
+def _ocr_task(path, page_numbers, language, dpi, tessdata, cache_dir, content_hash, ocr_id):
+    """
+    Tâche d'un processus OCR : reconnaissance des pages demandées (numéros à partir de 1) par le moteur
+    Tesseract intégré à PyMuPDF, chaque page mise en cache dès qu'elle est reconnue.
+    """
+    import fitz  # PyMuPDF
+
+    cache = TextCache(cache_dir) if cache_dir else None
+    texts = {}
+    with fitz.open(path) as doc:
+        for number in page_numbers:
+            page = doc[number - 1]
+            try:
+                textpage = page.get_textpage_ocr(language=language, dpi=dpi, full=True, tessdata=tessdata)
+                texts[number] = page.get_text(textpage=textpage)
+            except Exception as e:
+                # Les exceptions de PyMuPDF ne passent pas toujours d'un processus à l'autre (pickle)
+                raise RuntimeError(f"OCR impossible, page {number} de {os.path.basename(path)} : {e}") from None
+            if cache is not None:
+                cache.put(content_hash, f"{ocr_id}-p{number}", ExtractedText([texts[number]]))
+    return texts
+
+
+class OcrJob:
+    """OCR en cours des pages d'un document : pages déjà en cache et tâches soumises au pool."""
+
+    def __init__(self, cached, futures):
+        self.cached = cached
+        self.futures = futures
+
+    def done(self):
+        return all(f.done() for f in self.futures)
+
+    def result(self):
+        """{numéro de page: texte reconnu} (bloquant) ; lève l'erreur d'OCR éventuelle."""
+        texts = dict(self.cached)
+        for future in self.futures:
+            texts.update(future.result())
+        return texts
+
+
+class OcrPool:
+    """
+    OCR sélectif des pages sans couche texte (PDF scannés), sur un pool de processus dédié (contexte 'spawn') :
+    l'extraction du texte natif, majoritaire, n'attend jamais la reconnaissance des pages scannées.
+    Résultat mis en cache par page (empreinte du document, numéro de page, langue, résolution) dans le
+    cache de texte : une page n'est reconnue qu'une fois.
+    Sans données Tesseract (available() faux), aucune page n'est soumise.
+    """
+
+    def __init__(self, cache=None, workers=2, language="fra+eng", dpi=300, tessdata=None, pages_per_task=4):
+        self.cache = cache
+        self.workers = workers or 1
+        self.language = language
+        self.dpi = dpi
+        self.tessdata = tessdata_dir(tessdata)
+        self.pages_per_task = pages_per_task
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def available(self):
+        """Données Tesseract présentes pour toutes les langues demandées."""
+        if self.tessdata is None:
+            return False
+        return all(os.path.exists(os.path.join(self.tessdata, f"{lang}.traineddata"))
+                   for lang in self.language.split("+"))
+
+    @property
+    def ocr_id(self):
+        return f"ocr-{self.language}-{self.dpi}dpi-r{OCR_REVISION}"
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                ctx = multiprocessing.get_context("spawn")
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+            return self._pool
+
+    def cached_page(self, content_hash, number):
+        if self.cache is None:
+            return None
+        cached = self.cache.get(content_hash, f"{self.ocr_id}-p{number}")
+        return cached.text if cached is not None else None
+
+    def submit(self, path, content_hash, page_numbers):
+        """Lance l'OCR des pages (numéros à partir de 1) d'un PDF ; retourne un OcrJob."""
+        cached, missing = {}, []
+        for number in page_numbers:
+            text = self.cached_page(content_hash, number)
+            if text is None:
+                missing.append(number)
+            else:
+                cached[number] = text
+        futures = []
+        if missing:
+            pool = self._executor()
+            cache_dir = self.cache.cache_dir if self.cache is not None else None
+            for i in range(0, len(missing), self.pages_per_task):
+                futures.append(pool.submit(
+                    _ocr_task, os.path.abspath(path), missing[i:i + self.pages_per_task], self.language,
+                    self.dpi, self.tessdata, cache_dir, content_hash, self.ocr_id,
+                ))
+        return OcrJob(cached, futures)
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
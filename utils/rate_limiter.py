@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Statuts qui signalent un serveur saturé : on ralentit fortement
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value):
+    """Convertit un en-tête Retry-After (secondes ou date HTTP) en secondes d'attente."""
+    if not value:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _HostBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+
+class AdaptiveRateLimiter:
+    """
+    Limiteur de débit par hôte (seau à jetons) qui s'adapte au serveur :
+    - accélère progressivement tant que les temps de réponse restent bas,
+    - ralentit quand la latence monte, divise le débit par deux sur 429/503,
+    - respecte Retry-After.
+    Le débit reste toujours entre `min_rate` et `max_rate` (requêtes/seconde).
+    Partagé entre threads ; utilisable aussi depuis asyncio (acquire_async).
+    """
+
+    def __init__(self, min_rate=0.2, max_rate=5.0, initial_rate=1.0, burst=1,
+                 target_latency=0.5, increase_step=0.1, decrease_factor=0.5):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.initial_rate = min(max(initial_rate, min_rate), max_rate)
+        self.burst = burst
+        self.target_latency = target_latency
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url):
+        return urlparse(url).netloc or url
+
+    def _bucket(self, host):
+        if host not in self._buckets:
+            self._buckets[host] = _HostBucket(self.initial_rate, self.burst)
+        return self._buckets[host]
+
+    def _reserve(self, url):
+        """Réserve un jeton et retourne le délai à attendre avant d'envoyer la requête."""
+        with self._lock:
+            b = self._bucket(self._host(url))
+            now = time.monotonic()
+            b.tokens = min(self.burst, b.tokens + (now - b.updated) * b.rate)
+            b.updated = now
+            b.tokens -= 1
+            wait = -b.tokens / b.rate if b.tokens < 0 else 0.0
+            return max(wait, b.blocked_until - now)
+
+    def acquire(self, url):
+        wait = self._reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, url):
+        wait = self._reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record(self, url, latency, status=None, retry_after=None):
+        """Ajuste le débit de l'hôte d'après la réponse obtenue (latence en secondes)."""
+        with self._lock:
+            b = self._bucket(self._host(url))
+            if status in THROTTLE_STATUSES:
+                b.rate = max(self.min_rate, b.rate * self.decrease_factor)
+            elif latency is not None and latency > 2 * self.target_latency:
+                b.rate = max(self.min_rate, b.rate * 0.8)
+            elif latency is not None and latency <= self.target_latency and (status is None or status < 400):
+                b.rate = min(self.max_rate, b.rate + self.increase_step)
+
+            delay = parse_retry_after(retry_after)
+            if delay:
+                b.blocked_until = max(b.blocked_until, time.monotonic() + delay)
+
+    def current_rate(self, url):
+        """Débit courant (requêtes/seconde) pour l'hôte de cette URL."""
+        with self._lock:
+            host = self._host(url)
+            return self._buckets[host].rate if host in self._buckets else self.initial_rate
+
+    def rates(self):
+        """Métrique : débit courant de chaque hôte."""
+        with self._lock:
+            return {host: round(b.rate, 3) for host, b in self._buckets.items()}
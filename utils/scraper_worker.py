@@ -0,0 +1,203 @@
+import contextlib
+import itertools
+import multiprocessing
+import queue
+import sys
+import threading
+import traceback
+
+# Délai (s) entre deux vérifications que le worker est toujours vivant pendant l'attente d'événements
+POLL_INTERVAL = 1.0
+
+# Types d'événements qui terminent un job
+FINAL_EVENTS = ("done", "error")
+
+
+class _EventStream:
+    """Flux texte (remplace sys.stdout dans le worker) : chaque ligne imprimée devient un événement 'log'."""
+
+    def __init__(self, events, job_id):
+        self.events = events
+        self.job_id = job_id
+        self._buffer = ""
+
+    def write(self, text):
+        self._buffer += text
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            if line.strip():
+                self.events.put({"type": "log", "job": self.job_id, "line": line})
+        return len(text)
+
+    def flush(self):
+        if self._buffer.strip():
+            self.events.put({"type": "log", "job": self.job_id, "line": self._buffer})
+        self._buffer = ""
+
+
+def _apply_settings(scrapper, settings):
+    """Injecte la configuration du job dans le module scrapper (même rôle que l'ancien lanceur temporaire)."""
+    for name, value in settings.items():
+        setattr(scrapper, name, value)
+
+
+def _worker_main(project_dir, jobs, events):
+    """
+    Boucle du processus worker : Playwright et Chromium restent chauds d'un job à l'autre.
+    Tourne dans son propre processus, hors de la boucle asyncio de Streamlit.
+    """
+    if project_dir not in sys.path:
+        sys.path.append(project_dir)
+    try:
+        import scrapper
+        from playwright.sync_api import sync_playwright
+        from utils.html_discovery import LazyBrowserPage
+
+        playwright = sync_playwright().start()
+    except Exception as e:
+        events.put({"type": "error", "job": None, "message": f"Démarrage du worker impossible : {e}"})
+        return
+    browser = LazyBrowserPage(playwright)
+    try:
+        browser.get()  # démarrage à chaud : le premier job n'attend pas Chromium
+    except Exception as e:
+        # Sans Chromium, le crawl HTTP direct reste possible ; le navigateur sera retenté au besoin
+        events.put({"type": "log", "job": None, "line": f"[WARNING] Chromium non préchauffé : {e}"})
+        browser = LazyBrowserPage(playwright)
+    events.put({"type": "ready", "job": None})
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_id = job["id"]
+        events.put({"type": "started", "job": job_id})
+        _apply_settings(scrapper, job.get("settings", {}))
+        scrapper.EVENT_HOOK = lambda kind, **data: events.put({"type": kind, "job": job_id, **data})
+        stream = _EventStream(events, job_id)
+        try:
+            with contextlib.redirect_stdout(stream):
+                downloaded = scrapper.crawl_and_download(browser=browser)
+            stream.flush()
+            events.put({"type": "done", "job": job_id, "downloaded": downloaded})
+        except Exception as e:
+            stream.flush()
+            events.put({"type": "error", "job": job_id, "message": str(e), "trace": traceback.format_exc()})
+            # Navigateur potentiellement dans un état incohérent : on repart d'un onglet neuf
+            with contextlib.suppress(Exception):
+                browser.close()
+            browser = LazyBrowserPage(playwright)
+        finally:
+            scrapper.EVENT_HOOK = None
+
+    with contextlib.suppress(Exception):
+        browser.close()
+        playwright.stop()
+
+
+class ScraperWorker:
+    """
+    Worker de scraping persistant, piloté par file de jobs.
+    Le processus (contexte 'spawn', compatible Windows) importe Playwright et lance Chromium une seule fois ;
+    chaque job renvoie au fil de l'eau des événements structurés : 'queued', 'started', 'log', 'section',
+    'document', 'summary' puis 'done' ou 'error'.
+    Les jobs s'exécutent l'un après l'autre ; un thread de répartition distribue les événements du worker
+    dans une file par job, si bien que plusieurs sessions (Streamlit) peuvent suivre chacune le sien.
+    """
+
+    def __init__(self, project_dir):
+        self.project_dir = str(project_dir)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._queues = {}  # job -> file des événements de ce job (côté appelant)
+        self.process = None
+        self.jobs = None
+        self.events = None
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def start(self):
+        """Démarre le processus s'il ne tourne pas déjà (ou s'il s'est arrêté)."""
+        with self._lock:
+            self._start_locked()
+
+    def _start_locked(self):
+        if self.is_alive():
+            return
+        self.jobs = self._ctx.Queue()
+        self.events = self._ctx.Queue()
+        self.process = self._ctx.Process(
+            target=_worker_main, args=(self.project_dir, self.jobs, self.events), daemon=True
+        )
+        self.process.start()
+        threading.Thread(target=self._dispatch, args=(self.process, self.events), daemon=True).start()
+
+    def _dispatch(self, process, events):
+        """Répartit les événements du processus worker dans les files des jobs (un thread par processus)."""
+        while True:
+            try:
+                event = events.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if not process.is_alive():
+                    return
+                continue
+            if event["type"] == "ready":
+                continue
+            with self._lock:
+                if event["job"] is None:
+                    # Événement du worker lui-même (échec au démarrage, avertissement) : vu par tous les jobs
+                    targets = list(self._queues.values())
+                else:
+                    targets = [self._queues[event["job"]]] if event["job"] in self._queues else []
+            for target in targets:
+                target.put(event)
+
+    def submit(self, settings):
+        """
+        Place un crawl dans la file du worker. Retourne l'identifiant du job ; son premier événement,
+        'queued', indique combien de jobs passent avant lui.
+        """
+        with self._lock:
+            self._start_locked()
+            job_id = next(self._ids)
+            self._queues[job_id] = queue.Queue()
+            self._queues[job_id].put({"type": "queued", "job": job_id, "ahead": len(self._queues) - 1})
+            self.jobs.put({"id": job_id, "settings": dict(settings)})
+        return job_id
+
+    def events_for(self, job_id):
+        """Générateur des événements d'un job, jusqu'à 'done' ou 'error' (inclus)."""
+        with self._lock:
+            events = self._queues.get(job_id)
+        if events is None:
+            yield {"type": "error", "job": job_id, "message": "Job inconnu ou déjà terminé."}
+            return
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    if not self.is_alive():
+                        yield {"type": "error", "job": job_id, "message": "Le worker de scraping s'est arrêté."}
+                        return
+                    continue
+                if event["type"] == "error" and event["job"] is None:
+                    # Échec au démarrage : aucun job ne pourra aboutir
+                    yield dict(event, job=job_id)
+                    return
+                yield dict(event, job=job_id)
+                if event["type"] in FINAL_EVENTS:
+                    return
+        finally:
+            with self._lock:
+                self._queues.pop(job_id, None)
+
+    def stop(self, timeout=10):
+        if not self.is_alive():
+            return
+        self.jobs.put(None)
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
@@ -0,0 +1,141 @@
+import bisect
+import gzip
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+
+
+class ExtractedText:
+    """Texte extrait d'un document, page par page (une seule « page » pour DOCX / TXT)."""
+
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.offsets = []  # position du début de chaque page dans self.text
+        position = 0
+        for page in self.pages:
+            self.offsets.append(position)
+            position += len(page)
+        self.text = "".join(self.pages)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def page_at(self, offset):
+        """Numéro de page (1-indexé) contenant la position `offset` de self.text."""
+        return max(1, bisect.bisect_right(self.offsets, offset))
+
+
+class TextCache:
+    """
+    Cache disque du texte extrait (Config.TEXT_CACHE_DIR), indexé par empreinte SHA-256 du contenu
+    et par identifiant d'extracteur (bibliothèque, version, révision de la logique d'extraction) :
+    un document inchangé n'est jamais réextrait, un changement d'extracteur invalide ses entrées.
+    Chaque entrée est un fichier gzip : une ligne d'en-tête JSON (décalages des pages) puis le texte brut
+    (sans conversion des fins de ligne, les décalages sont des positions exactes).
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = str(cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path_for(self, content_hash, extractor_id):
+        safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", extractor_id)
+        return os.path.join(self.cache_dir, content_hash[:2], f"{content_hash}.{safe_id}.txt.gz")
+
+    def get(self, content_hash, extractor_id):
+        """ExtractedText en cache, ou None (absent ou illisible)."""
+        path = self.path_for(content_hash, extractor_id)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+                header = json.loads(f.readline())
+                text = f.read()
+        except (OSError, ValueError, EOFError):
+            return None
+        bounds = header["offsets"] + [len(text)]
+        return ExtractedText(text[bounds[i]:bounds[i + 1]] for i in range(len(header["offsets"])))
+
+    def iter_pages(self, content_hash, extractor_id):
+        """
+        Lecture en flux d'une entrée : itérateur sur le texte de chaque page (une page en mémoire à la fois),
+        ou None si l'entrée est absente ou illisible.
+        """
+        path = self.path_for(content_hash, extractor_id)
+        try:
+            f = gzip.open(path, "rt", encoding="utf-8", newline="")
+            header = json.loads(f.readline())
+        except (OSError, ValueError, EOFError):
+            return None
+        offsets = header["offsets"]
+
+        def pages():
+            with f:
+                for i in range(len(offsets)):
+                    if i + 1 < len(offsets):
+                        yield f.read(offsets[i + 1] - offsets[i])
+                    else:
+                        yield f.read()
+        return pages()
+
+    def writer(self, content_hash, extractor_id):
+        """Écriture d'une entrée page par page (voir TextCacheWriter)."""
+        return TextCacheWriter(self, content_hash, extractor_id)
+
+    def put(self, content_hash, extractor_id, extracted):
+        """Enregistre un ExtractedText (écriture dans un fichier temporaire puis remplacement atomique)."""
+        path = self.path_for(content_hash, extractor_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = {
+            "sha256": content_hash,
+            "extractor": extractor_id,
+            "offsets": extracted.offsets,
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6, newline="") as f:
+            f.write(json.dumps(header) + "\n")
+            f.write(extracted.text)
+        os.replace(tmp, path)
+        return extracted
+
+
+class TextCacheWriter:
+    """
+    Écriture en flux d'une entrée du cache : les pages sont ajoutées une à une dans un fichier de travail,
+    l'entrée n'est publiée qu'au commit() (document lu jusqu'au bout), sinon discard() l'abandonne.
+    L'en-tête (décalages des pages) précède le texte : il est écrit au commit, puis le texte est recopié par blocs.
+    """
+
+    def __init__(self, cache, content_hash, extractor_id):
+        self.path = cache.path_for(content_hash, extractor_id)
+        self.header = {"sha256": content_hash, "extractor": extractor_id, "offsets": []}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._body_path = f"{self.path}.{os.getpid()}.body"
+        self._body = open(self._body_path, "w", encoding="utf-8", newline="")
+        self._position = 0
+
+    def add(self, text):
+        self.header["offsets"].append(self._position)
+        self._body.write(text)
+        self._position += len(text)
+
+    def commit(self):
+        self._body.close()
+        self.header["created_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6, newline="") as out, \
+                    open(self._body_path, "r", encoding="utf-8", newline="") as body:
+                out.write(json.dumps(self.header) + "\n")
+                shutil.copyfileobj(body, out, 1024 * 1024)
+            os.replace(tmp, self.path)
+        finally:
+            for leftover in (tmp, self._body_path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+    def discard(self):
+        self._body.close()
+        if os.path.exists(self._body_path):
+            os.remove(self._body_path)
@@ -0,0 +1,665 @@
+import contextlib
+import functools
+import hashlib
+import io
+import itertools
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils.content_store import sha256_file
+from utils.logger import setup_logger
+from utils.text_cache import ExtractedText, TextCache
+
+logger = setup_logger()
+
+# À incrémenter quand la logique d'extraction change : les entrées du cache de texte sont alors invalidées
+EXTRACTION_REVISION = 1
+
+
+class UnsupportedFormat(Exception):
+    """Aucun extracteur pour ce type de fichier."""
+
+
+# Extraction parallèle : un PDF d'au moins SPLIT_MIN_PAGES pages est découpé en tranches de PAGES_PER_TASK pages
+SPLIT_MIN_PAGES = 64
+PAGES_PER_TASK = 32
+
+# Lecture en flux avec extraction anticipée : nombre de pages d'avance au plus (file bornée)
+PREFETCH_PAGES = 2
+
+# Profil d'un PDF (benchmarks/extraction_benchmark.py : PyMuPDF l'emporte sur tous les profils, d'où pdf_backend)
+LARGE_PDF_BYTES = 20 * 1024 * 1024
+PROFILE_SAMPLE_PAGES = 3
+
+# Tableurs et CSV : lignes par page de texte
+ROWS_PER_PAGE = 1000
+# ZIP : profondeur maximale d'archives imbriquées ; taille au-delà de laquelle un membre PDF / DOCX / tableur
+# est décompressé dans un fichier temporaire (ouvert par chemin) plutôt que chargé en mémoire
+ZIP_MAX_DEPTH = 3
+ZIP_MEMBER_MEMORY_BYTES = 64 * 1024 * 1024  # = Config.ZIP_MEMBER_MEMORY_BYTES
+
+
+# --- Extracteurs (générateurs du texte de chaque page) ---
+# source : chemin du fichier, contenu en octets ou fichier binaire ouvert ;
+# start / stop : tranche de pages (PDF uniquement)
+
+def _open_pymupdf(source):
+    import fitz  # PyMuPDF
+    if isinstance(source, str):
+        return fitz.open(source)
+    return fitz.open(stream=source if isinstance(source, (bytes, bytearray)) else source.read(), filetype="pdf")
+
+
+def _pymupdf_pages(doc, start, stop):
+    with doc:
+        stop = doc.page_count if stop is None else min(stop, doc.page_count)
+        for i in range(start, stop):
+            yield doc[i].get_text()
+
+
+def _pdf_pages_pymupdf(source, start=0, stop=None):
+    yield from _pymupdf_pages(_open_pymupdf(source), start, stop)
+
+
+def _pdf_pages_auto(source, start=0, stop=None):
+    """PyMuPDF ; un PDF qu'il ne sait pas ouvrir est relu par pypdf, si celui-ci est installé."""
+    try:
+        doc = _open_pymupdf(source)
+    except Exception:
+        if not _library_version("pypdf"):
+            raise
+        if hasattr(source, "seek"):
+            source.seek(0)
+        yield from _pdf_pages_pypdf(source, start, stop)
+        return
+    yield from _pymupdf_pages(doc, start, stop)
+
+
+def _pdf_pages_pypdf(source, start=0, stop=None):
+    from pypdf import PdfReader
+    for page in PdfReader(_stream(source)).pages[start:stop]:
+        yield (page.extract_text() or "") + "\n"
+
+
+def _docx_pages(source, start=0, stop=None):
+    import docx
+    yield "\n".join(p.text for p in docx.Document(_stream(source)).paragraphs)
+
+
+def _txt_pages(source, start=0, stop=None):
+    if isinstance(source, (bytes, bytearray)):
+        yield bytes(source).decode("utf-8", errors="ignore")
+        return
+    with _open_text(source) as f:
+        yield f.read()
+
+
+def _csv_pages(source, start=0, stop=None):
+    """CSV lu par blocs de ROWS_PER_PAGE lignes (jamais chargé en entier)."""
+    with _open_text(source) as f:
+        while True:
+            lines = list(itertools.islice(f, ROWS_PER_PAGE))
+            if not lines:
+                return
+            yield "".join(lines)
+
+
+def _row_text(values):
+    return "\t".join("" if v is None else str(v) for v in values).rstrip("\t")
+
+
+def _sheet_pages(title, rows):
+    """Pages de ROWS_PER_PAGE lignes non vides d'une feuille, la première précédée du nom de la feuille."""
+    lines = [f"[{title}]"]
+    for values in rows:
+        line = _row_text(values)
+        if line:
+            lines.append(line)
+        if len(lines) >= ROWS_PER_PAGE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _xlsx_pages(source, start=0, stop=None):
+    import openpyxl
+    # Mode lecture seule : les lignes sont lues en flux depuis le XML de chaque feuille
+    workbook = openpyxl.load_workbook(_stream(source), read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            yield from _sheet_pages(sheet.title, sheet.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def _xls_pages(source, start=0, stop=None):
+    import xlrd
+    if isinstance(source, str):
+        book = xlrd.open_workbook(source, on_demand=True)
+    else:
+        data = source if isinstance(source, (bytes, bytearray)) else source.read()
+        book = xlrd.open_workbook(file_contents=data, on_demand=True)
+    try:
+        for index in range(book.nsheets):
+            sheet = book.sheet_by_index(index)  # feuilles chargées une à une (on_demand)
+            yield from _sheet_pages(sheet.name, (sheet.row_values(r) for r in range(sheet.nrows)))
+            book.unload_sheet(index)
+    finally:
+        book.release_resources()
+
+
+def _zip_pages(source, start=0, stop=None, depth=0):
+    """
+    Membres d'une archive ZIP lus en flux ; archives imbriquées jusqu'à ZIP_MAX_DEPTH niveaux.
+    Un membre PDF / DOCX / tableur de plus de ZIP_MEMBER_MEMORY_BYTES passe par un fichier temporaire,
+    supprimé dès sa lecture terminée. La première page de chaque membre est précédée de son nom.
+    Les membres sans extracteur sont ignorés ; un membre illisible (chiffré, corrompu, archive imbriquée
+    invalide...) est ignoré et signalé, les autres membres restent analysés.
+    """
+    with zipfile.ZipFile(_stream(source)) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            try:
+                func, _ = resolve_extractor(info.filename)
+            except UnsupportedFormat:
+                continue
+            if func is _zip_pages and depth + 1 > ZIP_MAX_DEPTH:
+                continue
+            heading = f"[{info.filename}]\n"
+            spooled = None
+            try:
+                with contextlib.ExitStack() as stack:
+                    # CSV / TXT sont lus séquentiellement ; les autres formats demandent un accès aléatoire
+                    if func in (_csv_pages, _txt_pages):
+                        member = stack.enter_context(archive.open(info))
+                    elif info.file_size <= ZIP_MEMBER_MEMORY_BYTES:
+                        with archive.open(info) as f:
+                            member = f.read()
+                    else:
+                        member = spooled = _spool_member(archive, info)
+                    pages = stack.enter_context(contextlib.closing(
+                        func(member, depth=depth + 1) if func is _zip_pages else func(member)))
+                    for text in pages:
+                        yield heading + text
+                        heading = ""
+            except Exception as e:
+                logger.warning(f"Membre {info.filename} ignoré ({type(e).__name__}: {e})")
+            finally:
+                # Extraction terminée, en erreur ou interrompue : le fichier temporaire ne survit pas au membre
+                if spooled is not None and os.path.exists(spooled):
+                    os.remove(spooled)
+
+
+def _spool_member(archive, info):
+    """Décompresse un membre volumineux dans un fichier temporaire ; retourne son chemin (à supprimer)."""
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(info.filename)[1])
+    try:
+        with os.fdopen(fd, "wb") as out, archive.open(info) as member:
+            shutil.copyfileobj(member, out, 1024 * 1024)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def _stream(source):
+    """Chemin ou fichier ouvert tel quel, contenu en octets dans un flux mémoire."""
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def _open_text(source):
+    """Flux texte UTF-8 (caractères invalides ignorés) sur un chemin, des octets ou un fichier binaire."""
+    if isinstance(source, str):
+        return open(source, "r", encoding="utf-8", errors="ignore")
+    return io.TextIOWrapper(_stream(source), encoding="utf-8", errors="ignore")
+
+
+def _library_version(module_name, attribute="__version__"):
+    try:
+        module = __import__(module_name)
+    except ImportError:
+        return None
+    return str(getattr(module, attribute, "0"))
+
+
+def pdf_profile(source):
+    """
+    Profil d'un PDF (benchmark des backends) : {"name", "size", "pages", "text_layer"}.
+    name : 'sans_texte' (aucune couche texte sur les pages échantillonnées, PDF scanné), 'long' (au moins
+    SPLIT_MIN_PAGES pages ou LARGE_PDF_BYTES octets) ou 'court'. Lecture de la structure et de quelques pages
+    seulement, mémorisée par fichier (chemin, taille, date) ; None si PyMuPDF n'est pas installé ou si le
+    fichier est illisible.
+    """
+    if isinstance(source, str):
+        try:
+            st = os.stat(source)
+        except OSError:
+            return None
+        return _file_profile(source, st.st_size, st.st_mtime_ns)
+    return _read_profile(bytes(source))
+
+
+@functools.lru_cache(maxsize=1024)
+def _file_profile(path, size, mtime_ns):
+    return _read_profile(path)
+
+
+def _read_profile(source):
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        return None
+    if isinstance(source, str):
+        size = os.path.getsize(source)
+        opener = lambda: fitz.open(source)  # noqa: E731
+    else:
+        data = bytes(source)
+        size = len(data)
+        opener = lambda: fitz.open(stream=data, filetype="pdf")  # noqa: E731
+    try:
+        with opener() as doc:
+            pages = doc.page_count
+            step = max(1, pages // PROFILE_SAMPLE_PAGES)
+            sample = list(range(0, pages, step))[:PROFILE_SAMPLE_PAGES]
+            text_layer = any(doc[i].get_text().strip() for i in sample)
+    except Exception:
+        return None
+    if not text_layer:
+        name = "sans_texte"
+    elif pages >= SPLIT_MIN_PAGES or size >= LARGE_PDF_BYTES:
+        name = "long"
+    else:
+        name = "court"
+    return {"name": name, "size": size, "pages": pages, "text_layer": text_layer}
+
+
+def pdf_page_count(path):
+    """Nombre de pages d'un PDF (structure seule, aucune page extraite) ; None sans PyMuPDF ou s'il est illisible."""
+    try:
+        with _open_pymupdf(path) as doc:
+            return doc.page_count
+    except Exception:
+        return None
+
+
+def pdf_backend():
+    """Backend PDF disponible : PyMuPDF de préférence, pypdf sinon."""
+    if _library_version("fitz", "VersionBind"):
+        return "pymupdf"
+    if _library_version("pypdf"):
+        return "pypdf"
+    raise UnsupportedFormat("Ni PyMuPDF ni pypdf ne sont installés")
+
+
+# extension -> {backend: (fonction d'extraction, (module, attribut de version))}
+EXTRACTORS = {
+    ".pdf": {
+        "pymupdf": (_pdf_pages_pymupdf, ("fitz", "VersionBind")),
+        "pypdf": (_pdf_pages_pypdf, ("pypdf", "__version__")),
+    },
+    ".docx": {"python-docx": (_docx_pages, ("docx", "__version__"))},
+    ".xlsx": {"openpyxl": (_xlsx_pages, ("openpyxl", "__version__"))},
+    ".xls": {"xlrd": (_xls_pages, ("xlrd", "__version__"))},
+    ".csv": {"text": (_csv_pages, None)},
+    ".txt": {"text": (_txt_pages, None)},
+    ".zip": {"zipfile": (_zip_pages, None)},
+}
+
+
+def resolve_extractor(name, backend=None):
+    """
+    Retourne (fonction d'extraction, identifiant d'extracteur) pour un fichier (chemin ou nom).
+    Sans backend imposé, un PDF est confié au backend disponible (pdf_backend) : le document n'est pas ouvert ;
+    avec PyMuPDF, un PDF qu'il ne sait pas ouvrir est relu par pypdf (texte mis en cache sous le même
+    identifiant : le document n'est plus soumis à PyMuPDF tant que sa version ne change pas).
+    """
+    auto = backend is None
+    ext = os.path.splitext(name)[1].lower()
+    backends = EXTRACTORS.get(ext)
+    if not backends:
+        raise UnsupportedFormat(ext)
+    if backend is None and ext == ".pdf":
+        backend = pdf_backend()
+    elif backend is None:
+        backend = next(iter(backends))
+    func, version_from = backends[backend]
+    if auto and func is _pdf_pages_pymupdf:
+        func = _pdf_pages_auto
+    version = _library_version(*version_from) if version_from else "std"
+    if version is None:
+        raise UnsupportedFormat(f"{ext} : {version_from[0]} n'est pas installé")
+    return func, f"{backend}-{version}-r{EXTRACTION_REVISION}"
+
+
+def _content_hash(source):
+    if isinstance(source, (bytes, bytearray)):
+        return hashlib.sha256(source).hexdigest()
+    return sha256_file(source)
+
+
+_END = object()
+
+
+def _prefetch(pages, size):
+    """Extraction dans un thread, au plus `size` pages d'avance sur le consommateur (file bornée)."""
+    buffer = queue.Queue(maxsize=size)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for text in pages:
+                if not put((text, None)):
+                    return
+            put((_END, None))
+        except Exception as e:
+            put((_END, e))
+        finally:
+            pages.close()
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            text, error = buffer.get()
+            if text is _END:
+                if error is not None:
+                    raise error
+                return
+            yield text
+    finally:
+        stop.set()
+
+
+def _numbered(pages, start, open_writer):
+    completed = False
+    writer = None
+    try:
+        if open_writer is not None:
+            try:
+                writer = open_writer()
+            except OSError:
+                writer = None
+        for number, text in enumerate(pages, start=start + 1):
+            if writer is not None:
+                writer.add(text)
+            yield number, text
+        completed = True
+    finally:
+        pages.close()
+        if writer is not None:
+            try:
+                writer.commit() if completed else writer.discard()
+            except OSError:
+                pass  # le cache est une optimisation : son échec ne doit pas faire échouer la lecture
+
+
+def iter_pages(source, cache=None, content_hash=None, backend=None, filename=None, page_range=None, prefetch=0):
+    """
+    Texte d'un document page par page : générateur de (numéro de page à partir de 1, texte).
+    source : chemin du fichier, ou contenu en octets (filename en donne alors le format).
+    Une page à la fois en mémoire ; avec prefetch > 0, l'extraction avance dans un thread pendant que
+    l'appelant traite la page courante, au plus `prefetch` pages d'avance.
+    Avec un cache : lecture en flux d'une entrée existante, sinon écriture au fil de la lecture
+    (entrée publiée seulement si le document a été lu jusqu'au bout).
+    page_range : (début, fin) en indices de pages, sans cache (tranches de extract_documents).
+    Lève UnsupportedFormat pour un type de fichier sans extracteur.
+    """
+    func, extractor_id = resolve_extractor(filename or source, backend)
+    start, stop = page_range or (0, None)
+    pages, open_writer = None, None
+    if cache is not None and page_range is None:
+        content_hash = content_hash or _content_hash(source)
+        pages = cache.iter_pages(content_hash, extractor_id)
+        if pages is None:
+            def open_writer():
+                return cache.writer(content_hash, extractor_id)
+    if pages is None:
+        pages = func(source, start, stop)
+    if prefetch:
+        pages = _prefetch(pages, prefetch)
+    return _numbered(pages, start, open_writer)
+
+
+def extract_document(path, cache=None, content_hash=None, backend=None):
+    """
+    Texte d'un document (ExtractedText, page par page), servi par le cache de texte si possible.
+    content_hash : SHA-256 du fichier s'il est déjà connu (manifest du stockage par contenu), sinon calculé.
+    Lève UnsupportedFormat pour un type de fichier sans extracteur.
+    Tout le texte est gardé en mémoire : pour un grand document, préférer iter_pages().
+    """
+    return ExtractedText(text for _, text in iter_pages(path, cache, content_hash, backend))
+
+
+# --- Extraction parallèle (pool de processus) ---
+
+class PageCollector:
+    """
+    Consommateur par défaut d'extract_documents : garde les pages, réassemblées en ExtractedText.
+    Un consommateur fournit scan(pages) -> résultat partiel (exécuté dans le processus du pool, sur un
+    itérateur de (numéro, texte)) et merge(résultats partiels dans l'ordre des pages) -> résultat ;
+    il doit pouvoir être transmis aux processus (pickle).
+    """
+
+    def scan(self, pages):
+        return [text for _, text in pages]
+
+    def merge(self, parts):
+        return ExtractedText(text for part in parts for text in part)
+
+
+def _scan(consumer, pages, kept=None):
+    """consumer.scan sur les pages, en relevant les pages sans texte (et en gardant les pages si `kept`)."""
+    empty = []
+
+    def track():
+        for number, text in pages:
+            if not text.strip():
+                empty.append(number)
+            if kept is not None:
+                kept.append(text)
+            yield number, text
+    return consumer.scan(track()), empty
+
+
+def _extract_task(path, content_hash, backend, cache_dir, page_range, consumer):
+    """
+    Tâche d'un processus du pool : document entier (lu et mis en cache en flux) ou tranche de pages d'un PDF.
+    Retourne (résultat partiel, pages de la tranche pour le cache ou None, numéros des pages sans texte).
+    """
+    if page_range is None:
+        cache = TextCache(cache_dir) if cache_dir else None
+        part, empty = _scan(consumer, iter_pages(path, cache, content_hash, backend))
+        return part, None, empty
+    kept = [] if cache_dir else None
+    part, empty = _scan(consumer, iter_pages(path, backend=backend, page_range=page_range), kept)
+    return part, kept, empty
+
+
+def _page_ranges(path, backend):
+    """Tranches de pages d'un grand PDF (extraction PyMuPDF), ou None pour un traitement d'un seul tenant."""
+    if not path.lower().endswith(".pdf") or (backend or pdf_backend()) != "pymupdf":
+        return None
+    pages = pdf_page_count(path)
+    if pages is None or pages < SPLIT_MIN_PAGES:
+        return None  # PDF illisible par PyMuPDF : extraction complète (repli pypdf ou erreur)
+    return [(start, start + PAGES_PER_TASK) for start in range(0, pages, PAGES_PER_TASK)]
+
+
+class _SplitDocument:
+    """Tranches d'un grand PDF en cours : résultats partiels et écriture du cache dans l'ordre des pages."""
+
+    def __init__(self, content_hash, ranges, writer):
+        self.content_hash = content_hash
+        self.remaining = len(ranges)
+        self.parts = {}
+        self.empty = []  # pages sans texte, toutes tranches confondues
+        self.writer = writer
+        self._next = 0  # début de la prochaine tranche à écrire dans le cache
+        self._pending = {}  # tranches revenues en avance sur l'ordre des pages
+
+    def add(self, page_range, part, pages, empty):
+        self.remaining -= 1
+        self.parts[page_range[0]] = part
+        self.empty += empty
+        if self.writer is None or pages is None:
+            return
+        self._pending[page_range[0]] = (page_range[1], pages)
+        while self._next in self._pending:
+            stop, ready = self._pending.pop(self._next)
+            for text in ready:
+                self.writer.add(text)
+            self._next = stop
+
+    def ordered_parts(self):
+        return [self.parts[start] for start in sorted(self.parts)]
+
+
+def _with_ocr(pages, texts):
+    """Pages du document, le texte reconnu par OCR remplaçant celui des pages sans couche texte."""
+    for number, text in pages:
+        yield number, texts.get(number, text) if not text.strip() else text
+
+
+def extract_documents(documents, cache=None, workers=None, backend=None, consumer=None, ocr=None):
+    """
+    Extraction en parallèle d'un corpus sur un pool de processus (contexte 'spawn', compatible Windows).
+    documents : itérable de (chemin, empreinte SHA-256 ou None).
+    Générateur de (chemin, résultat ou None, exception ou None), dans l'ordre où les extractions se terminent :
+    les documents déjà en cache sortent immédiatement ; les grands PDF sont répartis par tranches de pages
+    sur plusieurs processus puis réassemblés (et mis en cache). Chaque document sort exactement une fois
+    (UnsupportedFormat pour un format sans extracteur).
+    consumer : traitement des pages dans les processus du pool (voir PageCollector, par défaut : le résultat
+    est l'ExtractedText du document) ; seul son résultat revient au processus principal.
+    workers : nombre de processus (défaut : nombre de cœurs) ; 1 = extraction séquentielle, sans pool.
+    ocr : OcrPool (utils/ocr.py) pour les pages PDF sans couche texte. Ces pages partent sur le pool OCR
+    pendant que l'extraction continue ; leurs documents sortent en dernier, relus avec le texte reconnu.
+    Si l'OCR échoue, le document sort avec son résultat sans OCR et l'erreur.
+    """
+    consumer = consumer or PageCollector()
+    ocr = ocr if ocr is not None and ocr.available() else None
+    ocr_jobs = []
+
+    def run_here(path, content_hash):
+        part, empty = _scan(consumer, iter_pages(path, cache, content_hash, backend))
+        return consumer.merge([part]), empty
+
+    def wait_for_ocr(path, content_hash, result, empty):
+        """Soumet à l'OCR les pages sans texte d'un PDF ; True si le document doit attendre sa reconnaissance."""
+        if ocr is None or not empty or not path.lower().endswith(".pdf"):
+            return False
+        content_hash = content_hash or sha256_file(path)
+        ocr_jobs.append((path, content_hash, result, ocr.submit(path, content_hash, sorted(empty))))
+        return True
+
+    def finish_ocr():
+        for path, content_hash, result, job in ocr_jobs:
+            try:
+                texts = job.result()
+                pages = _with_ocr(iter_pages(path, cache, content_hash, backend), texts)
+                yield path, consumer.merge([consumer.scan(pages)]), None
+            except Exception as e:
+                yield path, result, e
+
+    pending = []
+    for path, content_hash in documents:
+        try:
+            _, extractor_id = resolve_extractor(path, backend)
+        except UnsupportedFormat as e:
+            yield path, None, e
+            continue
+        if cache is not None:
+            content_hash = content_hash or sha256_file(path)
+            if os.path.exists(cache.path_for(content_hash, extractor_id)):
+                try:
+                    result, empty = run_here(path, content_hash)
+                except Exception as e:
+                    yield path, None, e
+                    continue
+                if not wait_for_ocr(path, content_hash, result, empty):
+                    yield path, result, None
+                continue
+        pending.append((path, content_hash))
+
+    workers = workers or os.cpu_count() or 1
+    plan = [(path, content_hash, _page_ranges(path, backend)) for path, content_hash in pending]
+    if workers <= 1 or len(plan) == 1 and plan[0][2] is None:
+        # Pas de parallélisme utile : on évite le coût de démarrage du pool
+        for path, content_hash in pending:
+            try:
+                result, empty = run_here(path, content_hash)
+            except Exception as e:
+                yield path, None, e
+                continue
+            if not wait_for_ocr(path, content_hash, result, empty):
+                yield path, result, None
+        yield from finish_ocr()
+        return
+
+    cache_dir = cache.cache_dir if cache is not None else None
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = {}
+        split = {}  # chemin -> _SplitDocument
+        for path, content_hash, ranges in plan:
+            if ranges is None:
+                futures[pool.submit(_extract_task, path, content_hash, backend, cache_dir, None, consumer)] = (path, content_hash, None)
+                continue
+            writer = None
+            if cache is not None:
+                _, extractor_id = resolve_extractor(path, backend)
+                writer = cache.writer(content_hash, extractor_id)
+            split[path] = _SplitDocument(content_hash, ranges, writer)
+            for page_range in ranges:
+                futures[pool.submit(_extract_task, path, content_hash, backend, cache_dir, page_range, consumer)] = (path, content_hash, page_range)
+
+        failed = set()
+        try:
+            for future in as_completed(futures):
+                path, content_hash, page_range = futures[future]
+                if path in failed:
+                    continue
+                try:
+                    part, pages, empty = future.result()
+                    if page_range is None:
+                        result = consumer.merge([part])
+                    else:
+                        # Tranche d'un grand PDF : réassemblage quand toutes les tranches sont revenues
+                        entry = split[path]
+                        entry.add(page_range, part, pages, empty)
+                        if entry.remaining:
+                            continue
+                        result, empty = consumer.merge(entry.ordered_parts()), entry.empty
+                except Exception as e:
+                    if page_range is not None:
+                        failed.add(path)
+                    yield path, None, e
+                    continue
+                if page_range is not None and entry.writer is not None:
+                    writer, entry.writer = entry.writer, None
+                    try:
+                        writer.commit()
+                    except OSError:
+                        pass
+                if not wait_for_ocr(path, content_hash, result, empty):
+                    yield path, result, None
+        finally:
+            for entry in split.values():
+                if entry.writer is not None:
+                    entry.writer.discard()
+    yield from finish_ocr()
@@ -0,0 +1,69 @@
+# visualisation.py
+from datetime import date, timedelta
+
+import streamlit as st
+
+from config import Config
+from utils.analytics import AnalyticsStore
+
+# Périodes proposées (nombre de jours, None = tout l'historique)
+PERIODS = {"30 jours": 30, "90 jours": 90, "1 an": 365, "Tout": None}
+
+
+@st.cache_resource
+def get_analytics():
+    """Agrégats de visualisation, partagés par toutes les sessions."""
+    return AnalyticsStore(Config.ANALYTICS_DB, Config.LOG_DB, Config.LOG_HISTORY_DIR, Config.KEYWORD_HITS_FILE)
+
+
+def run_visualisation_interface(T):
+    """
+    Page 'Visualisation des données' : graphiques construits sur les agrégats DuckDB (utils/analytics.py),
+    mis à jour de façon incrémentale à l'ouverture de la page, sans relecture du log brut.
+    """
+    st.title(T["visual_title"])
+    st.caption(T["visual_subtitle"])
+
+    analytics = get_analytics()
+    try:
+        analytics.refresh()
+    except Exception as e:
+        st.error(f"Mise à jour des agrégats impossible : {e}")
+
+    period = st.radio("Période", list(PERIODS), horizontal=True)
+    days = PERIODS[period]
+    since = date.today() - timedelta(days=days) if days else None
+
+    totals = analytics.daily_totals(since)
+    if totals.empty:
+        st.info("Aucun téléchargement journalisé sur la période. Lancez d'abord l'Agent 1.")
+    else:
+        downloads = int(totals["downloads"].sum())
+        failures = int(totals["failures"].sum())
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Téléchargements", downloads)
+        col2.metric("Taux d'échec", f"{failures / downloads:.1%}" if downloads else "-")
+        col3.metric("Volume téléchargé", f"{totals['bytes'].sum() / 1024**2:.1f} MB")
+
+        st.subheader("Téléchargements par section et par jour")
+        per_section = analytics.section_daily(since)
+        st.bar_chart(per_section.pivot_table(index="day", columns="section", values="downloads", fill_value=0))
+
+        col_fail, col_bytes = st.columns(2)
+        with col_fail:
+            st.subheader("Taux d'échec par jour")
+            st.line_chart(totals.set_index("day")[["failure_rate"]].fillna(0))
+        with col_bytes:
+            st.subheader("Volume cumulé (MB)")
+            cumulative = (totals.set_index("day")["bytes"].cumsum() / 1024**2).rename("MB")
+            st.area_chart(cumulative)
+
+    st.subheader("Occurrences de mots-clés par document (dernière analyse)")
+    hits = analytics.keyword_hits()
+    if hits.empty:
+        st.info("Aucun résultat d'analyse. Lancez l'analyse de l'Agent 2.")
+    else:
+        st.bar_chart(hits.set_index("document")[["hits"]], horizontal=True)
+        st.dataframe(hits.rename(columns={"document": "Document", "hits": "Occurrences",
+                                          "keywords": "Mots-clés distincts", "analysed_at": "Analysé le"}),
+                     use_container_width=True, height=250)